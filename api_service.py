@@ -1,19 +1,38 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 import os
 import time
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 import asyncio
 from pathlib import Path
-import whisper
-import torch
-import subprocess
 import json
 import threading
-from queue import Queue
+from contextlib import nullcontext
+from env_probe import probe_environment, cuda_available
+from ffmpeg_toolchain import resolve_toolchain, ffmpeg_command, ffprobe_command
+from inference_pool import InferencePool, QueueFullError
+from job_scheduler import FairShareScheduler, PRIORITY_CLASSES, DEFAULT_PRIORITY
+from media_probe import probe_duration
+from model_registry import ModelRegistry
+from audio_ingest import load_audio_pcm, audio_duration
+from rtf_stats import RTFStore
+from model_precision import CPU_PRECISIONS, resolve_precision, precision_cache_options, load_model
+from model_compile import warm_up, is_compiled
+from metrics import MetricsRegistry, RTF_BUCKETS, register_process_metrics
+from stage_timing import StageTimer, track, instrument_model
+from cancellation import CancelToken, CancelledError, install_cancel_check
+from job_profiler import PROFILERS, profile_path, profile_to_file
+from result_cache import TranscriptionCache, make_cache_key
+from upload_stream import spool_multipart, UploadTooLargeError, UploadFormatError
+from task_store import create_task_store, FINISHED_STATUSES
+from long_audio import transcribe_incremental
+from batch_inference import BatchInferenceEngine
+from live_transcriber import LiveTranscriber
+from audio_ingest import pcm_bytes_to_float32
+from task_events import TaskEventBroker, TERMINAL_EVENTS, format_sse
 
 app = FastAPI(
     title="视频转文字API服务",
@@ -25,18 +44,48 @@ app = FastAPI(
 class Config:
     MODEL_SIZE = "base"
     OUTPUT_DIR = "output"
+    PROFILE_DIR = os.environ.get("VTT_PROFILE_DIR", "profiles")  # 按请求剖析时结果文件的保存目录
     TEMP_DIR = "temp"
-    USE_GPU = torch.cuda.is_available()
-    WHISPER_MODEL = None
+    CACHE_DIR = os.path.join("cache", "transcripts")
+    CACHE_ENABLED = os.environ.get("VTT_CACHE_ENABLED", "1") != "0"  # 是否启用转写结果缓存
+    CACHE_MAX_MB = float(os.environ.get("VTT_CACHE_MAX_MB", "1024"))  # 缓存容量上限
+    CACHE_MAX_AGE_DAYS = float(os.environ.get("VTT_CACHE_MAX_AGE_DAYS", "30"))  # 缓存保存天数
+    LANGUAGE = "zh"
+    VAD_ENABLED = os.environ.get("VTT_VAD_ENABLED", "1") != "0"  # 转写前跳过静音
+    BATCH_INFERENCE = os.environ.get("VTT_BATCH_INFERENCE", "0") == "1"  # 跨任务合并30秒窗口批量推理
+    BATCH_SIZE = int(os.environ.get("VTT_BATCH_SIZE", "8"))  # 每批最多窗口数
+    BATCH_WAIT_MS = int(os.environ.get("VTT_BATCH_WAIT_MS", "50"))  # 凑批最长等待时间
+    USE_GPU = None  # None 表示按环境探测结果自动选择
+    PRECISION = os.environ.get("VTT_PRECISION", "fp32")  # CPU推理精度：fp32、int8、bf16（GPU固定fp16）
+    COMPILE = os.environ.get("VTT_COMPILE", "0") == "1"  # 用 torch.compile 编译模型（首次加载较慢，之后每个窗口更快）
+    PRELOAD_MODELS = os.environ.get("VTT_PRELOAD_MODELS", MODEL_SIZE)  # 启动时预加载的模型，如 "base,medium:int8"，为空时不预加载
+    MAX_LOADED_MODELS = int(os.environ.get("VTT_MAX_LOADED_MODELS", "2"))  # 同时驻留的模型数
+    MODEL_MEMORY_MB = float(os.environ["VTT_MODEL_MEMORY_MB"]) if os.environ.get("VTT_MODEL_MEMORY_MB") else None  # 模型内存上限
+    MODEL_IDLE_TIMEOUT = int(os.environ.get("VTT_MODEL_IDLE_TIMEOUT", "600"))  # 模型闲置多久后释放（秒）
     SERVER_STATUS = "stopped"  # 服务器状态：stopped, running, error
     SERVER_ERROR = None  # 服务器错误信息
     TASK_COUNT = 0  # 当前任务数
     COMPLETED_TASKS = 0  # 已完成任务数
     STATUS_CALLBACK = None  # 状态回调函数
-
-# 确保输出目录存在
-os.makedirs(Config.OUTPUT_DIR, exist_ok=True)
-os.makedirs(Config.TEMP_DIR, exist_ok=True)
+    INFERENCE_WORKERS = int(os.environ.get("VTT_INFERENCE_WORKERS", "1"))  # 推理工作线程数
+    MAX_QUEUE_SIZE = int(os.environ.get("VTT_MAX_QUEUE_SIZE", "16"))  # 排队任务上限
+    RETRY_AFTER = 30  # 队列已满且无历史耗时时建议的重试秒数
+    SCHED_AGING = float(os.environ.get("VTT_SCHED_AGING", "1.0"))  # 排队每等待1秒，预计耗时抵扣的秒数（防止长任务饿死）
+    SCHED_CLASS_SPAN = float(os.environ.get("VTT_SCHED_CLASS_SPAN", "600"))  # 相邻优先级之间相当于多少秒预计耗时
+    SCHED_USAGE_HALF_LIFE = float(os.environ.get("VTT_SCHED_USAGE_HALF_LIFE", "300"))  # 客户端用量衰减半衰期（秒）
+    SCHED_LONG_JOB_SECONDS = float(os.environ.get("VTT_SCHED_LONG_JOB_SECONDS", "120"))  # 预计耗时超过此值为长任务
+    SCHED_RESERVED_WORKERS = int(os.environ.get("VTT_SCHED_RESERVED_WORKERS", "1"))  # 为短任务预留的工作线程数（多于1个线程时生效）
+    UNKNOWN_BITRATE = 128 * 1024  # 无法读取时长时按每秒字节数估算音频时长
+    TASK_STORE = os.environ.get("VTT_TASK_STORE", "sqlite:///tasks.db")  # 任务存储：sqlite:///路径 或 memory://
+    TASK_TTL = int(os.environ.get("VTT_TASK_TTL", str(7 * 86400)))  # 已结束任务保留秒数
+    STREAM_CHUNK_SECONDS = int(os.environ.get("VTT_STREAM_CHUNK_SECONDS", "30"))  # 逐块转写并推送分段的块长
+    STREAM_KEEPALIVE = 15  # SSE 连接无事件时发送心跳的间隔（秒）
+    LIVE_WINDOW_SECONDS = float(os.environ.get("VTT_LIVE_WINDOW_SECONDS", "30"))  # 实时转写最长窗口
+    LIVE_STEP_SECONDS = float(os.environ.get("VTT_LIVE_STEP_SECONDS", "5"))  # 实时转写间隔
+    MAX_LIVE_SESSIONS = int(os.environ.get("VTT_MAX_LIVE_SESSIONS", "4"))  # 同时进行的实时转写会话上限
+    FFMPEG = os.environ.get("VTT_FFMPEG")  # ffmpeg路径，默认自动查找
+    UPLOAD_CHUNK_SIZE = 1024 * 1024  # 上传文件分块写入大小
+    MAX_UPLOAD_SIZE = int(os.environ.get("VTT_MAX_UPLOAD_MB", "4096")) * 1024 * 1024  # 上传文件大小上限
 
 # 响应模型
 class TranscriptionResponse(BaseModel):
@@ -51,9 +100,205 @@ class TranscriptionResult(BaseModel):
     error: Optional[str] = None
     duration: Optional[float] = None
     file_path: Optional[str] = None
+    cached: bool = False
+    speech_ratio: Optional[float] = None
+    skipped_seconds: Optional[float] = None
+    audio_seconds: Optional[float] = None
+    eta_seconds: Optional[float] = None  # 预计剩余处理秒数（按实测实时率估算）
+    stages: Optional[Dict[str, float]] = None  # 各阶段耗时（秒）
+    profile_path: Optional[str] = None  # 剖析结果文件
+    priority: Optional[str] = None  # 调度优先级：high、normal、low
+
+# 任务状态存储：只保存状态、耗时和输出文件路径，转写全文保存在输出文件中
+task_store = create_task_store(Config.TASK_STORE, ttl=Config.TASK_TTL)
+
+# 任务事件：转写进度和已完成的分段，供 SSE 接口实时推送
+task_events = TaskEventBroker()
+
+@app.on_event("startup")
+def prepare_directories():
+    """确保输出目录和临时目录存在（在服务启动时创建，导入模块没有副作用）"""
+    os.makedirs(Config.OUTPUT_DIR, exist_ok=True)
+    os.makedirs(Config.TEMP_DIR, exist_ok=True)
+
+@app.on_event("startup")
+def resolve_ffmpeg():
+    """服务启动时解析一次ffmpeg，所有任务共用"""
+    if resolve_toolchain(Config.FFMPEG) is None:
+        print("警告: 找不到可用的ffmpeg，转写任务将失败")
+
+# Prometheus 指标
+metrics = MetricsRegistry()
+stage_duration = metrics.histogram(
+    "vtt_stage_duration_seconds", "Duration of each pipeline stage in seconds.", ["stage"])
+realtime_factor = metrics.histogram(
+    "vtt_realtime_factor", "Transcription time divided by audio duration.", ["model_size", "precision"], RTF_BUCKETS)
+ingested_bytes = metrics.counter("vtt_ingested_bytes_total", "Bytes of uploaded media received.")
+ingested_audio = metrics.counter("vtt_ingested_audio_seconds_total", "Seconds of decoded audio processed.")
+tasks_total = metrics.counter(
+    "vtt_tasks_total", "Tasks by outcome (accepted, cached, completed, failed, rejected).", ["status"])
+metrics.gauge_func("vtt_queue_depth", "Tasks waiting in the inference queue.", lambda: inference_pool.queue_depth())
+metrics.gauge_func("vtt_in_flight_jobs", "Tasks currently being processed.", lambda: inference_pool.in_flight())
+metrics.gauge_func("vtt_live_sessions", "Open live transcription sessions.", lambda: live_sessions)
+metrics.gauge_func("vtt_loaded_models", "Models currently resident in memory.",
+                   lambda: len(model_registry.loaded_models()))
+metrics.counter_func("vtt_cache_requests_total", "Transcript cache lookups by result.",
+                     lambda: {("hit",): result_cache.stats()["hits"], ("miss",): result_cache.stats()["misses"]},
+                     ["result"])
+metrics.gauge_func("vtt_cache_hit_ratio", "Transcript cache hit ratio since start.",
+                   lambda: result_cache.stats()["hit_rate"])
+register_process_metrics(metrics)
+
+# 预加载状态：pending -> loading -> ready / failed，就绪检查据此决定是否接收流量
+preload_status = {"status": "pending", "models": {}}
+
+def parse_preload_models(value: str):
+    """解析 "base,medium:int8" 形式的预加载列表，返回 [(模型大小, 请求的精度)]"""
+    models = []
+    for item in value.split(","):
+        item = item.strip()
+        if item:
+            model_size, _, precision = item.partition(":")
+            models.append((model_size, precision or None))
+    return models
+
+def preload_models():
+    """加载并常驻预加载列表中的模型，每个模型用一段合成音频完整转写一次以完成预热"""
+    preload_status["status"] = "loading"
+    failed = False
+    for model_size, requested in parse_preload_models(Config.PRELOAD_MODELS):
+        device, precision = get_device_and_precision(requested)
+        name = f"{model_size}:{precision}"
+        preload_status["models"][name] = {"status": "loading"}
+        start = time.time()
+        try:
+            if not model_registry.is_known_model(model_size):
+                raise ValueError(f"不支持的模型: {model_size}")
+            model_registry.pin(model_size, device, precision)
+            # 预热期间持有模型，不与第一个任务同时运行
+            with model_registry.use(model_size, device, precision) as model:
+                if not is_compiled(model):
+                    # 编译成功时加载过程中已经预热过；未开启编译或编译失败退回 eager 时在这里预热
+                    warm_up(model)
+            preload_status["models"][name] = {"status": "ready", "load_seconds": round(time.time() - start, 2)}
+            print(f"模型 {name} 已加载并预热 ({time.time() - start:.1f}秒)")
+        except Exception as e:
+            failed = True
+            preload_status["models"][name] = {"status": "failed", "error": str(e)}
+            print(f"警告: 模型 {name} 预加载失败: {str(e)}")
+    preload_status["status"] = "failed" if failed else "ready"
+
+@app.on_event("startup")
+def start_preload():
+    """在后台线程中预加载模型，期间存活检查正常返回，就绪检查返回 503"""
+    count = len(parse_preload_models(Config.PRELOAD_MODELS))
+    if count > Config.MAX_LOADED_MODELS:
+        print(f"警告: 预加载 {count} 个模型，超过 VTT_MAX_LOADED_MODELS={Config.MAX_LOADED_MODELS}，其他模型将无法加载")
+    threading.Thread(target=preload_models, name="model-preload", daemon=True).start()
+
+@app.on_event("startup")
+def recover_tasks():
+    """上次运行中未完成的任务已无法继续，标记为失败"""
+    task_store.fail_unfinished("服务重启，任务中断")
+
+# 转写结果缓存：同样的文件、模型和解码参数直接返回已有结果
+result_cache = TranscriptionCache(
+    Config.CACHE_DIR,
+    max_size_mb=Config.CACHE_MAX_MB,
+    max_age_days=Config.CACHE_MAX_AGE_DAYS
+)
+
+# 解码参数（同时作为缓存键的一部分）
+DECODE_OPTIONS = {"task": "transcribe"}
+
+def get_cache_key(content_hash, model_size, precision=None):
+    device, precision = get_device_and_precision(precision)
+    options = dict(DECODE_OPTIONS, fp16=precision == "fp16", vad=Config.VAD_ENABLED,
+                   chunk_seconds=Config.STREAM_CHUNK_SECONDS)
+    options = precision_cache_options(options, precision)
+    if Config.BATCH_INFERENCE:
+        options["batched"] = True
+    return make_cache_key(content_hash, model_size, Config.LANGUAGE, options)
+
+# 各模型和设备的实测实时率，用于估算任务剩余时间
+rtf_store = RTFStore()
+
+# 模型注册表：按需加载不同大小的模型，闲置或超出上限时释放
+model_registry = ModelRegistry(
+    max_models=Config.MAX_LOADED_MODELS,
+    max_memory_mb=Config.MODEL_MEMORY_MB,
+    idle_timeout=Config.MODEL_IDLE_TIMEOUT,
+    loader=lambda model_size, device, precision: load_registry_model(model_size, device, precision)
+)
+
+def load_registry_model(model_size, device, precision):
+    """模型注册表的加载器，记录加载耗时"""
+    with stage_duration.time(stage="model_load"):
+        return load_model(model_size, device, precision, compiled=Config.COMPILE)
+
+def get_device_and_precision(precision=None):
+    """当前服务使用的设备和精度，precision 为请求的 CPU 精度（默认取 VTT_PRECISION）"""
+    use_gpu = Config.USE_GPU if Config.USE_GPU is not None else cuda_available()
+    device = "cuda" if use_gpu else "cpu"
+    return device, resolve_precision(device, precision or Config.PRECISION)
+
+# 批量推理引擎，每种模型一个
+batch_engines = {}
+batch_engines_lock = threading.Lock()
+
+def get_batch_engine(model_size: str, precision: Optional[str] = None):
+    """获取（必要时创建）指定模型和精度的批量推理引擎"""
+    device, precision = get_device_and_precision(precision)
+    with batch_engines_lock:
+        engine = batch_engines.get((model_size, precision))
+        if engine is None:
+            engine = BatchInferenceEngine(
+                lambda: model_registry.use(model_size, device, precision),
+                max_batch_size=Config.BATCH_SIZE,
+                max_wait_ms=Config.BATCH_WAIT_MS,
+                language=Config.LANGUAGE,
+                fp16=precision == "fp16"
+            )
+            batch_engines[(model_size, precision)] = engine
+        return engine
+
+# 推理任务执行器：ffmpeg 和 Whisper 都在工作线程中执行，不阻塞事件循环
+inference_pool = InferencePool(
+    num_workers=Config.INFERENCE_WORKERS,
+    max_queue_size=Config.MAX_QUEUE_SIZE,
+    default_retry_after=Config.RETRY_AFTER,
+    scheduler=FairShareScheduler(
+        Config.INFERENCE_WORKERS,
+        class_span=Config.SCHED_CLASS_SPAN,
+        aging=Config.SCHED_AGING,
+        usage_half_life=Config.SCHED_USAGE_HALF_LIFE,
+        long_job_seconds=Config.SCHED_LONG_JOB_SECONDS,
+        reserved_workers=Config.SCHED_RESERVED_WORKERS
+    )
+)
+
+def probe_upload_duration(path: str):
+    """读取上传文件的时长（秒），失败时返回 None"""
+    try:
+        return probe_duration(path, ffprobe_command(Config.FFMPEG), ffmpeg_command(Config.FFMPEG))
+    except Exception:
+        return None
 
-# 任务状态存储
-tasks = {}
+def expected_cost(audio_seconds: float, model_size: str, precision: Optional[str]):
+    """任务的预计处理秒数：音频时长 × 实测实时率"""
+    device, precision = get_device_and_precision(precision)
+    return rtf_store.eta(audio_seconds, model_size, device, precision)
+
+def client_identity(request: Request, client_id: Optional[str] = None):
+    """公平分配所用的提交方标识：X-Client-Id 头或 client_id 参数，都没有时取客户端地址"""
+    identity = request.headers.get("X-Client-Id") or client_id
+    if identity:
+        return identity[:128]
+    return request.client.host if request.client else ""
+
+# 排队和处理中任务的取消标志，任务结束后移除
+cancel_tokens: Dict[str, CancelToken] = {}
+cancel_tokens_lock = threading.Lock()
 
 def update_status(status=None, error=None, task_count=None, completed_tasks=None):
     """更新服务状态并通知GUI"""
@@ -74,98 +319,321 @@ def update_status(status=None, error=None, task_count=None, completed_tasks=None
             "completed_tasks": Config.COMPLETED_TASKS
         })
 
-async def process_video(task_id: str, video_path: str, model_size: str = "base"):
+def process_video(task_id: str, video_path: str, model_size: str = "base", content_hash: Optional[str] = None,
+                  precision: Optional[str] = None, spool_seconds: float = 0.0, profile: Optional[str] = None):
+    """在推理工作线程中执行：提取音频并转写，记录各阶段耗时，按需剖析"""
+    timer = StageTimer()
+    timer.add("spool", spool_seconds)
+    profile_file = profile_path(Config.PROFILE_DIR, task_id, profile) if profile else None
+    with cancel_tokens_lock:
+        token = cancel_tokens.setdefault(task_id, CancelToken())
     try:
+        # 取消请求可能恰好在任务出队时到达
+        token.check()
         start_time = time.time()
-        tasks[task_id] = {"status": "processing", "text": None, "error": None}
-        update_status(task_count=len(tasks))
-
-        # 确保模型已加载
-        if Config.WHISPER_MODEL is None:
-            Config.WHISPER_MODEL = whisper.load_model(model_size, device="cuda" if Config.USE_GPU else "cpu")
-
-        # 提取音频
-        audio_path = os.path.join(Config.TEMP_DIR, f"{task_id}_audio.wav")
-        result = subprocess.run([
-            'ffmpeg', '-i', video_path,
-            '-vn', '-acodec', 'pcm_s16le',
-            '-ar', '16000', '-ac', '1',
-            '-y', audio_path
-        ], capture_output=True, text=True)
-
-        if result.returncode != 0:
-            raise Exception(f"音频提取失败: {result.stderr}")
-
-        # 转写音频
-        result = Config.WHISPER_MODEL.transcribe(
-            audio_path,
-            language='zh',
-            task='transcribe',
-            fp16=Config.USE_GPU
-        )
+        task = task_store.get(task_id)
+        if task and task.get("created_at"):
+            stage_duration.observe(start_time - task["created_at"], stage="queue")
+        task_store.update(task_id, status="processing", started_at=start_time)
+        task_events.publish(task_id, "status", {"status": "processing"})
 
-        # 保存结果
-        output_filename = f"{task_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-        output_path = os.path.join(Config.OUTPUT_DIR, output_filename)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(result["text"])
+        with timer.activate(), token.activate(), \
+                (profile_to_file(profile, profile_file) if profile else nullcontext()):
+            result, vad_stats, output_path = transcribe_task(task_id, video_path, model_size, content_hash, precision,
+                                                             token)
 
         # 清理临时文件
-        os.remove(audio_path)
         os.remove(video_path)
 
         # 更新任务状态
-        duration = time.time() - start_time
-        tasks[task_id] = {
-            "status": "completed",
+        finished_at = time.time()
+        stages = timer.breakdown(total=finished_at - start_time + spool_seconds)
+        task_store.update(
+            task_id,
+            status="completed",
+            duration=finished_at - start_time,
+            file_path=output_path,
+            finished_at=finished_at,
+            stages=stages,
+            profile_path=profile_file,
+            **(vad_stats or {})
+        )
+
+        task_events.publish(task_id, "completed", {
             "text": result["text"],
-            "duration": duration,
-            "file_path": output_path
-        }
-        
+            "duration": round(finished_at - start_time, 2),
+            "cached": False,
+            "stages": stages
+        })
+
         # 更新完成任务数
+        tasks_total.inc(status="completed")
         update_status(completed_tasks=Config.COMPLETED_TASKS + 1)
 
+    except CancelledError:
+        finish_cancelled(task_id, video_path, stages=timer.breakdown())
     except Exception as e:
-        tasks[task_id] = {"status": "failed", "error": str(e)}
+        tasks_total.inc(status="failed")
+        task_store.update(task_id, status="failed", error=str(e), finished_at=time.time(),
+                          stages=timer.breakdown(), profile_path=profile_file)
+        task_events.publish(task_id, "failed", {"error": str(e)})
         if os.path.exists(video_path):
             os.remove(video_path)
-        if os.path.exists(audio_path):
-            os.remove(audio_path)
         update_status(error=str(e))
+    finally:
+        with cancel_tokens_lock:
+            cancel_tokens.pop(task_id, None)
+
+def finish_cancelled(task_id: str, video_path: str, **fields):
+    """把任务标记为已取消并删除上传的临时文件"""
+    tasks_total.inc(status="cancelled")
+    task_store.update(task_id, status="cancelled", error="任务已取消", finished_at=time.time(), **fields)
+    task_events.publish(task_id, "cancelled", {"error": "任务已取消"})
+    if os.path.exists(video_path):
+        os.remove(video_path)
+
+def transcribe_task(task_id: str, video_path: str, model_size: str, content_hash: Optional[str],
+                    precision: Optional[str], cancel_token: Optional[CancelToken] = None):
+    """解码、转写并写出结果，返回 (转写结果, VAD统计, 输出文件路径)
+
+    取消时 ffmpeg 立即被杀掉，转写在下一个30秒窗口前中断，抛出 CancelledError。
+    """
+    device, precision = get_device_and_precision(precision)
+
+    # 提取音频（直接解码到内存）
+    try:
+        with stage_duration.time(stage="extract"), track("decode"):
+            audio = load_audio_pcm(video_path, ffmpeg_command(Config.FFMPEG), cancel_token=cancel_token)
+    except CancelledError:
+        raise
+    except Exception as e:
+        raise Exception(f"音频提取失败: {str(e)}")
+    audio_seconds = audio_duration(audio)
+    ingested_audio.inc(audio_seconds)
+    task_store.update(task_id, audio_seconds=audio_seconds)
+
+    # 逐块转写，每块完成后立即推送其中的分段
+    stream_options = dict(
+        chunk_seconds=Config.STREAM_CHUNK_SECONDS,
+        use_vad=Config.VAD_ENABLED,
+        cancel_token=cancel_token,
+        on_segment=lambda segment: task_events.publish(task_id, "segment", {
+            "id": segment["id"],
+            "start": round(segment["start"], 2),
+            "end": round(segment["end"], 2),
+            "text": segment["text"]
+        }),
+        on_progress=lambda processed, total: task_events.publish(task_id, "progress", {
+            "processed_seconds": round(processed, 2),
+            "total_seconds": round(total, 2),
+            "progress": round(processed / total, 3) if total else 1.0
+        })
+    )
+    # 转写音频（按请求的模型大小从注册表获取模型）
+    if Config.BATCH_INFERENCE:
+        # 窗口与其他任务合并成批，由批量推理引擎统一执行（编码器和解码器耗时计入 other）
+        engine = get_batch_engine(model_size, precision)
+        transcribe_start = time.time()
+        result, vad_stats = transcribe_incremental(
+            lambda speech, prompt: engine.transcribe(speech, cancel_token),
+            audio,
+            **stream_options
+        )
+        transcribe_seconds = time.time() - transcribe_start
+    else:
+        inference_seconds = [0.0]
 
-@app.post("/api/v1/transcribe", response_model=TranscriptionResponse)
+        def transcribe_chunk(speech, prompt):
+            # 每块单独取得模型的独占使用权，同一模型上的多个任务和实时转写按块交替执行
+            with model_registry.use(model_size, device, precision) as model:
+                install_cancel_check(model)
+                instrument_model(model)
+                chunk_start = time.time()
+                try:
+                    return model.transcribe(
+                        speech,
+                        language=Config.LANGUAGE,
+                        fp16=precision == "fp16",
+                        initial_prompt=prompt,
+                        **DECODE_OPTIONS
+                    )
+                finally:
+                    inference_seconds[0] += time.time() - chunk_start
+
+        result, vad_stats = transcribe_incremental(transcribe_chunk, audio, **stream_options)
+        # 只计推理本身的耗时，不含模型加载和等待其他任务释放模型的时间
+        transcribe_seconds = inference_seconds[0]
+
+    stage_duration.observe(transcribe_seconds, stage="transcribe")
+    if audio_seconds > 0:
+        realtime_factor.observe(transcribe_seconds / audio_seconds, model_size=model_size, precision=precision)
+    rtf_store.record(model_size, device, precision, audio_seconds, transcribe_seconds)
+
+    # 保存结果
+    with stage_duration.time(stage="write"), track("write"):
+        output_path = write_output(task_id, result["text"])
+    if Config.CACHE_ENABLED and content_hash:
+        result_cache.put(get_cache_key(content_hash, model_size, precision), {"text": result["text"]})
+    return result, vad_stats, output_path
+
+def write_output(task_id: str, text: str):
+    """把转写文本写入输出目录，返回文件路径"""
+    output_filename = f"{task_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+    output_path = os.path.join(Config.OUTPUT_DIR, output_filename)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return output_path
+
+def read_output(file_path: Optional[str]):
+    """读取任务的输出文件，文件已被删除时返回 None"""
+    if not file_path or not os.path.exists(file_path):
+        return None
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+# 支持的上传文件类型
+ALLOWED_UPLOAD_TYPES = [
+    'video/mp4', 'video/avi', 'video/x-msvideo',
+    'video/quicktime', 'video/x-ms-wmv', 'video/x-flv',
+    'video/x-matroska', 'video/webm'
+]
+
+# 请求体由 spool_multipart 直接解析，这里补充 OpenAPI 中的表单说明
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"]
+                }
+            }
+        }
+    }
+}
+
+@app.post("/api/v1/transcribe", response_model=TranscriptionResponse, openapi_extra=UPLOAD_REQUEST_BODY)
 async def transcribe_video(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
-    model_size: str = "base"
+    request: Request,
+    model_size: str = "base",
+    precision: Optional[str] = None,
+    profile: Optional[str] = None,
+    priority: str = DEFAULT_PRIORITY,
+    client_id: Optional[str] = None
 ):
     try:
-        # 验证文件类型
-        allowed_types = [
-            'video/mp4', 'video/avi', 'video/x-msvideo',
-            'video/quicktime', 'video/x-ms-wmv', 'video/x-flv',
-            'video/x-matroska', 'video/webm'
-        ]
-        if file.content_type not in allowed_types:
-            raise HTTPException(status_code=400, detail="不支持的文件类型")
+        if not model_registry.is_known_model(model_size):
+            raise HTTPException(status_code=400, detail=f"不支持的模型: {model_size}")
+        if precision is not None and precision not in CPU_PRECISIONS:
+            raise HTTPException(status_code=400, detail=f"不支持的精度: {precision}，可选 {', '.join(CPU_PRECISIONS)}")
+        if profile is not None and profile not in PROFILERS:
+            raise HTTPException(status_code=400, detail=f"不支持的剖析方式: {profile}，可选 {', '.join(PROFILERS)}")
+        if priority not in PRIORITY_CLASSES:
+            raise HTTPException(status_code=400, detail=f"不支持的优先级: {priority}，可选 {', '.join(PRIORITY_CLASSES)}")
+        client = client_identity(request, client_id)
 
         # 生成任务ID
         task_id = f"task_{int(time.time())}_{os.urandom(4).hex()}"
         
-        # 保存上传的文件
-        temp_video_path = os.path.join(Config.TEMP_DIR, f"{task_id}_{file.filename}")
-        with open(temp_video_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-
-        # 启动后台处理任务
-        background_tasks.add_task(
-            process_video,
+        # 边接收边写入临时目录（文件类型在读到表单头部时验证），超过大小上限时中止
+        temp_video_path = os.path.join(Config.TEMP_DIR, f"{task_id}_upload")
+        try:
+            spool_start = time.perf_counter()
+            _, _, file_size, content_hash = await spool_multipart(
+                request,
+                temp_video_path,
+                Config.MAX_UPLOAD_SIZE,
+                allowed_types=ALLOWED_UPLOAD_TYPES,
+                chunk_size=Config.UPLOAD_CHUNK_SIZE
+            )
+            spool_seconds = time.perf_counter() - spool_start
+            stage_duration.observe(spool_seconds, stage="upload")
+        except UploadFormatError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except UploadTooLargeError:
+            tasks_total.inc(status="rejected")
+            raise HTTPException(
+                status_code=413,
+                detail=f"文件超过大小上限 {Config.MAX_UPLOAD_SIZE // (1024 * 1024)}MB"
+            )
+
+        ingested_bytes.inc(file_size)
+
+        # 命中缓存时直接完成任务，不再进入推理队列
+        cached = result_cache.get(get_cache_key(content_hash, model_size, precision)) if Config.CACHE_ENABLED else None
+        if cached is not None:
+            os.remove(temp_video_path)
+            now = time.time()
+            task_store.create(
+                task_id,
+                status="completed",
+                model_size=model_size,
+                precision=get_device_and_precision(precision)[1],
+                file_size=file_size,
+                content_hash=content_hash,
+                file_path=write_output(task_id, cached["text"]),
+                duration=0.0,
+                cached=True,
+                stages={"spool": round(spool_seconds, 3)},
+                created_at=now,
+                finished_at=now
+            )
+            task_events.publish(task_id, "completed", {"text": cached["text"], "duration": 0.0, "cached": True})
+            tasks_total.inc(status="cached")
+            update_status(task_count=task_store.count(), completed_tasks=Config.COMPLETED_TASKS + 1)
+            return TranscriptionResponse(
+                task_id=task_id,
+                status="completed",
+                message="命中缓存，已返回已有结果"
+            )
+
+        # 读取时长估算处理耗时，调度器据此让短任务先执行
+        probed_seconds = await asyncio.get_running_loop().run_in_executor(
+            None, probe_upload_duration, temp_video_path)
+        audio_seconds = probed_seconds if probed_seconds else file_size / Config.UNKNOWN_BITRATE
+        cost = expected_cost(audio_seconds, model_size, precision)
+
+        # 提交到推理队列，队列已满时拒绝并提示重试时间
+        task_store.create(
             task_id,
-            temp_video_path,
-            model_size
+            status="queued",
+            model_size=model_size,
+            precision=get_device_and_precision(precision)[1],
+            file_size=file_size,
+            content_hash=content_hash,
+            audio_seconds=round(probed_seconds, 3) if probed_seconds else None,
+            expected_seconds=round(cost, 1),
+            priority=priority,
+            client=client
         )
+        task_events.publish(task_id, "status", {"status": "queued"})
+        with cancel_tokens_lock:
+            cancel_tokens[task_id] = CancelToken()
+        try:
+            inference_pool.schedule(
+                process_video,
+                (task_id, temp_video_path, model_size, content_hash, precision, spool_seconds, profile),
+                cost=cost,
+                priority=priority,
+                client=client,
+                job_id=task_id
+            )
+        except QueueFullError as e:
+            with cancel_tokens_lock:
+                cancel_tokens.pop(task_id, None)
+            tasks_total.inc(status="rejected")
+            task_store.update(task_id, status="failed", error="任务队列已满", finished_at=time.time())
+            task_events.publish(task_id, "failed", {"error": "任务队列已满"})
+            os.remove(temp_video_path)
+            raise HTTPException(
+                status_code=503,
+                detail="服务繁忙，任务队列已满",
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        tasks_total.inc(status="accepted")
+        update_status(task_count=task_store.count())
 
         return TranscriptionResponse(
             task_id=task_id,
@@ -173,35 +641,271 @@ async def transcribe_video(
             message="任务已接受，正在处理中"
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def estimate_remaining(task: dict):
+    """按实测实时率估算任务剩余处理时间，音频时长未知或任务已结束时返回 None"""
+    audio_seconds = task.get("audio_seconds")
+    if audio_seconds is None or task["status"] not in ("queued", "processing"):
+        return None
+    device, precision = get_device_and_precision(task.get("precision"))
+    expected = rtf_store.eta(audio_seconds, task.get("model_size") or Config.MODEL_SIZE, device, precision)
+    if task["status"] == "processing" and task.get("started_at"):
+        expected -= time.time() - task["started_at"]
+    return round(max(expected, 0.0), 1)
+
 @app.get("/api/v1/tasks/{task_id}", response_model=TranscriptionResult)
 async def get_task_status(task_id: str):
-    if task_id not in tasks:
+    task = task_store.get(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="任务不存在")
 
-    task = tasks[task_id]
     return TranscriptionResult(
         task_id=task_id,
         status=task["status"],
-        text=task.get("text"),
+        text=read_output(task.get("file_path")) if task["status"] == "completed" else None,
         error=task.get("error"),
         duration=task.get("duration"),
-        file_path=task.get("file_path")
+        file_path=task.get("file_path"),
+        cached=task.get("cached", False),
+        speech_ratio=task.get("speech_ratio"),
+        skipped_seconds=task.get("skipped_seconds"),
+        audio_seconds=task.get("audio_seconds"),
+        eta_seconds=estimate_remaining(task),
+        stages=task.get("stages"),
+        profile_path=task.get("profile_path"),
+        priority=task.get("priority")
+    )
+
+@app.delete("/api/v1/tasks/{task_id}", response_model=TranscriptionResponse)
+async def cancel_task(task_id: str):
+    """取消任务：排队中的任务直接移出队列，处理中的任务杀掉 ffmpeg 并在下一个30秒窗口前中断"""
+    task = task_store.get(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    if task["status"] in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"任务已结束: {task['status']}")
+
+    job = inference_pool.cancel(task_id)
+    if job is not None:
+        video_path = job.args[1]
+        finish_cancelled(task_id, video_path)
+        with cancel_tokens_lock:
+            cancel_tokens.pop(task_id, None)
+        return TranscriptionResponse(task_id=task_id, status="cancelled", message="任务已取消")
+
+    with cancel_tokens_lock:
+        token = cancel_tokens.get(task_id)
+    if token is None:
+        # 任务在此期间已经结束
+        task = task_store.get(task_id)
+        raise HTTPException(status_code=409, detail=f"任务已结束: {task['status'] if task else 'unknown'}")
+    token.cancel()
+    return TranscriptionResponse(task_id=task_id, status="cancelling", message="正在取消，当前窗口结束后停止")
+
+def final_event(task: dict):
+    """没有事件记录的任务（已结束较久或服务重启前创建）按存储中的状态生成一个事件"""
+    if task["status"] == "completed":
+        return "completed", {
+            "text": read_output(task.get("file_path")),
+            "duration": task.get("duration"),
+            "cached": task.get("cached", False),
+            "stages": task.get("stages")
+        }
+    if task["status"] in TERMINAL_EVENTS:
+        return task["status"], {"error": task.get("error")}
+    return "status", {"status": task["status"]}
+
+async def task_event_stream(task_id: str, task: dict, after: int, request: Request):
+    history, queue = task_events.subscribe(task_id, after)
+    if queue is None:
+        event, data = final_event(task)
+        yield format_sse(after + 1, event, data)
+        return
+
+    try:
+        # 先补发客户端尚未收到的事件
+        for seq, event, data in history:
+            yield format_sse(seq, event, data)
+            if event in TERMINAL_EVENTS:
+                return
+
+        while True:
+            try:
+                seq, event, data = await asyncio.wait_for(queue.get(), timeout=Config.STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(seq, event, data)
+            if event in TERMINAL_EVENTS:
+                return
+    finally:
+        task_events.unsubscribe(task_id, queue)
+
+@app.get("/api/v1/tasks/{task_id}/stream")
+async def stream_task(task_id: str, request: Request):
+    """以 Server-Sent Events 推送任务进度（progress）、已完成的分段（segment）和最终结果"""
+    task = task_store.get(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+
+    # 断线重连时从 Last-Event-ID 之后继续推送
+    last_event_id = request.headers.get("last-event-id", "")
+    after = int(last_event_id) if last_event_id.isdigit() else 0
+    return StreamingResponse(
+        task_event_stream(task_id, task, after, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
+# 进行中的实时转写会话数
+live_sessions = 0
+live_sessions_lock = threading.Lock()
+
+@app.websocket("/api/v1/live")
+async def live_transcribe(websocket: WebSocket, model_size: str = "base", precision: Optional[str] = None):
+    """实时转写：客户端持续发送 16kHz 单声道 s16le PCM 二进制消息，发送文本消息 "end" 表示结束
+
+    服务端每确定一个分段就发送 {"type": "segment", ...}，结束时发送 {"type": "completed", "text": ...}。
+    """
+    await websocket.accept()
+    if not model_registry.is_known_model(model_size):
+        await websocket.send_json({"type": "failed", "error": f"不支持的模型: {model_size}"})
+        await websocket.close(code=1008)
+        return
+    if precision is not None and precision not in CPU_PRECISIONS:
+        await websocket.send_json({"type": "failed", "error": f"不支持的精度: {precision}"})
+        await websocket.close(code=1008)
+        return
+
+    # 与文件任务共用推理资源：任务队列已满或会话数已达上限时拒绝，客户端应稍后重连
+    global live_sessions
+    with live_sessions_lock:
+        busy = live_sessions >= Config.MAX_LIVE_SESSIONS or inference_pool.queue_depth() >= Config.MAX_QUEUE_SIZE
+        if not busy:
+            live_sessions += 1
+    if busy:
+        await websocket.send_json({"type": "failed", "error": "服务繁忙，请稍后重试",
+                                   "retry_after": inference_pool.estimate_retry_after()})
+        await websocket.close(code=1013)
+        return
+    try:
+        await run_live_session(websocket, model_size, precision)
+    finally:
+        with live_sessions_lock:
+            live_sessions -= 1
+
+async def run_live_session(websocket: WebSocket, model_size: str, precision: Optional[str]):
+    device, precision = get_device_and_precision(precision)
+
+    def transcribe(audio, prompt):
+        # 每个窗口单独取得模型的独占使用权，与推理队列中的任务交替使用同一模型
+        with model_registry.use(model_size, device, precision) as model:
+            return model.transcribe(
+                audio,
+                language=Config.LANGUAGE,
+                fp16=precision == "fp16",
+                initial_prompt=prompt,
+                **DECODE_OPTIONS
+            )
+
+    live = LiveTranscriber(
+        transcribe,
+        window_seconds=Config.LIVE_WINDOW_SECONDS,
+        step_seconds=Config.LIVE_STEP_SECONDS
+    )
+    loop = asyncio.get_running_loop()
+    remainder = b""
+
+    async def send_segments(segments):
+        for segment in segments:
+            await websocket.send_json(dict(segment, type="segment",
+                                           start=round(segment["start"], 2), end=round(segment["end"], 2)))
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("text") == "end":
+                break
+            data = message.get("bytes")
+            if not data:
+                continue
+            data = remainder + data
+            usable = len(data) - len(data) % 2
+            remainder = data[usable:]
+            # 转写在线程池中执行，不阻塞事件循环
+            segments = await loop.run_in_executor(None, live.feed, pcm_bytes_to_float32(data[:usable]))
+            await send_segments(segments)
+
+        await send_segments(await loop.run_in_executor(None, live.finish))
+        await websocket.send_json({"type": "completed", "text": live.text})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        await websocket.send_json({"type": "failed", "error": str(e)})
+        await websocket.close(code=1011)
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus 文本格式的指标"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/v1/health/live")
+async def liveness_check():
+    """存活检查：事件循环能够响应即返回 200，模型是否加载不影响"""
+    return {"status": "alive"}
+
+def readiness():
+    """返回 (是否就绪, 未就绪原因)"""
+    if preload_status["status"] in ("pending", "loading"):
+        return False, "模型预加载中"
+    if preload_status["status"] == "failed":
+        return False, "模型预加载失败"
+    if resolve_toolchain(Config.FFMPEG) is None:
+        return False, "找不到可用的ffmpeg"
+    queue = inference_pool.stats()
+    if queue["queue_depth"] >= queue["queue_capacity"]:
+        return False, "任务队列已满"
+    return True, None
+
+@app.get("/api/v1/health/ready")
+async def readiness_check():
+    """就绪检查：预加载的模型全部加载并预热、ffmpeg 可用且队列未满时返回 200，否则返回 503"""
+    ready, reason = readiness()
+    body = {"status": "ready" if ready else "not_ready", "reason": reason, "preload": preload_status}
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
 @app.get("/api/v1/health")
 async def health_check():
+    environment = probe_environment()
+    toolchain = resolve_toolchain(Config.FFMPEG)
     return {
         "status": "healthy",
-        "gpu_available": torch.cuda.is_available(),
-        "gpu_name": torch.cuda.get_device_name(0) if torch.cuda.is_available() else None,
-        "model_loaded": Config.WHISPER_MODEL is not None,
+        "ready": readiness()[0],
+        "preload": preload_status,
+        "gpu_available": environment["cuda_available"],
+        "gpu_name": environment["gpus"][0]["name"] if environment["gpus"] else None,
+        "ffmpeg": toolchain["version"] if toolchain else None,
+        "model_loaded": model_registry.is_loaded(),
+        "models": model_registry.loaded_models(),
         "tasks": {
             "total": Config.TASK_COUNT,
             "completed": Config.COMPLETED_TASKS
-        }
+        },
+        "queue": inference_pool.stats(),
+        "cache": result_cache.stats(),
+        "rtf": rtf_store.stats(),
+        "precision": get_device_and_precision()[1],
+        "cpu_bf16": environment.get("cpu_bf16", False),
+        "batching": {f"{size}|{precision}": engine.stats() for (size, precision), engine in batch_engines.items()}
     }
 
 class APIServer:
@@ -0,0 +1,125 @@
+import subprocess
+
+import numpy as np
+
+from cancellation import run_cancellable
+
+SAMPLE_RATE = 16000  # Whisper 使用的采样率
+
+
+class AudioIngestError(Exception):
+    """音频解码失败"""
+
+
+def build_pcm_command(media_path, ffmpeg_cmd="ffmpeg", sample_rate=SAMPLE_RATE):
+    """构建把媒体解码为 16kHz 单声道 s16le 并输出到 stdout 的 ffmpeg 命令"""
+    return [
+        ffmpeg_cmd,
+        '-nostdin',
+        '-threads', '0',
+        '-i', media_path,
+        '-vn',  # 不要视频
+        '-f', 's16le',
+        '-acodec', 'pcm_s16le',
+        '-ac', '1',  # 单声道
+        '-ar', str(sample_rate),
+        '-'
+    ]
+
+
+def pcm_bytes_to_float32(data):
+    """把 s16le 字节转换为 [-1, 1] 范围的 float32 数组"""
+    return np.frombuffer(data, np.int16).astype(np.float32) / 32768.0
+
+
+def load_audio_pcm(media_path, ffmpeg_cmd="ffmpeg", sample_rate=SAMPLE_RATE, timeout=None, cancel_token=None):
+    """运行一次 ffmpeg，把音频直接解码到内存，返回 float32 的 NumPy 数组
+
+    返回的数组可以直接传给 model.transcribe()，省去临时 WAV 文件的写入和再次解码。
+    cancel_token 被取消时立即杀掉 ffmpeg 并抛出 CancelledError。
+    """
+    cmd = build_pcm_command(media_path, ffmpeg_cmd, sample_rate)
+    try:
+        returncode, stdout, stderr = run_cancellable(cmd, cancel_token, timeout=timeout)
+    except FileNotFoundError:
+        raise AudioIngestError(f"找不到ffmpeg: {ffmpeg_cmd}")
+    except subprocess.TimeoutExpired:
+        raise AudioIngestError("ffmpeg解码超时")
+
+    if returncode != 0:
+        stderr = stderr.decode('utf-8', errors='ignore')
+        raise AudioIngestError(f"ffmpeg错误: {stderr}")
+
+    if not stdout:
+        raise AudioIngestError("未解码到音频数据")
+
+    return pcm_bytes_to_float32(stdout)
+
+
+def audio_duration(audio, sample_rate=SAMPLE_RATE):
+    """音频数组的时长（秒）"""
+    return len(audio) / sample_rate
+
+
+def build_stream_command(source, ffmpeg_cmd="ffmpeg", sample_rate=SAMPLE_RATE, follow=False, idle_timeout=10):
+    """构建边读边解码的 ffmpeg 命令
+
+    source 为 "-" 时从标准输入读取；follow=True 时持续读取仍在写入的文件，
+    超过 idle_timeout 秒没有新数据才结束。
+    """
+    if source == "-":
+        # 从标准输入读取数据时不能加 -nostdin
+        input_args = ['-i', 'pipe:0']
+    elif follow:
+        input_args = ['-nostdin', '-follow', '1', '-rw_timeout', str(int(idle_timeout * 1000000)),
+                      '-i', f'file:{source}']
+    else:
+        input_args = ['-nostdin', '-i', source]
+    return [
+        ffmpeg_cmd,
+        '-loglevel', 'error',
+        *input_args,
+        '-vn',
+        '-f', 's16le',
+        '-acodec', 'pcm_s16le',
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        '-'
+    ]
+
+
+def stream_audio_pcm(source, ffmpeg_cmd="ffmpeg", sample_rate=SAMPLE_RATE, follow=False, idle_timeout=10,
+                     block_size=64 * 1024):
+    """逐块产出解码后的 float32 音频，适用于管道、标准输入和仍在写入的文件"""
+    cmd = build_stream_command(source, ffmpeg_cmd, sample_rate, follow, idle_timeout)
+    try:
+        process = subprocess.Popen(
+            cmd,
+            stdin=None if source == "-" else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+    except FileNotFoundError:
+        raise AudioIngestError(f"找不到ffmpeg: {ffmpeg_cmd}")
+
+    remainder = b""
+    try:
+        while True:
+            # read1 有数据就返回，不等待读满整块，降低延迟
+            data = process.stdout.read1(block_size)
+            if not data:
+                break
+            data = remainder + data
+            usable = len(data) - len(data) % 2
+            remainder = data[usable:]
+            if usable:
+                yield pcm_bytes_to_float32(data[:usable])
+
+        process.wait()
+        if process.returncode != 0:
+            stderr = process.stderr.read().decode('utf-8', errors='ignore')
+            raise AudioIngestError(f"ffmpeg错误: {stderr}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
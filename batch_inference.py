@@ -0,0 +1,192 @@
+import threading
+import time
+from queue import Queue, Empty
+
+from audio_ingest import SAMPLE_RATE
+from cancellation import CancelledError
+
+WINDOW_SECONDS = 30  # Whisper 每次处理的窗口长度
+WINDOW_SAMPLES = WINDOW_SECONDS * SAMPLE_RATE
+NO_SPEECH_THRESHOLD = 0.6
+LOGPROB_THRESHOLD = -1.0
+
+_STOP = object()  # 放入队列后后台线程处理完之前的窗口即退出
+
+
+class _WindowRequest:
+    def __init__(self, mel, cancel_token=None):
+        self.mel = mel
+        self.cancel_token = cancel_token
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class BatchInferenceEngine:
+    """跨请求的动态批处理推理
+
+    多个任务（或同一批中的多个短视频）把各自的 30 秒 mel 窗口提交到同一个队列，
+    后台线程最多等待 max_wait_ms 凑够 max_batch_size 个窗口，
+    再用一次编码器前向和批量贪心解码处理整批窗口。
+    每个窗口独立解码，不使用前一窗口的文本作为上下文。
+    提交时可以带上 cancel_token：已取消的窗口在组批时被丢弃，等待结果的调用方也会立即返回。
+    不再使用时调用 close() 结束后台线程；之后再次提交会重新启动线程。
+    """
+
+    def __init__(self, acquire_model, max_batch_size=8, max_wait_ms=50, language='zh', fp16=False):
+        self.acquire_model = acquire_model  # 返回上下文管理器，进入时得到模型
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max_wait_ms / 1000.0
+        self.language = language
+        self.fp16 = fp16
+        # 有界队列：窗口较多时提交方会等待，避免一次性计算全部 mel
+        self._queue = Queue(maxsize=self.max_batch_size * 4)
+        self._thread = None
+        self._n_mels = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.windows = 0
+
+    def transcribe(self, audio, cancel_token=None):
+        """转写一段音频，返回与 model.transcribe() 结构相同的结果（线程安全，阻塞直到完成）"""
+        return self.transcribe_many([audio], cancel_token)[0]
+
+    def transcribe_many(self, audios, cancel_token=None):
+        """同时提交多段音频的全部窗口，按输入顺序返回结果；取消时抛出 CancelledError"""
+        import whisper
+
+        self._start()
+        jobs = []
+        for audio in audios:
+            requests = []
+            for offset in range(0, max(len(audio), 1), WINDOW_SAMPLES):
+                if cancel_token is not None:
+                    cancel_token.check()
+                window = whisper.pad_or_trim(audio[offset:offset + WINDOW_SAMPLES])
+                request = _WindowRequest(self._log_mel(window), cancel_token)
+                requests.append((offset / SAMPLE_RATE, min(len(audio) - offset, WINDOW_SAMPLES) / SAMPLE_RATE,
+                                 request))
+                self._queue.put(request)
+            jobs.append(requests)
+
+        return [self._collect(requests, cancel_token) for requests in jobs]
+
+    def close(self, timeout=None):
+        """停止后台推理线程：已提交的窗口推理完后线程退出，阻塞直到线程结束"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "windows": self.windows,
+                "avg_batch_size": round(self.windows / self.batches, 2) if self.batches else 0.0
+            }
+
+    def _log_mel(self, window):
+        import whisper
+        if self._n_mels is None:
+            with self.acquire_model() as model:
+                self._n_mels = model.dims.n_mels
+        return whisper.log_mel_spectrogram(window, self._n_mels)
+
+    def _collect(self, requests, cancel_token=None):
+        segments = []
+        for start, length, request in requests:
+            while not request.done.wait(0.5):
+                if cancel_token is not None:
+                    cancel_token.check()
+            if request.error is not None:
+                raise request.error
+            decoded = request.result
+            # 与 transcribe() 相同的无语音判断
+            if decoded.no_speech_prob > NO_SPEECH_THRESHOLD and decoded.avg_logprob < LOGPROB_THRESHOLD:
+                continue
+            if not decoded.text.strip():
+                continue
+            segments.append({
+                "id": len(segments),
+                "start": start,
+                "end": start + length,
+                "text": decoded.text,
+                "avg_logprob": decoded.avg_logprob,
+                "no_speech_prob": decoded.no_speech_prob
+            })
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": self.language
+        }
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="batch-inference")
+                self._thread.daemon = True
+                self._thread.start()
+
+    def _next_batch(self):
+        """取出下一批窗口，返回 (窗口列表, 是否已收到停止信号)"""
+        request = self._queue.get()
+        if request is _STOP:
+            return [], True
+        batch = [request]
+        deadline = time.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except Empty:
+                break
+            if request is _STOP:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _loop(self):
+        import torch
+        import whisper
+
+        stopping = False
+        while not stopping:
+            batch = []
+            requests, stopping = self._next_batch()
+            for request in requests:
+                if request.cancel_token is not None and request.cancel_token.cancelled:
+                    # 所属任务已取消，不再推理
+                    request.error = CancelledError()
+                    request.done.set()
+                else:
+                    batch.append(request)
+            if not batch:
+                continue
+            try:
+                with self.acquire_model() as model:
+                    mel = torch.stack([request.mel for request in batch]).to(model.device)
+                    options = whisper.DecodingOptions(
+                        task="transcribe",
+                        language=self.language,
+                        temperature=0.0,
+                        without_timestamps=True,
+                        fp16=self.fp16
+                    )
+                    # 通过模型的 decode 方法调用，bf16 等包装后的模型可在其中设置计算精度
+                    results = model.decode(mel, options)
+                for request, result in zip(batch, results):
+                    request.result = result
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+            finally:
+                with self._lock:
+                    self.batches += 1
+                    self.windows += len(batch)
+                for request in batch:
+                    request.done.set()
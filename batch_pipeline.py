@@ -0,0 +1,76 @@
+from concurrent.futures import ThreadPoolExecutor
+
+# 文件处理阶段
+STAGE_WAITING = "等待中"
+STAGE_EXTRACTING = "提取音频"
+STAGE_BUFFERED = "等待转写"
+STAGE_TRANSCRIBING = "转写中"
+STAGE_DONE = "完成"
+STAGE_CACHED = "缓存命中"
+STAGE_FAILED = "失败"
+
+
+class PrefetchPipeline:
+    """生产者/消费者流水线
+
+    extract_workers 个后台线程提前为后续 prefetch 个文件执行 prepare_func（解码音频等），
+    调用方按原始顺序逐个取出结果并执行转写，使音频提取和模型推理重叠进行。
+    缓冲区有界，最多同时持有 prefetch 个已准备好的结果。
+    """
+
+    def __init__(self, items, prepare_func, prefetch=2, extract_workers=1, on_stage=None):
+        self.items = list(items)
+        self.prepare_func = prepare_func
+        self.prefetch = max(1, int(prefetch))
+        self.on_stage = on_stage
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(extract_workers)),
+                                            thread_name_prefix="audio-prefetch")
+        self._futures = {}
+        self._next_submit = 0
+        self._closed = False
+
+    def __iter__(self):
+        """按顺序返回 (索引, 条目, 结果, 异常)"""
+        try:
+            for index, item in enumerate(self.items):
+                if self._closed:
+                    break
+                self._fill()
+                future = self._futures.pop(index)
+                try:
+                    result, error = future.result(), None
+                except Exception as e:
+                    result, error = None, e
+                # 取走一个结果后立即补充预取
+                self._fill()
+                yield index, item, result, error
+        finally:
+            self.close()
+
+    def close(self):
+        """停止流水线，丢弃尚未开始的预取任务"""
+        if self._closed:
+            return
+        self._closed = True
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _fill(self):
+        # 已提交但未取走的结果数不超过 prefetch + 当前项
+        while (not self._closed and self._next_submit < len(self.items)
+               and len(self._futures) <= self.prefetch):
+            index = self._next_submit
+            self._futures[index] = self._executor.submit(self._prepare, index, self.items[index])
+            self._next_submit += 1
+
+    def _prepare(self, index, item):
+        self._emit(index, STAGE_EXTRACTING)
+        result = self.prepare_func(item)
+        self._emit(index, STAGE_BUFFERED)
+        return result
+
+    def _emit(self, index, stage):
+        if self.on_stage:
+            self.on_stage(index, stage)
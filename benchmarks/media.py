@@ -0,0 +1,107 @@
+"""用 ffmpeg lavfi 生成确定性的基准测试媒体
+
+生成的文件只依赖参数（类型、时长），同样的参数每次生成的内容相同，
+已存在的文件直接复用。可单独运行：
+    python benchmarks/media.py --preset quick --dir benchmarks/media
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ffmpeg_toolchain import ffmpeg_command  # noqa: E402
+
+DEFAULT_MEDIA_DIR = os.path.join(ROOT, "benchmarks", "media")
+SOURCE_SAMPLE_RATE = 44100
+
+# 音频类型 -> lavfi 音频源（{d} 为时长秒数）
+AUDIO_SOURCES = {
+    # 纯音：解码和重采样的基准
+    "tone": "sine=frequency=440:sample_rate={sr}:duration={d}",
+    # 粉红噪声：整段都有能量，没有安静的底噪，VAD 应保留全部内容
+    "noise": "anoisesrc=color=pink:amplitude=0.2:seed=42:sample_rate={sr}:duration={d}",
+    # 静音：VAD 检测不到语音，退回转写原始音频
+    "silence": "anullsrc=channel_layout=mono:sample_rate={sr},atrim=duration={d}",
+    # 5秒有声、3秒静音交替，模拟有停顿的讲话
+    "mixed": "sine=frequency=300:sample_rate={sr}:duration={d},volume='if(lt(mod(t,8),5),1,0)':eval=frame",
+}
+
+# 预设：(类型, 时长秒数) 列表
+PRESETS = {
+    "quick": [("tone", 10), ("noise", 10), ("silence", 10), ("mixed", 60)],
+    "full": [("tone", 10), ("noise", 10), ("silence", 10), ("mixed", 60),
+             ("mixed", 300), ("noise", 600), ("mixed", 1800)],
+}
+
+
+def media_name(kind, duration):
+    return f"{kind}_{duration}s.mp4"
+
+
+def build_generate_command(kind, duration, output_path, ffmpeg_cmd="ffmpeg"):
+    """生成带黑屏视频轨的 mp4，模拟真实的视频输入
+
+    使用 ffmpeg 内置的 mpeg4/aac 编码器，不依赖 libx264；bitexact 保证重复生成的文件一致。
+    """
+    audio = AUDIO_SOURCES[kind].format(sr=SOURCE_SAMPLE_RATE, d=duration)
+    return [
+        ffmpeg_cmd, '-hide_banner', '-nostdin', '-loglevel', 'error', '-y',
+        '-f', 'lavfi', '-i', f"color=c=black:s=320x240:r=25:d={duration}",
+        '-f', 'lavfi', '-i', audio,
+        '-map', '0:v', '-map', '1:a',
+        '-c:v', 'mpeg4', '-q:v', '10',
+        '-c:a', 'aac', '-b:a', '96k', '-ac', '1',
+        '-shortest', '-map_metadata', '-1',
+        '-fflags', '+bitexact', '-flags:v', '+bitexact', '-flags:a', '+bitexact',
+        output_path
+    ]
+
+
+def generate_media(specs, media_dir=DEFAULT_MEDIA_DIR, ffmpeg_cmd=None, refresh=False):
+    """按 [(类型, 时长)] 生成测试媒体，返回 [(名称, 路径, 时长)]"""
+    ffmpeg_cmd = ffmpeg_cmd or ffmpeg_command()
+    os.makedirs(media_dir, exist_ok=True)
+    media = []
+    for kind, duration in specs:
+        name = media_name(kind, duration)
+        path = os.path.join(media_dir, name)
+        if refresh or not os.path.exists(path):
+            tmp_path = path + ".tmp.mp4"
+            result = subprocess.run(build_generate_command(kind, duration, tmp_path, ffmpeg_cmd),
+                                    capture_output=True, text=True, encoding='utf-8', errors='ignore')
+            if result.returncode != 0:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise RuntimeError(f"生成 {name} 失败: {result.stderr.strip()}")
+            os.replace(tmp_path, path)
+        media.append((name, path, duration))
+    return media
+
+
+def parse_spec(text):
+    """解析 “类型:时长” 形式的媒体描述，例如 mixed:120"""
+    kind, _, duration = text.partition(":")
+    if kind not in AUDIO_SOURCES or not duration.isdigit():
+        raise argparse.ArgumentTypeError(f"无效的媒体描述: {text}（格式为 类型:秒数，类型可选 {', '.join(AUDIO_SOURCES)}）")
+    return kind, int(duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成基准测试媒体")
+    parser.add_argument("--preset", choices=list(PRESETS), default="quick", help="媒体预设")
+    parser.add_argument("--media", type=parse_spec, nargs="+", help="自定义媒体，如 tone:10 mixed:120")
+    parser.add_argument("--dir", default=DEFAULT_MEDIA_DIR, help="媒体保存目录")
+    parser.add_argument("--ffmpeg", help="ffmpeg路径（默认自动查找）")
+    parser.add_argument("--refresh", action="store_true", help="重新生成已存在的文件")
+    args = parser.parse_args()
+
+    for name, path, duration in generate_media(args.media or PRESETS[args.preset], args.dir,
+                                               args.ffmpeg and ffmpeg_command(args.ffmpeg), args.refresh):
+        print(f"{name:<24} {duration:>6}s  {os.path.getsize(path) / 1024:8.0f}KB  {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""转写流水线分阶段基准：上传落盘、音频提取、模型加载、转写、写出结果
+
+用法：
+    python benchmarks/pipeline.py                              # 桩模型，只测流水线自身开销
+    python benchmarks/pipeline.py --backend whisper --model base
+    python benchmarks/pipeline.py --backend whisper --precision int8
+    python benchmarks/pipeline.py --json bench.json            # 保存结果
+    python benchmarks/pipeline.py --baseline bench.json        # 与保存的结果比较，变慢超过阈值时返回 1
+测试媒体由 benchmarks/media.py 用 ffmpeg lavfi 生成，每个阶段取多次运行的中位数。
+桩模型不加载权重，按 --stub-rtf 模拟推理耗时，便于单独观察解码、VAD、切块等开销。
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from media import PRESETS, DEFAULT_MEDIA_DIR, generate_media, parse_spec  # noqa: E402
+from audio_ingest import SAMPLE_RATE, load_audio_pcm, audio_duration  # noqa: E402
+from ffmpeg_toolchain import ffmpeg_command, resolve_toolchain  # noqa: E402
+from long_audio import transcribe_incremental  # noqa: E402
+from model_precision import CPU_PRECISIONS, resolve_precision, load_model  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+from transcriber import LANGUAGE  # noqa: E402
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 与 API 服务的上传分块大小一致
+STAGES = ["spool", "extract", "transcribe", "inference", "write"]
+STUB_SEGMENT_SECONDS = 5.0  # 桩模型每段的长度
+
+
+class StubModel:
+    """不加载权重的转写桩，输出固定格式的分段
+
+    rtf 为模拟的实时率：每秒音频休眠 rtf 秒，0 表示不模拟推理耗时。
+    """
+
+    def __init__(self, rtf=0.0):
+        self.rtf = rtf
+
+    def transcribe(self, audio, **options):
+        seconds = len(audio) / SAMPLE_RATE
+        if self.rtf > 0:
+            time.sleep(seconds * self.rtf)
+        segments = []
+        start = 0.0
+        while start < seconds:
+            end = min(seconds, start + STUB_SEGMENT_SECONDS)
+            segments.append({"id": len(segments), "start": start, "end": end, "text": f"第{len(segments) + 1}段。"})
+            start = end
+        return {"text": "".join(segment["text"] for segment in segments), "segments": segments, "language": LANGUAGE}
+
+
+def stub_loader(rtf):
+    return lambda model_size, device, precision: StubModel(rtf)
+
+
+def spool_file(source_path, dest_path):
+    """与 API 服务的 spool_upload 相同：分块写入临时目录并计算SHA-256"""
+    hasher = hashlib.sha256()
+    total = 0
+    with open(source_path, "rb") as source, open(dest_path, "wb") as buffer:
+        while True:
+            chunk = source.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            total += len(chunk)
+            hasher.update(chunk)
+            buffer.write(chunk)
+    return total, hasher.hexdigest()
+
+
+def run_once(media_path, work_dir, ffmpeg_cmd, model, precision, chunk_seconds, use_vad):
+    """完整处理一个文件，返回各阶段耗时（秒）"""
+    timings = {}
+
+    start = time.perf_counter()
+    spooled = os.path.join(work_dir, "upload_" + os.path.basename(media_path))
+    spool_file(media_path, spooled)
+    timings["spool"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    audio = load_audio_pcm(spooled, ffmpeg_cmd)
+    timings["extract"] = time.perf_counter() - start
+
+    inference = [0.0]
+
+    def transcribe_func(speech, prompt):
+        begin = time.perf_counter()
+        try:
+            return model.transcribe(speech, language=LANGUAGE, fp16=precision == "fp16",
+                                    initial_prompt=prompt, task="transcribe")
+        finally:
+            inference[0] += time.perf_counter() - begin
+
+    start = time.perf_counter()
+    result, _ = transcribe_incremental(transcribe_func, audio, chunk_seconds=chunk_seconds, use_vad=use_vad)
+    timings["transcribe"] = time.perf_counter() - start
+    timings["inference"] = inference[0]  # 转写中模型推理的部分，其余为 VAD 和切块开销
+
+    start = time.perf_counter()
+    with open(os.path.join(work_dir, "output.txt"), "w", encoding="utf-8") as f:
+        f.write(result["text"])
+    timings["write"] = time.perf_counter() - start
+
+    os.remove(spooled)
+    return timings, audio_duration(audio)
+
+
+def run_benchmark(media, args):
+    ffmpeg_cmd = ffmpeg_command(args.ffmpeg)
+    if args.device:
+        device = args.device
+    else:
+        from env_probe import cuda_available
+        device = "cuda" if args.backend == "whisper" and cuda_available() else "cpu"
+    precision = resolve_precision(device, args.precision)
+
+    if args.backend == "stub":
+        loader = stub_loader(args.stub_rtf)
+    else:
+        # 编译模式下模型加载阶段包含编译和预热
+        loader = lambda model_size, device, precision: load_model(model_size, device, precision, compiled=args.compile)
+    registry = ModelRegistry(max_models=1, loader=loader)
+
+    report = {
+        "meta": {
+            "backend": args.backend,
+            "model": args.model,
+            "device": device,
+            "precision": precision,
+            "compiled": args.compile if args.backend == "whisper" else False,
+            "stub_rtf": args.stub_rtf if args.backend == "stub" else None,
+            "runs": args.runs,
+            "chunk_seconds": args.chunk_seconds,
+            "vad": not args.no_vad,
+            "host": platform.node(),
+            "python": platform.python_version(),
+            "ffmpeg": resolve_toolchain(args.ffmpeg)["version"],
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S")
+        },
+        "stages": {},
+        "media": {}
+    }
+
+    start = time.perf_counter()
+    with registry.use(args.model, device, precision) as model:
+        report["stages"]["model_load"] = round(time.perf_counter() - start, 4)
+        print(f"模型加载 ({args.backend}/{args.model}, {device}): {report['stages']['model_load']:.3f}s")
+
+        with tempfile.TemporaryDirectory(prefix="vtt_bench_") as work_dir:
+            for name, path, _ in media:
+                runs = [run_once(path, work_dir, ffmpeg_cmd, model, precision, args.chunk_seconds, not args.no_vad)
+                        for _ in range(args.runs)]
+                seconds = runs[0][1]
+                stages = {stage: round(statistics.median(run[0][stage] for run in runs), 4) for stage in STAGES}
+                total = sum(stages[stage] for stage in STAGES if stage != "inference")
+                report["media"][name] = {
+                    "audio_seconds": round(seconds, 2),
+                    "bytes": os.path.getsize(path),
+                    "stages": stages,
+                    "total": round(total, 4),
+                    "rtf": round(total / seconds, 4) if seconds else None
+                }
+                print(f"{name:<20} " + "  ".join(f"{stage} {stages[stage] * 1000:8.1f}ms" for stage in STAGES)
+                      + f"  RTF {report['media'][name]['rtf']}")
+    return report
+
+
+def compare(report, baseline, threshold, min_delta):
+    """与基线逐阶段比较，返回变慢的条目列表 [(名称, 阶段, 基线, 当前)]"""
+    pairs = [("-", "model_load", baseline.get("stages", {}).get("model_load"), report["stages"].get("model_load"))]
+    for name, entry in report["media"].items():
+        base_entry = baseline.get("media", {}).get(name)
+        if base_entry is None:
+            continue
+        for stage in STAGES:
+            pairs.append((name, stage, base_entry["stages"].get(stage), entry["stages"].get(stage)))
+        pairs.append((name, "total", base_entry.get("total"), entry.get("total")))
+
+    if baseline.get("meta", {}).get("backend") != report["meta"]["backend"] or \
+            baseline.get("meta", {}).get("model") != report["meta"]["model"]:
+        print("注意：基线使用的后端或模型与本次不同，比较结果仅供参考")
+
+    regressions = []
+    print(f"\n与基线比较（阈值 +{threshold:.0%}）：")
+    for name, stage, base, current in pairs:
+        if base is None or current is None:
+            continue
+        change = (current - base) / base if base > 0 else 0.0
+        slower = change > threshold and current - base > min_delta
+        mark = "  变慢" if slower else ""
+        print(f"    {name:<20} {stage:<12} {base * 1000:9.1f}ms -> {current * 1000:9.1f}ms  {change:+7.1%}{mark}")
+        if slower:
+            regressions.append((name, stage, base, current))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="转写流水线分阶段基准")
+    parser.add_argument("--backend", choices=["stub", "whisper"], default="stub", help="转写后端")
+    parser.add_argument("--model", default="base", help="whisper 模型大小")
+    parser.add_argument("--device", choices=["cpu", "cuda"], help="推理设备（默认自动）")
+    parser.add_argument("--precision", choices=CPU_PRECISIONS, default="fp32", help="CPU推理精度（whisper 后端）")
+    parser.add_argument("--compile", action="store_true", help="用 torch.compile 编译模型（whisper 后端）")
+    parser.add_argument("--stub-rtf", type=float, default=0.0, help="桩模型模拟的实时率")
+    parser.add_argument("--preset", choices=list(PRESETS), default="quick", help="测试媒体预设")
+    parser.add_argument("--media", type=parse_spec, nargs="+", help="自定义媒体，如 tone:10 mixed:120")
+    parser.add_argument("--media-dir", default=DEFAULT_MEDIA_DIR, help="测试媒体目录")
+    parser.add_argument("--runs", type=int, default=3, help="每个文件运行次数，取中位数")
+    parser.add_argument("--chunk-seconds", type=int, default=30, help="逐块转写的块长")
+    parser.add_argument("--no-vad", action="store_true", help="不跳过静音")
+    parser.add_argument("--ffmpeg", help="ffmpeg路径（默认自动查找）")
+    parser.add_argument("--json", help="把结果写入JSON文件")
+    parser.add_argument("--baseline", help="与之比较的基线JSON文件")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定变慢的相对阈值")
+    parser.add_argument("--min-delta", type=float, default=0.005, help="判定变慢的最小绝对差（秒），过滤计时噪声")
+    args = parser.parse_args()
+
+    media = generate_media(args.media or PRESETS[args.preset], args.media_dir, ffmpeg_command(args.ffmpeg))
+    report = run_benchmark(media, args)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print(f"\n{len(regressions)} 项比基线慢超过 {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""CPU 推理精度对比：fp32 / int8 / bf16 的速度和准确率
+
+用法：
+    python benchmarks/precision.py --input 讲话1.mp4 讲话2.mp4 --model base
+    python benchmarks/precision.py --input samples/ --json precision.json
+准确率以字错误率（CER）衡量：媒体旁有同名 .txt 参考文本时与参考文本比较，
+否则与 fp32 的转写结果比较（即量化带来的偏差）。
+不指定 --input 时使用 benchmarks/media.py 生成的合成音频，只能比较速度。
+int8 首次运行会量化并缓存模型，表中的“加载”为读取缓存后的耗时，首次量化耗时单独列出。
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from media import PRESETS, DEFAULT_MEDIA_DIR, generate_media  # noqa: E402
+from audio_ingest import load_audio_pcm, audio_duration  # noqa: E402
+from ffmpeg_toolchain import ffmpeg_command  # noqa: E402
+from model_precision import CPU_PRECISIONS, cpu_bf16_supported, load_model, quantized_model_path  # noqa: E402
+from parallel_batch import collect_video_files  # noqa: E402
+from transcriber import LANGUAGE, transcribe_options  # noqa: E402
+
+MEDIA_EXTENSIONS = ['.wav', '.mp3', '.m4a', '.flac']
+
+
+def edit_distance(a, b):
+    """字符级编辑距离"""
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def normalize(text):
+    """去掉空白和标点后比较，只衡量识别出的文字"""
+    return "".join(ch for ch in text if ch.isalnum())
+
+
+def cer(hypothesis, reference):
+    reference = normalize(reference)
+    if not reference:
+        return None
+    return edit_distance(normalize(hypothesis), reference) / len(reference)
+
+
+def collect_inputs(paths):
+    files = collect_video_files(paths)
+    for path in paths:
+        if os.path.isfile(path) and Path(path).suffix.lower() in MEDIA_EXTENSIONS and path not in files:
+            files.append(path)
+        elif os.path.isdir(path):
+            files.extend(str(p) for p in sorted(Path(path).iterdir()) if p.suffix.lower() in MEDIA_EXTENSIONS)
+    return files
+
+
+def read_reference(media_path):
+    reference_path = Path(media_path).with_suffix(".txt")
+    if reference_path.exists():
+        return reference_path.read_text(encoding="utf-8")
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU 推理精度的速度和准确率对比")
+    parser.add_argument("--input", nargs="+", help="含讲话的媒体文件或文件夹（默认使用合成音频，只比较速度）")
+    parser.add_argument("--model", default="base", help="whisper 模型大小")
+    parser.add_argument("--precision", choices=CPU_PRECISIONS, nargs="+", default=CPU_PRECISIONS, help="要比较的精度")
+    parser.add_argument("--threads", type=int, help="torch 线程数（默认不限制）")
+    parser.add_argument("--ffmpeg", help="ffmpeg路径（默认自动查找）")
+    parser.add_argument("--json", help="把结果写入JSON文件")
+    args = parser.parse_args()
+
+    import torch
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    ffmpeg_cmd = ffmpeg_command(args.ffmpeg)
+    if args.input:
+        files = collect_inputs(args.input)
+    else:
+        files = [path for _, path, _ in generate_media(PRESETS["quick"], DEFAULT_MEDIA_DIR, ffmpeg_cmd)]
+    if not files:
+        print("没有找到媒体文件")
+        return 1
+
+    audios = {path: load_audio_pcm(path, ffmpeg_cmd) for path in files}
+    total_audio = sum(audio_duration(audio) for audio in audios.values())
+    precisions = [p for p in args.precision if p != "bf16" or cpu_bf16_supported()]
+    if len(precisions) < len(args.precision):
+        print("注意：CPU 不支持原生 bf16，跳过 bf16")
+    if "fp32" in precisions:
+        precisions.remove("fp32")
+    precisions.insert(0, "fp32")  # fp32 先运行，作为其他精度的对照
+
+    report = {
+        "meta": {"model": args.model, "threads": torch.get_num_threads(), "host": platform.node(),
+                 "torch": torch.__version__, "audio_seconds": round(total_audio, 2), "files": len(files),
+                 "created_at": time.strftime("%Y-%m-%d %H:%M:%S")},
+        "precisions": {}
+    }
+    fp32_texts = {}
+    for precision in precisions:
+        quantize_seconds = None
+        if precision == "int8" and not os.path.exists(quantized_model_path(args.model)):
+            start = time.perf_counter()
+            load_model(args.model, "cpu", precision)
+            quantize_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        model = load_model(args.model, "cpu", precision)
+        load_seconds = time.perf_counter() - start
+
+        transcribe_seconds = 0.0
+        errors = []
+        for path, audio in audios.items():
+            start = time.perf_counter()
+            text = model.transcribe(audio, language=LANGUAGE, **transcribe_options(fp16=False))["text"]
+            transcribe_seconds += time.perf_counter() - start
+            if precision == "fp32":
+                fp32_texts[path] = text
+            reference = read_reference(path) or (fp32_texts.get(path) if precision != "fp32" else None)
+            if reference is not None:
+                error = cer(text, reference)
+                if error is not None:
+                    errors.append(error)
+
+        entry = {
+            "load_seconds": round(load_seconds, 3),
+            "quantize_seconds": round(quantize_seconds, 3) if quantize_seconds is not None else None,
+            "transcribe_seconds": round(transcribe_seconds, 3),
+            "rtf": round(transcribe_seconds / total_audio, 4) if total_audio else None,
+            "cer": round(sum(errors) / len(errors), 4) if errors else None
+        }
+        report["precisions"][precision] = entry
+        del model
+
+    base = report["precisions"]["fp32"]["transcribe_seconds"]
+    print(f"模型 {args.model}，{len(files)} 个文件，音频共 {total_audio:.1f}秒，{report['meta']['threads']} 线程")
+    print(f"{'精度':<6} {'加载':>8} {'转写':>9} {'RTF':>7} {'加速':>6} {'CER':>7}")
+    for precision, entry in report["precisions"].items():
+        speedup = base / entry["transcribe_seconds"] if entry["transcribe_seconds"] else 0.0
+        error = f"{entry['cer']:.2%}" if entry["cer"] is not None else "-"
+        print(f"{precision:<6} {entry['load_seconds']:7.2f}s {entry['transcribe_seconds']:8.2f}s "
+              f"{entry['rtf']:7.3f} {speedup:5.2f}x {error:>7}")
+        if entry["quantize_seconds"] is not None:
+            print(f"       首次量化并缓存耗时 {entry['quantize_seconds']:.2f}s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""启动耗时基准：测量各入口模块的冷启动时间和逐模块导入耗时
+
+用法：
+    python benchmarks/startup.py            # 测量全部入口
+    python benchmarks/startup.py --top 15   # 每个入口列出导入最慢的15个模块
+    python benchmarks/startup.py --json startup.json
+每个入口在新的解释器中用 -X importtime 导入，结果取多次运行的最小值。
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 入口名称 -> 导入的模块
+ENTRY_POINTS = {
+    "cli": "videoToText",  # 命令行解析（batch/live/api 模式启动前）
+    "api": "api_service",  # API 服务
+    "gui": "gui_app",  # 图形界面
+}
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 输出，返回 {模块: (自身耗时秒, 累计耗时秒)}"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            modules[name.strip()] = (int(self_us) / 1e6, int(cumulative_us) / 1e6)
+        except ValueError:
+            continue
+    return modules
+
+
+def measure(module, runs=3):
+    """在新解释器中导入 module，返回 (最短墙钟时间, 对应一次的逐模块导入耗时)"""
+    best_wall, best_modules = None, {}
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT, capture_output=True, text=True, encoding="utf-8", errors="ignore"
+        )
+        wall = time.perf_counter() - start
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "导入失败"
+            return None, {"error": error}
+        if best_wall is None or wall < best_wall:
+            best_wall, best_modules = wall, parse_importtime(result.stderr)
+    return best_wall, best_modules
+
+
+def top_level_costs(modules):
+    """按顶层包汇总累计导入耗时（取顶层包自身的累计值）"""
+    costs = {}
+    for name, (_, cumulative) in modules.items():
+        if "." not in name:
+            costs[name] = max(costs.get(name, 0.0), cumulative)
+    return sorted(costs.items(), key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量冷启动和逐模块导入耗时")
+    parser.add_argument("--entry", choices=list(ENTRY_POINTS), nargs="+", default=list(ENTRY_POINTS),
+                        help="要测量的入口")
+    parser.add_argument("--runs", type=int, default=3, help="每个入口运行次数，取最小值")
+    parser.add_argument("--top", type=int, default=10, help="列出导入最慢的模块数")
+    parser.add_argument("--json", help="把结果写入JSON文件")
+    args = parser.parse_args()
+
+    report = {}
+    for entry in args.entry:
+        module = ENTRY_POINTS[entry]
+        wall, modules = measure(module, args.runs)
+        if wall is None:
+            print(f"{entry} ({module}): {modules['error']}")
+            report[entry] = {"module": module, "error": modules["error"]}
+            continue
+
+        costs = top_level_costs(modules)
+        print(f"{entry} ({module}): 启动 {wall * 1000:.0f}ms, 导入 {len(modules)} 个模块")
+        for name, cumulative in costs[:args.top]:
+            print(f"    {name:<24} {cumulative * 1000:8.1f}ms")
+        report[entry] = {
+            "module": module,
+            "wall_seconds": round(wall, 4),
+            "modules": len(modules),
+            "top_level": {name: round(cumulative, 4) for name, cumulative in costs}
+        }
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import subprocess
+import threading
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+class CancelledError(Exception):
+    """任务已被取消"""
+
+    def __init__(self, message="任务已取消"):
+        super().__init__(message)
+
+
+class CancelToken:
+    """协作式取消标志
+
+    cancel() 可以在任意线程中调用：设置标志并立即杀掉登记的 ffmpeg 子进程。
+    执行任务的代码在 30 秒窗口或分块之间调用 check()，已取消时抛出 CancelledError；
+    在当前线程 activate() 之后，装有 install_cancel_check 钩子的模型每个窗口编码前也会检查。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._processes = set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            self._event.set()
+            processes = list(self._processes)
+        for process in processes:
+            _kill(process)
+
+    def check(self):
+        if self._event.is_set():
+            raise CancelledError()
+
+    @contextmanager
+    def attach_process(self, process):
+        """with 块内取消时杀掉 process"""
+        with self._lock:
+            self._processes.add(process)
+            cancelled = self._event.is_set()
+        if cancelled:
+            _kill(process)
+        try:
+            yield process
+        finally:
+            with self._lock:
+                self._processes.discard(process)
+
+    @contextmanager
+    def activate(self):
+        """在当前线程中启用此标志，模型钩子据此检查是否已取消"""
+        previous = getattr(_local, "token", None)
+        _local.token = self
+        try:
+            yield self
+        finally:
+            _local.token = previous
+
+
+def current_token():
+    return getattr(_local, "token", None)
+
+
+def _kill(process):
+    try:
+        if process.poll() is None:
+            process.kill()
+    except OSError:
+        pass
+
+
+def _check_hook(module, args):
+    token = current_token()
+    if token is not None:
+        token.check()
+
+
+def install_cancel_check(model):
+    """在编码器上注册钩子：whisper 每编码一个30秒窗口前检查当前线程的取消标志（重复调用无副作用）
+
+    钩子排在其他前置钩子（如 stage_timing 的计时钩子）之前，取消时不会留下已开始但未结束的计时阶段。
+    """
+    encoder = model.encoder
+    if not getattr(encoder, "_vtt_cancellable", False):
+        try:
+            encoder.register_forward_pre_hook(_check_hook, prepend=True)
+        except TypeError:  # torch 2.0 之前不支持 prepend，调用方需先于 instrument_model 调用
+            encoder.register_forward_pre_hook(_check_hook)
+        encoder._vtt_cancellable = True
+    return model
+
+
+def run_cancellable(cmd, cancel_token=None, timeout=None):
+    """运行命令并捕获输出，取消时杀掉进程并抛出 CancelledError，返回 (returncode, stdout, stderr)
+
+    超时时抛出 subprocess.TimeoutExpired，找不到命令时抛出 FileNotFoundError。
+    """
+    process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        if cancel_token is None:
+            stdout, stderr = process.communicate(timeout=timeout)
+        else:
+            with cancel_token.attach_process(process):
+                stdout, stderr = process.communicate(timeout=timeout)
+    except BaseException:
+        _kill(process)
+        process.communicate()
+        raise
+    if cancel_token is not None:
+        cancel_token.check()
+    return process.returncode, stdout, stderr
@@ -0,0 +1,2 @@
+# test_api.py 是需要先启动服务的手动接口测试脚本，不参与自动测试
+collect_ignore = ["test_api.py"]
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from importlib.metadata import version, PackageNotFoundError
+from importlib.util import find_spec
+
+from ffmpeg_toolchain import resolve_toolchain
+
+PROBE_FORMAT = 2  # 探测结果格式变化时递增，旧缓存自动失效
+PROBE_MAX_AGE = 7 * 86400  # 探测结果最长保存时间
+
+_environment = None
+_lock = threading.Lock()
+
+
+def default_probe_path():
+    """探测结果缓存文件：~/.videototext/environment.json"""
+    return os.path.join(os.path.expanduser("~"), ".videototext", "environment.json")
+
+
+def package_version(name):
+    """读取已安装包的版本号（不导入包本身），未安装时返回 None"""
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return None
+
+
+def _fingerprint():
+    """Python 解释器、关键包版本或 PATH 变化后需要重新探测"""
+    return {
+        "format": PROBE_FORMAT,
+        "python": sys.executable,
+        "torch": package_version("torch"),
+        "whisper": package_version("openai-whisper"),
+        "cuda_visible_devices": os.environ.get("CUDA_VISIBLE_DEVICES"),
+        "path": hashlib.sha256(os.environ.get("PATH", "").encode("utf-8")).hexdigest()[:16]
+    }
+
+
+def _probe_torch():
+    info = {"cuda_available": False, "cuda_version": None, "gpus": [], "mps_available": False, "cpu_bf16": False}
+    try:
+        import torch
+    except ImportError:
+        return info
+
+    info["cuda_version"] = torch.version.cuda
+    if torch.cuda.is_available():
+        info["cuda_available"] = True
+        for i in range(torch.cuda.device_count()):
+            props = torch.cuda.get_device_properties(i)
+            info["gpus"].append({"name": props.name, "memory_gb": round(props.total_memory / 1024 ** 3, 1)})
+    mps = getattr(torch.backends, "mps", None)
+    info["mps_available"] = bool(mps is not None and mps.is_available())
+    info["cpu_bf16"] = _cpu_bf16_supported(torch)
+    return info
+
+
+def _cpu_bf16_supported(torch):
+    """CPU 是否有原生 bf16 指令（AVX512-BF16 或 AMX），没有时 bf16 autocast 反而更慢"""
+    for name in ("_is_amx_tile_supported", "_is_avx512_bf16_supported"):
+        check = getattr(torch.cpu, name, None)
+        if check is not None:
+            try:
+                if check():
+                    return True
+            except RuntimeError:
+                pass
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+def _probe_ffmpeg():
+    toolchain = resolve_toolchain()
+    if toolchain is None:
+        return {"ffmpeg_path": None, "ffmpeg_version": None}
+    return {"ffmpeg_path": toolchain["ffmpeg"], "ffmpeg_version": toolchain["version_line"]}
+
+
+def _run_probe():
+    environment = {
+        "fingerprint": _fingerprint(),
+        "probed_at": time.time(),
+        "python_version": sys.version.split()[0],
+        "torch_version": package_version("torch"),
+        "whisper_version": package_version("openai-whisper"),
+        "triton_installed": find_spec("triton") is not None
+    }
+    environment.update(_probe_torch())
+    environment.update(_probe_ffmpeg())
+    return environment
+
+
+def _load(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            environment = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if environment.get("fingerprint") != _fingerprint():
+        return None
+    if time.time() - environment.get("probed_at", 0) > PROBE_MAX_AGE:
+        return None
+    return environment
+
+
+def _save(path, environment):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(environment, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except OSError:
+        # 缓存写入失败不影响使用，下次启动重新探测
+        pass
+
+
+def probe_environment(refresh=False, path=None):
+    """返回运行环境信息（CUDA、GPU、ffmpeg、各组件版本）
+
+    导入 torch 和初始化 CUDA 需要数秒，因此结果保存在本地文件中，
+    解释器、torch/whisper 版本或 PATH 未变化时直接读取缓存，不再导入 torch。
+    refresh=True 强制重新探测（例如 GPU 诊断时）。
+    """
+    global _environment
+    path = path or default_probe_path()
+    with _lock:
+        if _environment is not None and not refresh:
+            return _environment
+        environment = None if refresh else _load(path)
+        if environment is None:
+            environment = _run_probe()
+            _save(path, environment)
+        _environment = environment
+        return environment
+
+
+def cuda_available():
+    """CUDA 是否可用（读取缓存的探测结果）"""
+    return probe_environment()["cuda_available"]
+
+
+def gpu_memory_gb(index=0):
+    """第 index 块 GPU 的显存大小（GB），没有 GPU 时返回 0"""
+    gpus = probe_environment()["gpus"]
+    return gpus[index]["memory_gb"] if index < len(gpus) else 0.0
@@ -0,0 +1,185 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+
+TOOLCHAIN_FORMAT = 1  # 记录格式变化时递增，旧记录自动失效
+
+# 未指定路径时依次尝试的 ffmpeg
+FFMPEG_CANDIDATES = [
+    'ffmpeg',
+    'ffmpeg.exe',
+    r'C:\ffmpeg\bin\ffmpeg.exe',
+    r'C:\Program Files\ffmpeg\bin\ffmpeg.exe'
+]
+
+_toolchains = {}
+_lock = threading.Lock()
+
+
+class FFmpegNotFoundError(Exception):
+    """找不到可用的 ffmpeg"""
+
+
+def default_toolchain_path():
+    """工具链记录文件：~/.videototext/toolchain.json"""
+    return os.path.join(os.path.expanduser("~"), ".videototext", "toolchain.json")
+
+
+def _locate(command):
+    """把命令名或路径解析为可执行文件的绝对路径，找不到时返回 None"""
+    found = shutil.which(command)
+    if found is None and os.path.isfile(command):
+        found = command
+    return os.path.abspath(found) if found else None
+
+
+def _stat_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, int(stat.st_mtime)]
+
+
+def _run(cmd):
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore', timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def _parse_decoders(output):
+    """解析 ffmpeg -decoders 输出中的音频解码器名称"""
+    decoders = []
+    for line in output.splitlines():
+        # 形如 " A....D aac                  AAC (Advanced Audio Coding)"
+        match = re.match(r"\s*A[.A-Z]{5}\s+(\S+)", line)
+        if match and match.group(1) != "=":
+            decoders.append(match.group(1))
+    return decoders
+
+
+def inspect_ffmpeg(ffmpeg_path):
+    """运行 ffmpeg 记录版本和能力，不是有效的 ffmpeg 时返回 None"""
+    version_output = _run([ffmpeg_path, '-version'])
+    if not version_output or 'ffmpeg version' not in version_output:
+        return None
+
+    version_line = version_output.split('\n')[0]
+    match = re.search(r"ffmpeg version (\S+)", version_line)
+    configuration = next((line for line in version_output.splitlines() if line.startswith("configuration:")), "")
+    decoders = _parse_decoders(_run([ffmpeg_path, '-hide_banner', '-decoders']) or "")
+    hwaccels = (_run([ffmpeg_path, '-hide_banner', '-hwaccels']) or "").splitlines()[1:]
+
+    return {
+        "ffmpeg": ffmpeg_path,
+        "ffprobe": _find_ffprobe(ffmpeg_path),
+        "version": match.group(1) if match else None,
+        "version_line": version_line,
+        "threads": "--disable-pthreads" not in configuration and "--disable-w32threads" not in configuration,
+        "audio_decoders": decoders,
+        "hwaccels": [name.strip() for name in hwaccels if name.strip()],
+        "signature": _stat_signature(ffmpeg_path)
+    }
+
+
+def _find_ffprobe(ffmpeg_path):
+    """优先使用与 ffmpeg 同目录的 ffprobe"""
+    directory = os.path.dirname(ffmpeg_path)
+    names = ['ffprobe.exe', 'ffprobe'] if ffmpeg_path.lower().endswith('.exe') else ['ffprobe', 'ffprobe.exe']
+    candidates = [os.path.join(directory, name) for name in names] + ['ffprobe']
+    for candidate in candidates:
+        path = _locate(candidate)
+        if path and _run([path, '-version']):
+            return path
+    return None
+
+
+def _still_valid(toolchain, preferred):
+    """只用 stat 检查记录是否仍然有效，不启动进程"""
+    if preferred is not None and _locate(preferred) != toolchain["ffmpeg"]:
+        return False
+    if _stat_signature(toolchain["ffmpeg"]) != toolchain["signature"]:
+        return False
+    return toolchain["ffprobe"] is None or os.path.exists(toolchain["ffprobe"])
+
+
+def _load_records(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("format") != TOOLCHAIN_FORMAT:
+        return {}
+    return data.get("toolchains", {})
+
+
+def _save_records(path, records):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"format": TOOLCHAIN_FORMAT, "toolchains": records}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def resolve_toolchain(preferred=None, refresh=False, path=None):
+    """查找 ffmpeg 和 ffprobe 并记录版本和能力，找不到时返回 None
+
+    preferred 为用户指定的 ffmpeg 路径或命令名，为空时依次尝试 FFMPEG_CANDIDATES。
+    结果保存在本地文件中并在进程内复用；之后只检查可执行文件的大小和修改时间，
+    不再为每个文件启动 ffmpeg -version。refresh=True 强制重新检测。
+    """
+    preferred = preferred or None
+    key = preferred or ""
+    path = path or default_toolchain_path()
+    with _lock:
+        toolchain = _toolchains.get(key)
+        if toolchain is not None and not refresh:
+            return toolchain
+
+        records = _load_records(path)
+        toolchain = records.get(key)
+        if refresh or toolchain is None or not _still_valid(toolchain, preferred):
+            toolchain = None
+            for candidate in ([preferred] if preferred else FFMPEG_CANDIDATES):
+                located = _locate(candidate)
+                toolchain = inspect_ffmpeg(located) if located else None
+                if toolchain is not None:
+                    break
+            if toolchain is not None:
+                toolchain["resolved_at"] = time.time()
+                records[key] = toolchain
+            else:
+                records.pop(key, None)
+            _save_records(path, records)
+
+        if toolchain is not None:
+            _toolchains[key] = toolchain
+        else:
+            _toolchains.pop(key, None)
+        return toolchain
+
+
+def ffmpeg_command(preferred=None):
+    """返回可用的 ffmpeg 路径，找不到时抛出 FFmpegNotFoundError"""
+    toolchain = resolve_toolchain(preferred)
+    if toolchain is None:
+        if preferred:
+            raise FFmpegNotFoundError(f"不是有效的ffmpeg: {preferred}")
+        raise FFmpegNotFoundError("找不到可用的ffmpeg，请手动选择ffmpeg路径")
+    return toolchain["ffmpeg"]
+
+
+def ffprobe_command(preferred=None):
+    """返回与 ffmpeg 配套的 ffprobe 路径，没有时返回 None"""
+    toolchain = resolve_toolchain(preferred)
+    return toolchain["ffprobe"] if toolchain else None
@@ -0,0 +1,1524 @@
+import sys
+import os
+import time
+import subprocess
+from pathlib import Path
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout,
+                             QWidget, QPushButton, QLabel, QTextEdit, QFileDialog,
+                             QProgressBar, QMessageBox, QComboBox, QCheckBox, QToolTip,
+                             QTreeView, QListView, QAbstractItemView, QDialog,
+                             QGroupBox, QLineEdit, QListWidget, QListWidgetItem)
+from PyQt5.QtCore import QThread, pyqtSignal, Qt, QPoint
+from PyQt5.QtGui import QFont, QCursor, QIntValidator
+from importlib.metadata import version, PackageNotFoundError
+from importlib.util import find_spec
+import zipfile
+from env_probe import probe_environment, cuda_available, gpu_memory_gb
+from ffmpeg_toolchain import resolve_toolchain
+from media_probe import MediaProbeService
+from rtf_stats import RTFStore, format_eta
+from stage_timing import StageTimer, format_breakdown, instrument_model
+from cancellation import CancelToken, CancelledError, install_cancel_check
+from model_precision import (CPU_PRECISIONS, PRECISION_LABELS, cpu_bf16_supported, resolve_precision,
+                             precision_cache_options, quantized_model_path, load_model)
+from audio_ingest import load_audio_pcm, audio_duration
+from result_cache import TranscriptionCache, default_cache_dir, hash_file, make_cache_key
+from parallel_batch import ParallelBatchEngine
+from long_audio import LongAudioTranscriber
+from vad import transcribe_with_vad, compress_silence, restore_timestamps
+from batch_inference import BatchInferenceEngine, WINDOW_SECONDS
+from transcriber import LANGUAGE, transcribe_options, needs_formatting, format_transcript
+from batch_pipeline import (PrefetchPipeline, STAGE_EXTRACTING, STAGE_BUFFERED, STAGE_CACHED,
+                            STAGE_TRANSCRIBING, STAGE_DONE, STAGE_FAILED)
+import shutil
+from contextlib import nullcontext
+# 这里是核心代码
+class DependencyDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("依赖检查")
+        self.setFixedSize(400, 300)
+        
+        layout = QVBoxLayout()
+        
+        # 状态标签
+        self.status_label = QLabel("正在检查依赖...")
+        layout.addWidget(self.status_label)
+        
+        # 进度条
+        self.progress = QProgressBar()
+        layout.addWidget(self.progress)
+        
+        # 日志区域
+        self.log = QTextEdit()
+        self.log.setReadOnly(True)
+        layout.addWidget(self.log)
+        
+        self.setLayout(layout)
+        
+    def log_message(self, message, replace_last=False):
+        if replace_last:
+            # 删除最后一行
+            cursor = self.log.textCursor()
+            cursor.movePosition(cursor.End)
+            cursor.movePosition(cursor.StartOfLine, cursor.KeepAnchor)
+            cursor.removeSelectedText()
+            # 如果不是第一行，删除换行符
+            if not self.log.toPlainText().endswith('\n') and self.log.toPlainText() != '':
+                cursor.deletePreviousChar()
+        
+        self.log.append(message)
+        # 自动滚动到底部
+        cursor = self.log.textCursor()
+        cursor.movePosition(cursor.End)
+        self.log.setTextCursor(cursor)
+        QApplication.processEvents()
+        
+    def set_status(self, status):
+        self.status_label.setText(status)
+        QApplication.processEvents()
+        
+    def set_progress(self, value):
+        self.progress.setValue(value)
+        QApplication.processEvents()
+
+def check_package_version(package_name, min_version):
+    """检查包版本是否满足最小要求"""
+    try:
+        current_version = version(package_name)
+        # 将版本号转换为元组进行比较
+        current = tuple(map(int, current_version.split('.')))
+        required = tuple(map(int, min_version.strip('>=').split('.')))
+        return current >= required
+    except PackageNotFoundError:
+        return False
+    except Exception:
+        return False  # 如果版本比较失败，返回False
+
+def check_and_install_dependencies():
+    try:
+        # 确保有一个QApplication实例
+        app = QApplication.instance()
+        if app is None:
+            app = QApplication(sys.argv)
+        
+        dialog = DependencyDialog()
+        dialog.show()
+        QApplication.processEvents()
+        
+        # 快速检查基本依赖
+        dialog.set_status("正在快速检查基本依赖...")
+        dialog.set_progress(10)
+        
+        # 读取缓存的环境探测结果，只有首次运行或环境变化时才导入torch探测
+        environment = probe_environment()
+        if environment["cuda_available"]:
+            dialog.log_message("✓ CUDA 可用")
+        else:
+            dialog.log_message("⚠️ CUDA 不可用，将使用CPU模式")
+        
+        # 快速检查ffmpeg
+        dialog.set_status("正在检查ffmpeg...")
+        dialog.set_progress(30)
+        if environment["ffmpeg_path"]:
+            dialog.log_message("✓ 系统已安装ffmpeg")
+        else:
+            dialog.log_message("⚠️ 未找到ffmpeg，将在首次使用时下载")
+        
+        # 快速检查Whisper模型（只查找是否安装，不导入）
+        dialog.set_status("正在检查Whisper...")
+        dialog.set_progress(60)
+        if environment["whisper_version"]:
+            dialog.log_message("✓ Whisper 已安装")
+        else:
+            dialog.log_message("⚠️ Whisper 未安装，将在首次使用时安装")
+        
+        # 完成基本检查
+        dialog.set_status("基本检查完成")
+        dialog.set_progress(100)
+        dialog.log_message("\n✓ 基本检查完成！")
+        QApplication.processEvents()
+        dialog.accept()
+        return True
+        
+    except Exception as e:
+        if 'dialog' in locals():
+            dialog.log_message(f"\n错误: {str(e)}")
+            dialog.set_status("检查失败")
+            dialog.exec_()
+        return False
+
+class VideoProcessor(QThread):
+    # 信号定义
+    log_signal = pyqtSignal(str)
+    progress_signal = pyqtSignal(int)
+    stage_signal = pyqtSignal(int, str)  # (文件索引, 处理阶段)
+    eta_signal = pyqtSignal(float)  # 预计剩余秒数
+    finished_signal = pyqtSignal()
+
+    def __init__(self, video_files, output_folder, model_size="base", use_gpu=True, ffmpeg_path="", use_cache=True,
+                 prefetch=2, extract_workers=1, num_processes=1, use_vad=True, batch_size=1, durations=None,
+                 rtf_store=None, precision="fp32"):
+        super().__init__()
+        self.video_files = video_files
+        self.output_folder = output_folder
+        self.model_size = model_size
+        self.use_gpu = use_gpu and cuda_available()
+        self.precision = resolve_precision("cuda" if self.use_gpu else "cpu", precision)  # 实际使用的推理精度
+        self.is_running = True
+        self.cancel_token = CancelToken()  # 停止时中断正在解码的 ffmpeg 和正在转写的文件
+        self.ffmpeg_path = ffmpeg_path
+        self.whisper_model = None
+        self.cache = TranscriptionCache(default_cache_dir()) if use_cache else None
+        self.prefetch = prefetch  # 预先提取音频的文件数
+        self.extract_workers = extract_workers  # 音频提取线程数
+        self.num_processes = num_processes  # CPU模式下的并行转写进程数
+        self.long_transcriber = None  # 文件数少于进程数时，单个文件分块并行转写
+        self.use_vad = use_vad  # 转写前跳过静音和无人声片段
+        self.batch_size = batch_size  # 短视频合并推理的批大小
+        self.batch_engine = None
+        self.files_done = 0
+        # 各文件时长（确认对话框中读取，未知为 None），用于按音频时长计算进度和剩余时间
+        self.durations = list(durations) if durations else [None] * len(video_files)
+        self.audio_done = 0.0
+        self.rtf_store = rtf_store or RTFStore()
+        self.parallelism = 1  # 同时转写的进程数，剩余时间按此折算
+
+    def device_and_precision(self):
+        return ("cuda" if self.use_gpu else "cpu"), self.precision
+
+    def transcribe_options(self):
+        """Whisper解码参数"""
+        return transcribe_options(fp16=self.use_gpu)
+
+    def cache_options(self):
+        """缓存键中的解码参数，分块转写的结果单独缓存"""
+        options = precision_cache_options(dict(self.transcribe_options(), vad=self.use_vad), self.precision)
+        if self.batch_size > 1:
+            options["batched"] = True
+        if self.long_transcriber is not None:
+            options["chunk_seconds"] = self.long_transcriber.chunk_seconds
+        return options
+
+    def load_whisper_model(self):
+        """加载Whisper模型，失败时返回False"""
+        self.log_signal.emit("正在加载Whisper模型...")
+        device = "cuda" if self.use_gpu else "cpu"
+        self.log_signal.emit(f"使用设备: {device}, 精度: {self.precision}")
+        if self.precision == "int8" and not os.path.exists(quantized_model_path(self.model_size)):
+            self.log_signal.emit("首次使用int8精度，正在量化模型（只需一次）...")
+
+        # 禁用不必要的警告
+        import warnings
+        warnings.filterwarnings("ignore", message="Failed to launch Triton kernels")
+
+        try:
+            self.whisper_model = load_model(self.model_size, device, self.precision)
+            install_cancel_check(self.whisper_model)
+            instrument_model(self.whisper_model)
+            self.log_signal.emit(f"Whisper {self.model_size} 模型加载成功")
+            return True
+        except Exception as e:
+            self.log_signal.emit(f"模型加载失败: {str(e)}")
+            return False
+
+    def run(self):
+        try:
+            # 检查并安装必要的依赖
+            if not self.check_and_install_dependencies():
+                return
+
+            # CPU模式下使用多进程并行转写
+            if self.num_processes > 1 and not self.use_gpu:
+                if len(self.video_files) >= self.num_processes:
+                    self.run_parallel()
+                    return
+                # 文件数少于进程数时，把每个文件在静音处切块后并行转写
+                self.log_signal.emit(f"长文件模式: 每个文件切块后由 {self.num_processes} 个进程同时转写")
+                self.long_transcriber = LongAudioTranscriber(self.model_size, num_workers=self.num_processes,
+                                                             precision=self.precision)
+                self.parallelism = self.num_processes
+
+            elif self.batch_size > 1:
+                # 30秒以内的短视频合并成一批，一次完成编码和解码
+                self.batch_engine = BatchInferenceEngine(
+                    lambda: nullcontext(self.whisper_model),
+                    max_batch_size=self.batch_size,
+                    language=LANGUAGE,
+                    fp16=self.use_gpu
+                )
+
+            # 全部命中缓存时无需加载模型，因此模型在第一次未命中时才加载
+            if self.cache is None and not self.load_whisper_model():
+                return
+
+            total_files = len(self.video_files)
+            self.log_signal.emit(f"开始处理，共发现 {total_files} 个视频文件")
+
+            # 后台线程预先提取后续文件的音频，与当前文件的转写重叠进行
+            pipeline = PrefetchPipeline(
+                self.video_files,
+                self.prepare_file,
+                prefetch=self.prefetch,
+                extract_workers=self.extract_workers,
+                on_stage=self.stage_signal.emit
+            )
+
+            short_clips = []  # 等待合并批量推理的短视频
+            for i, video_path, prepared, error in pipeline:
+                if not self.is_running:
+                    pipeline.close()
+                    break
+
+                start_time = time.time()
+                video_name = Path(video_path).stem
+
+                self.log_signal.emit(f"正在处理: {video_name}")
+
+                try:
+                    if error is not None:
+                        raise error
+
+                    text_content = prepared.get("text")
+                    if text_content is not None:
+                        # 已转写过的文件直接使用缓存结果
+                        self.stage_signal.emit(i, STAGE_CACHED)
+                        self.log_signal.emit(f"命中缓存，跳过转写: {video_name}")
+                        self.save_result(i, video_path, text_content, start_time)
+                        continue
+
+                    if (self.long_transcriber is None and self.whisper_model is None
+                            and not self.load_whisper_model()):
+                        pipeline.close()
+                        break
+
+                    if self.batch_engine is not None and audio_duration(prepared["audio"]) <= WINDOW_SECONDS:
+                        # 短视频先攒够一批，再合并成一次批量推理
+                        short_clips.append((i, video_path, prepared, start_time))
+                        if len(short_clips) >= self.batch_size:
+                            self.transcribe_short_clips(short_clips)
+                            short_clips = []
+                        continue
+
+                    # 使用Whisper转换为文字（分块模式在子进程中推理，只记录解码和写出）
+                    self.stage_signal.emit(i, STAGE_TRANSCRIBING)
+                    timer = StageTimer()
+                    timer.add("decode", prepared["decode_seconds"])
+                    transcribe_start = time.time()
+                    with timer.activate():
+                        text_content = self.audio_to_text_with_whisper(prepared["audio"])
+                    self.record_rtf(audio_duration(prepared["audio"]), time.time() - transcribe_start)
+                    if self.cache is not None:
+                        self.cache.put(prepared["cache_key"], {"text": text_content})
+                    prepared = None  # 尽早释放音频数组
+                    self.save_result(i, video_path, text_content, start_time, timer)
+
+                except CancelledError:
+                    self.log_signal.emit(f"已中断: {video_name}")
+                    pipeline.close()
+                    break
+                except Exception as e:
+                    self.stage_signal.emit(i, STAGE_FAILED)
+                    self.log_signal.emit(f"处理失败 {video_name}: {str(e)}")
+                    self.update_file_progress(i)
+
+            if short_clips and self.is_running:
+                self.transcribe_short_clips(short_clips)
+
+            if self.cache is not None:
+                stats = self.cache.stats()
+                self.log_signal.emit(f"缓存命中: {stats['hits']}个, 未命中: {stats['misses']}个")
+            self.log_signal.emit("所有文件处理完成！" if self.is_running else "已停止转换")
+
+        except Exception as e:
+            self.log_signal.emit(f"处理过程中出现错误: {str(e)}")
+
+        finally:
+            if self.long_transcriber is not None:
+                self.long_transcriber.close()
+                self.long_transcriber = None
+            if self.batch_engine is not None:
+                self.batch_engine.close()
+            # 停止后立即释放模型和音频占用的内存
+            self.whisper_model = None
+            self.batch_engine = None
+            self.finished_signal.emit()
+
+    def run_parallel(self):
+        """使用多个进程并行转写（每个进程各自加载模型）"""
+        total_files = len(self.video_files)
+        self.log_signal.emit(f"开始处理，共发现 {total_files} 个视频文件")
+        index_of = {path: i for i, path in enumerate(self.video_files)}
+
+        self.parallelism = self.num_processes
+
+        def on_result(result):
+            stage = STAGE_FAILED if result["error"] else (STAGE_CACHED if result.get("cached") else STAGE_DONE)
+            self.stage_signal.emit(index_of[result["video_path"]], stage)
+            self.update_file_progress(index_of[result["video_path"]])
+
+        engine = ParallelBatchEngine(
+            model_size=self.model_size,
+            num_workers=self.num_processes,
+            ffmpeg_cmd=self.ffmpeg_path or 'ffmpeg',
+            cache=self.cache,
+            use_vad=self.use_vad,
+            precision=self.precision
+        )
+        engine.run(
+            self.video_files,
+            self.output_folder,
+            on_log=self.log_signal.emit,
+            on_result=on_result,
+            should_stop=lambda: not self.is_running
+        )
+        self.log_signal.emit("所有文件处理完成！" if self.is_running else "已停止转换")
+
+    def save_result(self, index, video_path, text_content, start_time, timer=None):
+        """保存文本文件（添加时间戳）并输出统计信息，timer 为该文件的分阶段计时"""
+        video_name = Path(video_path).stem
+        current_time = time.strftime("%H%M%S")  # 获取当前时间（时分秒）
+        txt_filename = f"{video_name}_{current_time}.txt"
+        txt_path = os.path.join(self.output_folder, txt_filename)
+        write_start = time.perf_counter()
+        with open(txt_path, 'w', encoding='utf-8') as f:
+            f.write(text_content)
+        if timer is not None:
+            timer.add("write", time.perf_counter() - write_start)
+
+        # 计算处理时间和文字数量
+        duration = time.time() - start_time
+        word_count = len(text_content)
+        remaining = len(self.video_files) - self.files_done - 1
+
+        self.stage_signal.emit(index, STAGE_DONE)
+        self.log_signal.emit(f"完成: {video_name}")
+        self.log_signal.emit(f"耗时: {duration:.2f}秒, 文字数量: {word_count}, 剩余: {remaining}个文件")
+        if timer is not None:
+            # 音频解码在预取线程中完成，不在本文件的耗时之内
+            total = duration + timer.stages.get("decode", 0.0)
+            self.log_signal.emit(f"阶段耗时: {format_breakdown(timer.breakdown(total=total))}")
+        self.log_signal.emit(f"输出文件: {txt_filename}")
+        self.log_signal.emit(f"输出路径: {txt_path}")
+        self.log_signal.emit("-" * 50)
+        self.update_file_progress(index)
+
+    def record_rtf(self, audio_seconds, processing_seconds):
+        """记录单进程逐个转写的实测实时率（多进程、分块和批量推理模式的速度不可比，不记录）"""
+        if self.long_transcriber is None:
+            device, precision = self.device_and_precision()
+            self.rtf_store.record(self.model_size, device, precision, audio_seconds, processing_seconds)
+
+    def update_file_progress(self, index):
+        """一个文件处理结束（成功或失败）后按音频时长更新进度和预计剩余时间"""
+        self.files_done += 1
+        known = [d for d in self.durations if d is not None]
+        default = sum(known) / len(known) if known else 300  # 时长未知的文件按已知文件的平均时长计
+        self.audio_done += self.durations[index] if self.durations[index] is not None else default
+        total_audio = sum(d if d is not None else default for d in self.durations)
+        self.progress_signal.emit(int(min(self.audio_done / total_audio, 1.0) * 100) if total_audio else 100)
+
+        rtf, _ = self.rtf_store.estimate(self.model_size, *self.device_and_precision())
+        self.eta_signal.emit(max(total_audio - self.audio_done, 0.0) * rtf / self.parallelism)
+
+    def transcribe_short_clips(self, clips):
+        """把多个短视频的音频合并成一批推理"""
+        self.log_signal.emit(f"批量推理 {len(clips)} 个短视频...")
+        speech_audios = []
+        for i, video_path, prepared, start_time in clips:
+            self.stage_signal.emit(i, STAGE_TRANSCRIBING)
+            if self.use_vad:
+                speech_audio, time_map, _ = compress_silence(prepared["audio"])
+            else:
+                speech_audio, time_map = prepared["audio"], None
+            speech_audios.append((speech_audio, time_map))
+
+        try:
+            # 整段都是静音的短视频不需要推理
+            voiced = [audio for audio, _ in speech_audios if len(audio)]
+            # 批量推理的吞吐量与逐个转写不可比，不记录实时率
+            voiced_results = iter(self.batch_engine.transcribe_many(voiced, self.cancel_token))
+            results = [next(voiced_results) if len(audio) else {"text": "", "segments": []}
+                       for audio, _ in speech_audios]
+        except CancelledError:
+            # 停止后本批尚未推理的窗口已被丢弃
+            self.log_signal.emit(f"已中断批量推理 ({len(clips)} 个短视频)")
+            return
+        except Exception as e:
+            for i, video_path, prepared, start_time in clips:
+                self.stage_signal.emit(i, STAGE_FAILED)
+                self.log_signal.emit(f"处理失败 {Path(video_path).stem}: {str(e)}")
+                self.update_file_progress(i)
+            return
+
+        for (i, video_path, prepared, start_time), (_, time_map), result in zip(clips, speech_audios, results):
+            if time_map is not None:
+                restore_timestamps(result, time_map)
+            text_content = format_transcript(result)
+            if self.cache is not None:
+                self.cache.put(prepared["cache_key"], {"text": text_content})
+            self.save_result(i, video_path, text_content, start_time)
+
+    def prepare_file(self, video_path):
+        """在预取线程中执行：查询缓存，未命中时解码音频"""
+        if not self.is_running:
+            raise CancelledError()
+
+        prepared = {}
+        if self.cache is not None:
+            prepared["cache_key"] = make_cache_key(hash_file(video_path), self.model_size, LANGUAGE,
+                                                   self.cache_options())
+            cached = self.cache.get(prepared["cache_key"])
+            if cached is not None:
+                prepared["text"] = cached["text"]
+                return prepared
+
+        # 使用ffmpeg提取音频（直接解码到内存）
+        decode_start = time.perf_counter()
+        prepared["audio"] = self.extract_audio_with_ffmpeg(video_path, Path(video_path).stem)
+        prepared["decode_seconds"] = time.perf_counter() - decode_start
+        return prepared
+
+    def extract_audio_with_ffmpeg(self, video_path, video_name):
+        """使用ffmpeg从视频中提取音频，返回16kHz的float32数组"""
+        try:
+            self.log_signal.emit(f"提取音频: {video_name}")
+
+            # ffmpeg 解码为 s16le 输出到 stdout，不落地临时 WAV 文件
+            return load_audio_pcm(video_path, self.ffmpeg_path, cancel_token=self.cancel_token)
+
+        except CancelledError:
+            raise
+        except Exception as e:
+            raise Exception(f"音频提取失败: {str(e)}")
+
+    def audio_to_text_with_whisper(self, audio):
+        """使用Whisper将音频转换为文字"""
+        try:
+            self.log_signal.emit("正在进行语音识别...")
+            self.log_signal.emit(f"音频时长: {audio_duration(audio):.1f}秒")
+
+            # 使用Whisper进行转录
+            if self.long_transcriber is not None:
+                def transcribe(speech):
+                    return self.long_transcriber.transcribe(
+                        speech,
+                        on_progress=lambda done, total: self.log_signal.emit(f"分块转写进度: {done}/{total}"),
+                        cancel_token=self.cancel_token
+                    )
+            else:
+                def transcribe(speech):
+                    return self.whisper_model.transcribe(
+                        speech,
+                        language=LANGUAGE,
+                        **self.transcribe_options()
+                    )
+
+            # 先跳过静音片段，时间戳会映射回原始时间轴；停止时在下一个30秒窗口编码前中断
+            with self.cancel_token.activate():
+                result, vad_stats = transcribe_with_vad(transcribe, audio, enabled=self.use_vad)
+            if vad_stats:
+                self.log_signal.emit(f"语音占比: {vad_stats['speech_ratio']:.0%}, "
+                                     f"跳过静音: {vad_stats['skipped_seconds']:.1f}秒")
+
+            # 获取转录文本
+            text = result["text"].strip()
+            self.log_signal.emit(f"识别完成，文本长度: {len(text)} 字符")
+
+            if not text:
+                self.log_signal.emit("警告: 未识别到语音内容")
+            elif needs_formatting(text):
+                # 如果文本中缺少标点，按分段进行简单的格式整理
+                self.log_signal.emit("正在优化文本格式...")
+
+            return format_transcript(result)
+
+        except CancelledError:
+            raise
+        except Exception as e:
+            self.log_signal.emit(f"语音转文字失败: {str(e)}")
+            raise Exception(f"语音转文字失败: {str(e)}")
+
+    def stop(self):
+        """停止处理：杀掉正在运行的 ffmpeg，正在转写的文件在下一个窗口前中断"""
+        self.is_running = False
+        self.cancel_token.cancel()
+
+    def check_and_install_dependencies(self):
+        """检查并安装必要的依赖"""
+        try:
+            # 检查CUDA工具包（如果使用GPU）
+            if self.use_gpu:
+                if find_spec("triton") is not None:
+                    self.log_signal.emit("✓ Triton CUDA 工具包已安装")
+                else:
+                    self.log_signal.emit("⚠️ Triton CUDA 工具包未安装，某些GPU加速功能将不可用")
+
+            # 检查ffmpeg：整批任务只解析一次，之后每个文件直接使用解析出的路径
+            toolchain = resolve_toolchain(self.ffmpeg_path)
+            if toolchain is None and not self.ffmpeg_path:
+                # 尝试下载ffmpeg
+                self.log_signal.emit("正在下载ffmpeg...")
+                if not self.download_ffmpeg():
+                    self.log_signal.emit("❌ ffmpeg下载失败，请手动下载并放置在程序目录")
+                    return False
+                toolchain = resolve_toolchain(self.ffmpeg_path, refresh=True)
+            if toolchain is None:
+                self.log_signal.emit(f"❌ 不是有效的ffmpeg: {self.ffmpeg_path}")
+                return False
+            self.ffmpeg_path = toolchain["ffmpeg"]
+            self.log_signal.emit(f"使用ffmpeg: {self.ffmpeg_path} ({toolchain['version']})")
+
+            # 检查whisper（只查找是否安装，模型加载时才导入）
+            if find_spec("whisper") is None:
+                self.log_signal.emit("正在安装whisper...")
+                try:
+                    subprocess.check_call([
+                        sys.executable, "-m", "pip", "install",
+                        "-i", "https://pypi.tuna.tsinghua.edu.cn/simple",
+                        "openai-whisper"
+                    ])
+                except Exception as e:
+                    self.log_signal.emit(f"❌ whisper安装失败: {str(e)}")
+                    return False
+
+            return True
+
+        except Exception as e:
+            self.log_signal.emit(f"依赖检查失败: {str(e)}")
+            return False
+
+    def download_ffmpeg(self):
+        """下载ffmpeg"""
+        try:
+            url = "https://github.com/BtbN/FFmpeg-Builds/releases/download/latest/ffmpeg-master-latest-win64-gpl.zip"
+            
+            # 使用requests下载
+            import requests
+            response = requests.get(url, stream=True)
+            total_size = int(response.headers.get('content-length', 0))
+            block_size = 1024  # 1KB
+            
+            with open("ffmpeg.zip", "wb") as f:
+                downloaded = 0
+                for data in response.iter_content(block_size):
+                    downloaded += len(data)
+                    f.write(data)
+                    progress = (downloaded / total_size) * 100
+                    self.log_signal.emit(f"下载进度: {progress:.1f}%")
+            
+            self.log_signal.emit("正在解压ffmpeg...")
+            with zipfile.ZipFile("ffmpeg.zip", "r") as zip_ref:
+                zip_ref.extractall("ffmpeg_temp")
+            
+            # 移动ffmpeg.exe和ffprobe.exe
+            for name in ("ffmpeg.exe", "ffprobe.exe"):
+                exe = next(Path("ffmpeg_temp").rglob(name), None)
+                if exe is None:
+                    continue
+                if os.path.exists(name):
+                    os.remove(name)
+                os.rename(exe, name)
+            
+            # 清理临时文件
+            shutil.rmtree("ffmpeg_temp")
+            os.remove("ffmpeg.zip")
+            
+            self.ffmpeg_path = "ffmpeg.exe"
+            self.log_signal.emit("✓ ffmpeg 安装完成")
+            return True
+            
+        except Exception as e:
+            self.log_signal.emit(f"❌ ffmpeg 下载失败: {str(e)}")
+            return False
+
+class HelpButton(QPushButton):
+    def __init__(self, parent=None):
+        super().__init__("?", parent)
+        self.setFixedSize(20, 20)
+        self.setStyleSheet("""
+            QPushButton {
+                border: 1px solid #999;
+                border-radius: 10px;
+                background-color: #f0f0f0;
+                color: #666;
+                font-size: 12px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #e0e0e0;
+            }
+        """)
+        self.help_text = ("模型选择指南：\n"
+                         "• ≥10GB 显存：large（适合最佳质量）\n"
+                         "• ≥8GB 显存：medium（平衡速度和质量）\n"
+                         "• ≥5GB 显存：small（平衡内存和质量）\n"
+                         "• <5GB 显存：base（适合基本使用）\n"
+                         "• CPU 模式：base（适合CPU模式）")
+        
+        # 设置工具提示样式
+        QToolTip.setFont(QFont('Microsoft YaHei', 9))
+        
+        # 连接点击事件
+        self.clicked.connect(self.show_tooltip)
+        
+        # 设置鼠标追踪
+        self.setMouseTracking(True)
+        
+    def enterEvent(self, event):
+        # 鼠标进入时显示提示
+        QToolTip.showText(QCursor.pos(), self.help_text, self)
+        
+    def leaveEvent(self, event):
+        # 鼠标离开时隐藏提示
+        QToolTip.hideText()
+        
+    def show_tooltip(self):
+        # 点击时显示提示
+        pos = self.mapToGlobal(QPoint(self.width(), 0))
+        QToolTip.showText(pos, self.help_text, self)
+
+
+class ConfirmDialog(QDialog):
+    # 后台探测结果：序号, 文件字节数（-1 表示无法读取）, 时长秒数（-1 表示未知）
+    probe_signal = pyqtSignal(int, float, float)
+
+    def __init__(self, files, parent=None, ffmpeg_path=None, rtf=(1 / 3, False), parallelism=1):
+        super().__init__(parent)
+        self.files = files
+        self.rtf, self.rtf_measured = rtf  # 实时率（处理秒数/音频秒数）及是否为本机实测值
+        self.parallelism = parallelism
+        self.durations = {}  # 文件序号 -> 时长，未知为 None
+        self.probe_service = MediaProbeService(ffmpeg_path=ffmpeg_path)
+        self.init_ui()
+        self.update_estimate()
+        self.probe_signal.connect(self.on_probed)
+        # 对话框显示后在后台并发探测时长，命中缓存的文件立即返回
+        self.probe_service.probe_many(
+            self.files,
+            lambda index, size, duration: self.probe_signal.emit(
+                index, -1.0 if size is None else float(size), -1.0 if duration is None else duration
+            )
+        )
+
+    def init_ui(self):
+        self.setWindowTitle("转换确认")
+        self.setMinimumWidth(500)
+        layout = QVBoxLayout()
+
+        # 添加文件数量信息
+        info_layout = QHBoxLayout()
+        info_layout.addWidget(QLabel(f"待转换文件数量: {len(self.files)}"))
+        
+        self.time_label = QLabel()
+        info_layout.addWidget(self.time_label)
+        layout.addLayout(info_layout)
+
+        # 添加文件列表
+        list_label = QLabel("文件列表:")
+        layout.addWidget(list_label)
+
+        # 文件列表：单个列表控件，大小和时长读取后再填入
+        self.file_list = QListWidget()
+        self.file_list.setMinimumHeight(300)
+        self.file_list.setUniformItemSizes(True)
+        for i, file in enumerate(self.files, 1):
+            item = QListWidgetItem(f"{i}. {Path(file).name}")
+            item.setToolTip(file)  # 鼠标悬停显示完整路径
+            self.file_list.addItem(item)
+        layout.addWidget(self.file_list)
+
+        # 添加按钮
+        btn_layout = QHBoxLayout()
+        ok_btn = QPushButton("开始转换")
+        cancel_btn = QPushButton("取消")
+        ok_btn.clicked.connect(self.accept)
+        cancel_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(ok_btn)
+        btn_layout.addWidget(cancel_btn)
+        layout.addLayout(btn_layout)
+
+        self.setLayout(layout)
+
+    def on_probed(self, index, size, duration):
+        """在GUI线程中更新一个文件的信息和预计时间"""
+        duration = duration if duration >= 0 else None
+        self.durations[index] = duration
+
+        text = f"{index + 1}. {Path(self.files[index]).name}"
+        if size >= 0:
+            text += f" ({size / (1024 * 1024):.1f}MB"
+            if duration is not None:
+                text += f", {int(duration // 60)}分{int(duration % 60):02d}秒"
+            text += ")"
+        self.file_list.item(index).setText(text)
+
+        self.update_estimate()
+        if len(self.durations) == len(self.files):
+            self.probe_service.cache.save()
+
+    def update_estimate(self):
+        # 无法获取时长的文件按5分钟估算，尚未读取的文件也先按5分钟计
+        total_duration = sum(300 if self.durations.get(i) is None else self.durations[i]
+                             for i in range(len(self.files)))
+
+        # 按当前模型和设备的实时率估算处理时间
+        estimated_time = total_duration * self.rtf / self.parallelism
+
+        text = f"预计处理时间: {format_eta(estimated_time)}"
+        text += "（按本机实测速度）" if self.rtf_measured else "（粗略估计）"
+        if len(self.durations) < len(self.files):
+            text += f"（已读取 {len(self.durations)}/{len(self.files)}）"
+        self.time_label.setText(text)
+
+    def done(self, result):
+        # 关闭对话框时取消尚未开始的探测
+        self.probe_service.close()
+        super().done(result)
+
+
+class VideoAudioExtractorApp(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.video_files = []
+        self.output_folder = ""
+        self.processor_thread = None
+        self.file_stages = {}  # 文件索引 -> 当前处理阶段
+        self.ffmpeg_path = ""
+        self.api_server = None
+        self.rtf_store = RTFStore()  # 各模型和设备的实测实时率，用于估算处理时间
+        self.init_ui()
+        self.check_dependencies()
+
+    def get_recommended_model(self):
+        """获取推荐的模型大小"""
+        if cuda_available():
+            memory_gb = gpu_memory_gb()
+            if memory_gb >= 10:
+                return "large", "适合最佳质量"
+            elif memory_gb >= 8:
+                return "medium", "平衡速度和质量"
+            elif memory_gb >= 5:
+                return "small", "平衡内存和质量"
+            else:
+                return "base", "适合基本使用"
+        else:
+            # CPU模式下推荐使用较小的模型
+            return "base", "适合CPU模式"
+
+    def init_ui(self):
+        self.setWindowTitle("视频音频转文字工具 (GPU加速版)")
+        self.setGeometry(100, 100, 900, 700)
+
+        # 创建中央窗口部件
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+
+        # 创建主布局
+        main_layout = QVBoxLayout()
+        central_widget.setLayout(main_layout)
+
+        # 设置字体
+        font = QFont("Microsoft YaHei", 10)
+        self.setFont(font)
+
+        # 标题
+        title_label = QLabel("视频音频转文字提取工具 (GPU加速版)")
+        title_label.setAlignment(Qt.AlignCenter)
+        title_label.setFont(QFont("Microsoft YaHei", 16, QFont.Bold))
+        main_layout.addWidget(title_label)
+
+        # 添加ffmpeg路径选择
+        ffmpeg_layout = QHBoxLayout()
+        self.ffmpeg_label = QLabel("未选择ffmpeg路径")
+        self.ffmpeg_btn = QPushButton("选择ffmpeg")
+        self.ffmpeg_btn.clicked.connect(self.select_ffmpeg_path)
+        ffmpeg_layout.addWidget(QLabel("ffmpeg路径:"))
+        ffmpeg_layout.addWidget(self.ffmpeg_label, 1)
+        ffmpeg_layout.addWidget(self.ffmpeg_btn)
+        main_layout.addLayout(ffmpeg_layout)
+
+        # 模型设置部分
+        model_layout = QHBoxLayout()
+        model_layout.addWidget(QLabel("Whisper模型:"))
+
+        self.model_combo = QComboBox()
+        self.model_combo.addItems(["tiny", "base", "small", "medium", "large"])
+        # 设置推荐的模型大小
+        recommended_model, reason = self.get_recommended_model()
+        self.model_combo.setCurrentText(recommended_model)
+        model_layout.addWidget(self.model_combo)
+
+        # 添加帮助按钮
+        help_btn = HelpButton(self)
+        model_layout.addWidget(help_btn)
+
+        # 添加推荐标记
+        self.model_recommended_label = QLabel(f"（推荐：{reason}）")
+        self.model_recommended_label.setStyleSheet("color: green;")
+        model_layout.addWidget(self.model_recommended_label)
+
+        self.gpu_checkbox = QCheckBox("使用GPU加速")
+        self.gpu_checkbox.setChecked(cuda_available())
+        self.gpu_checkbox.setEnabled(cuda_available())
+        model_layout.addWidget(self.gpu_checkbox)
+
+        # CPU模式下的推理精度
+        model_layout.addWidget(QLabel("CPU精度:"))
+        self.precision_combo = QComboBox()
+        for precision in CPU_PRECISIONS:
+            if precision == "bf16" and not cpu_bf16_supported():
+                continue
+            self.precision_combo.addItem(PRECISION_LABELS[precision], precision)
+        self.precision_combo.setToolTip("int8: Linear层动态量化，速度更快、准确率略有下降，首次使用时量化一次并缓存\n"
+                                        "bf16: 在支持AVX512-BF16/AMX的CPU上以bf16计算")
+        self.precision_combo.setEnabled(not self.gpu_checkbox.isChecked())
+        self.gpu_checkbox.toggled.connect(lambda checked: self.precision_combo.setEnabled(not checked))
+        model_layout.addWidget(self.precision_combo)
+
+        self.batch_checkbox = QCheckBox("短视频批量推理")
+        self.batch_checkbox.setToolTip("把多个30秒以内的短视频合并成一批推理，适合大量短视频")
+        model_layout.addWidget(self.batch_checkbox)
+
+        self.vad_checkbox = QCheckBox("跳过静音")
+        self.vad_checkbox.setChecked(True)
+        self.vad_checkbox.setToolTip("转写前检测并跳过静音和无人声片段，时间戳保持不变")
+        model_layout.addWidget(self.vad_checkbox)
+
+        # CPU模式下的并行进程数
+        model_layout.addWidget(QLabel("并行进程:"))
+        self.process_combo = QComboBox()
+        self.process_combo.addItems([str(n) for n in range(1, max(1, (os.cpu_count() or 1) // 2) + 1)])
+        self.process_combo.setToolTip("CPU模式下同时转写的进程数，每个进程会单独加载一份模型")
+        self.process_combo.setEnabled(not self.gpu_checkbox.isChecked())
+        self.gpu_checkbox.toggled.connect(lambda checked: self.process_combo.setEnabled(not checked))
+        model_layout.addWidget(self.process_combo)
+
+        model_layout.addStretch()
+        main_layout.addLayout(model_layout)
+
+        # 当模型选择改变时更新推荐标记
+        self.model_combo.currentTextChanged.connect(self.update_model_recommendation)
+
+        # 选择视频文件/文件夹部分
+        video_layout = QHBoxLayout()
+        self.video_label = QLabel("未选择视频文件")
+        self.video_select_btn = QPushButton("选择视频")
+        self.video_select_btn.clicked.connect(self.select_videos)
+        
+        video_layout.addWidget(QLabel("视频选择:"))
+        video_layout.addWidget(self.video_label, 1)
+        video_layout.addWidget(self.video_select_btn)
+        main_layout.addLayout(video_layout)
+
+        # 选择输出文件夹部分
+        output_layout = QHBoxLayout()
+        self.output_label = QLabel("未选择输出文件夹")
+        self.output_btn = QPushButton("选择输出文件夹")
+        self.output_btn.clicked.connect(self.select_output_folder)
+
+        output_layout.addWidget(QLabel("输出文件夹:"))
+        output_layout.addWidget(self.output_label, 1)
+        output_layout.addWidget(self.output_btn)
+        main_layout.addLayout(output_layout)
+
+        # 进度条
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        main_layout.addWidget(self.progress_bar)
+
+        # 各文件所处阶段
+        self.stage_label = QLabel("")
+        self.stage_label.setStyleSheet("color: #666;")
+        self.stage_label.setVisible(False)
+        main_layout.addWidget(self.stage_label)
+
+        # 控制按钮
+        button_layout = QHBoxLayout()
+        self.start_btn = QPushButton("开始转换")
+        self.stop_btn = QPushButton("停止转换")
+        self.clear_log_btn = QPushButton("清空日志")
+
+        self.start_btn.clicked.connect(self.start_conversion)
+        self.stop_btn.clicked.connect(self.stop_conversion)
+        self.clear_log_btn.clicked.connect(self.clear_log)
+
+        self.stop_btn.setEnabled(False)
+
+        button_layout.addWidget(self.start_btn)
+        button_layout.addWidget(self.stop_btn)
+        button_layout.addWidget(self.clear_log_btn)
+        button_layout.addStretch()
+        main_layout.addLayout(button_layout)
+
+        # 日志显示区域
+        main_layout.addWidget(QLabel("处理日志:"))
+        self.log_text = QTextEdit()
+        self.log_text.setMaximumHeight(350)
+        main_layout.addWidget(self.log_text)
+
+        # 状态提示
+        gpu_status = "GPU可用" if cuda_available() else "GPU不可用，将使用CPU"
+        status_label = QLabel(f"状态: {gpu_status} | 依赖: ffmpeg, openai-whisper, torch")
+        status_label.setStyleSheet("color: #666; font-size: 9px;")
+        main_layout.addWidget(status_label)
+
+        # API服务控制部分
+        api_group = QGroupBox("API服务控制")
+        api_layout = QVBoxLayout()
+
+        # API服务控制按钮和状态显示
+        api_controls = QHBoxLayout()
+        self.api_start_btn = QPushButton("启动API服务")
+        self.api_stop_btn = QPushButton("停止API服务")
+        self.api_status_label = QLabel("服务状态: 未启动")
+        
+        self.api_start_btn.clicked.connect(self.start_api_service)
+        self.api_stop_btn.clicked.connect(self.stop_api_service)
+        self.api_stop_btn.setEnabled(False)
+
+        api_controls.addWidget(self.api_start_btn)
+        api_controls.addWidget(self.api_stop_btn)
+        api_controls.addWidget(self.api_status_label)
+        api_controls.addStretch()
+
+        # API服务配置
+        api_config = QHBoxLayout()
+        self.api_host_input = QLineEdit("0.0.0.0")
+        self.api_port_input = QLineEdit("8000")
+        self.api_port_input.setValidator(QIntValidator(1, 65535))
+        
+        api_config.addWidget(QLabel("主机:"))
+        api_config.addWidget(self.api_host_input)
+        api_config.addWidget(QLabel("端口:"))
+        api_config.addWidget(self.api_port_input)
+        api_config.addStretch()
+
+        # API服务统计信息
+        self.api_stats = QLabel("任务统计: 总数 0 | 已完成 0")
+
+        api_layout.addLayout(api_controls)
+        api_layout.addLayout(api_config)
+        api_layout.addWidget(self.api_stats)
+
+        api_group.setLayout(api_layout)
+        main_layout.addWidget(api_group)
+
+        # GPU诊断按钮
+        diag_layout = QHBoxLayout()
+        self.gpu_diag_btn = QPushButton("GPU诊断")
+        self.gpu_diag_btn.clicked.connect(self.show_gpu_diagnostic)
+        diag_layout.addWidget(self.gpu_diag_btn)
+        diag_layout.addStretch()
+        main_layout.addLayout(diag_layout)
+
+    def check_dependencies(self):
+        """检查依赖项"""
+        # 检查ffmpeg（读取已记录的工具链，ffmpeg未变化时不再启动进程）
+        toolchain = resolve_toolchain()
+        if toolchain is not None:
+            self.log_message(f"✓ {toolchain['version_line']}")
+            if not toolchain["ffprobe"]:
+                self.log_message("⚠️ 未找到ffprobe，视频时长将通过ffmpeg读取")
+            self.ffmpeg_path = toolchain["ffmpeg"]
+            self.ffmpeg_label.setText(f"已自动检测: {toolchain['ffmpeg']}")
+            self.ffmpeg_btn.setEnabled(False)  # 禁用选择按钮
+        else:
+            self.log_message("✗ ffmpeg 未找到")
+            self.log_message("💡 请检查:")
+            self.log_message("   1. ffmpeg是否正确安装")
+            self.log_message("   2. PATH环境变量是否包含ffmpeg路径")
+            self.log_message("   3. 重启程序或重启电脑")
+            self.log_message("   4. 或者手动选择ffmpeg.exe")
+            self.ffmpeg_btn.setEnabled(True)  # 启用选择按钮
+
+        # 详细检查GPU状态
+        self.log_message("=" * 40)
+        self.log_message("GPU 检测报告:")
+
+        # 使用缓存的环境探测结果，启动时不导入torch
+        environment = probe_environment()
+
+        # 检查PyTorch
+        self.log_message(f"PyTorch版本: {environment['torch_version']}")
+
+        # 检查CUDA
+        if environment["cuda_available"]:
+            self.log_message("✓ CUDA 可用")
+            self.log_message(f"CUDA版本: {environment['cuda_version']}")
+            self.log_message(f"GPU数量: {len(environment['gpus'])}")
+
+            # 检查每个GPU
+            for i, gpu in enumerate(environment["gpus"]):
+                self.log_message(f"GPU {i}: {gpu['name']} ({gpu['memory_gb']:.1f}GB)")
+
+            # 获取推荐模型和原因
+            recommended_model, reason = self.get_recommended_model()
+            self.log_message(f"💡 推荐使用 {recommended_model} 模型（{reason}）")
+
+            # 检查CUDA工具包
+            if environment["triton_installed"]:
+                self.log_message("✓ Triton CUDA 工具包已安装")
+            else:
+                self.log_message("⚠️ Triton CUDA 工具包未安装")
+                self.log_message("💡 建议运行: pip install triton")
+                self.log_message("  这将启用额外的GPU加速功能")
+
+        else:
+            self.log_message("✗ CUDA 不可用")
+            self.log_message("可能原因:")
+            self.log_message("  1. 没有NVIDIA GPU")
+            self.log_message("  2. 显卡驱动未安装")
+            self.log_message("  3. PyTorch版本不支持CUDA")
+            self.log_message("  4. CUDA工具包未安装")
+
+            # 检查是否有其他GPU
+            if environment["mps_available"]:
+                self.log_message("✓ 检测到 Apple Silicon GPU (MPS)")
+                self.log_message("注意: Whisper暂不支持MPS，将使用CPU")
+
+            # 获取推荐模型和原因
+            recommended_model, reason = self.get_recommended_model()
+            self.log_message(f"💡 推荐使用 {recommended_model} 模型（{reason}）")
+
+    def select_videos(self):
+        """选择视频文件和文件夹"""
+        dialog = QFileDialog(self)
+        dialog.setFileMode(QFileDialog.ExistingFiles)  # 允许选择多个文件
+        dialog.setOption(QFileDialog.DontUseNativeDialog, True)  # 使用Qt对话框以支持文件夹选择
+        dialog.setNameFilter("视频文件 (*.mp4 *.avi *.mov *.wmv *.flv *.mkv *.webm *.m4v *.3gp);;所有文件 (*)")
+        
+        # 添加文件夹选择按钮
+        tree_view = dialog.findChild(QTreeView)
+        if tree_view:
+            tree_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        
+        list_view = dialog.findChild(QListView)
+        if list_view:
+            list_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+
+        # 添加"选择文件夹"按钮
+        folder_btn = QPushButton("选择文件夹", dialog)
+        dialog.layout().addWidget(folder_btn)
+        
+        self.video_files = []  # 清空之前的选择
+        
+        def handle_folder_selection():
+            folder = QFileDialog.getExistingDirectory(self, "选择视频文件夹")
+            if folder:
+                # 扫描文件夹中的视频文件
+                video_extensions = ['.mp4', '.avi', '.mov', '.wmv', '.flv', '.mkv', '.webm', '.m4v', '.3gp']
+                for root, dirs, files in os.walk(folder):
+                    for file in files:
+                        if any(file.lower().endswith(ext) for ext in video_extensions):
+                            self.video_files.append(os.path.join(root, file))
+                dialog.accept()  # 关闭对话框
+        
+        folder_btn.clicked.connect(handle_folder_selection)
+        
+        if dialog.exec_() == QFileDialog.Accepted:
+            # 获取选择的文件
+            selected_files = dialog.selectedFiles()
+            for file in selected_files:
+                if os.path.isfile(file):  # 确保是文件而不是目录
+                    self.video_files.append(file)
+            
+            # 更新界面显示
+            if self.video_files:
+                if len(self.video_files) == 1:
+                    self.video_label.setText(f"已选择: {Path(self.video_files[0]).name}")
+                else:
+                    self.video_label.setText(f"已选择 {len(self.video_files)} 个视频文件")
+                self.log_message(f"共选择了 {len(self.video_files)} 个视频文件")
+                
+                # 显示所有选择的文件路径
+                self.log_message("选择的文件:")
+                for file in self.video_files:
+                    self.log_message(f"  • {file}")
+            else:
+                self.video_label.setText("未选择视频文件")
+
+    def select_output_folder(self):
+        """选择输出文件夹"""
+        folder = QFileDialog.getExistingDirectory(self, "选择输出文件夹")
+
+        if folder:
+            self.output_folder = folder
+            self.output_label.setText(f"输出到: {Path(folder).name}")
+            self.log_message(f"设置输出文件夹: {folder}")
+
+    def select_ffmpeg_path(self):
+        """选择ffmpeg可执行文件路径"""
+        file_filter = "ffmpeg (ffmpeg.exe);;所有文件 (*.*)"
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "选择ffmpeg可执行文件",
+            "",
+            file_filter
+        )
+
+        if file_path:
+            # 验证选择的文件是否是ffmpeg，并记录其版本和能力
+            try:
+                toolchain = resolve_toolchain(file_path, refresh=True)
+                if toolchain is not None:
+                    self.ffmpeg_path = toolchain["ffmpeg"]
+                    self.ffmpeg_label.setText(f"已选择: {Path(file_path).name}")
+                    self.log_message(f"设置ffmpeg路径: {file_path}")
+                else:
+                    QMessageBox.warning(self, "警告", "所选文件不是有效的ffmpeg可执行文件")
+            except Exception as e:
+                QMessageBox.warning(self, "警告", f"验证ffmpeg失败: {str(e)}")
+
+    def start_conversion(self):
+        """开始转换"""
+        if not self.video_files:
+            QMessageBox.warning(self, "警告", "请先选择视频文件或文件夹")
+            return
+
+        if not self.output_folder:
+            QMessageBox.warning(self, "警告", "请先选择输出文件夹")
+            return
+
+        # 获取设置
+        model_size = self.model_combo.currentText()
+        use_gpu = self.gpu_checkbox.isChecked()
+        num_processes = int(self.process_combo.currentText())
+        cpu_precision = self.precision_combo.currentData()
+        device = "cuda" if use_gpu and cuda_available() else "cpu"
+        precision = resolve_precision(device, cpu_precision)
+        parallelism = num_processes if device == "cpu" else 1
+
+        # 显示确认对话框
+        dialog = ConfirmDialog(
+            self.video_files,
+            self,
+            ffmpeg_path=self.ffmpeg_path,
+            rtf=self.rtf_store.estimate(model_size, device, precision),
+            parallelism=parallelism
+        )
+        if dialog.exec_() != QDialog.Accepted:
+            return
+
+        # 禁用开始按钮，启用停止按钮
+        self.start_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setValue(0)
+        self.file_stages = {}
+        self.stage_label.setText("")
+        self.stage_label.setVisible(True)
+        self.progress_bar.setFormat("%p%")
+
+        # 创建并启动处理线程
+        self.processor_thread = VideoProcessor(
+            self.video_files,
+            self.output_folder,
+            model_size,
+            use_gpu,
+            self.ffmpeg_path,
+            num_processes=num_processes,
+            use_vad=self.vad_checkbox.isChecked(),
+            batch_size=8 if self.batch_checkbox.isChecked() else 1,
+            durations=[dialog.durations.get(i) for i in range(len(self.video_files))],
+            rtf_store=self.rtf_store,
+            precision=cpu_precision
+        )
+        self.processor_thread.log_signal.connect(self.log_message)
+        self.processor_thread.progress_signal.connect(self.update_progress)
+        self.processor_thread.stage_signal.connect(self.update_file_stage)
+        self.processor_thread.eta_signal.connect(self.update_eta)
+        self.processor_thread.finished_signal.connect(self.conversion_finished)
+        self.processor_thread.start()
+
+    def stop_conversion(self):
+        """停止转换"""
+        if self.processor_thread and self.processor_thread.isRunning():
+            self.processor_thread.stop()
+            self.log_message("正在停止转换...")
+
+    def conversion_finished(self):
+        """转换完成"""
+        self.start_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        self.progress_bar.setVisible(False)
+        self.stage_label.setVisible(False)
+        self.log_message("转换任务结束")
+
+    def update_progress(self, value):
+        """更新进度条"""
+        self.progress_bar.setValue(value)
+
+    def update_eta(self, seconds):
+        """在进度条上显示预计剩余时间"""
+        self.progress_bar.setFormat(f"%p%  预计剩余 {format_eta(seconds)}")
+
+    def update_file_stage(self, index, stage):
+        """更新各文件处理阶段的显示"""
+        self.file_stages[index] = stage
+        files = self.processor_thread.video_files if self.processor_thread else []
+        parts = []
+        for active_stage in (STAGE_TRANSCRIBING, STAGE_BUFFERED, STAGE_EXTRACTING):
+            names = [Path(files[i]).name for i, s in sorted(self.file_stages.items())
+                     if s == active_stage and i < len(files)]
+            if names:
+                parts.append(f"{active_stage}: {', '.join(names)}")
+        finished = sum(1 for s in self.file_stages.values() if s in (STAGE_DONE, STAGE_CACHED, STAGE_FAILED))
+        parts.append(f"已完成: {finished}/{len(files)}")
+        self.stage_label.setText(" | ".join(parts))
+
+    def log_message(self, message):
+        """添加日志消息"""
+        timestamp = time.strftime("%H:%M:%S")
+        self.log_text.append(f"[{timestamp}] {message}")
+        # 自动滚动到底部
+        cursor = self.log_text.textCursor()
+        cursor.movePosition(cursor.End)
+        self.log_text.setTextCursor(cursor)
+
+    def clear_log(self):
+        """清空日志"""
+        self.log_text.clear()
+
+    def show_gpu_diagnostic(self):
+        """显示GPU详细诊断"""
+        self.log_message("\n🔍 开始完整环境诊断...")
+
+        # 系统信息（诊断需要实时结果，直接导入torch检测）
+        import platform
+        import torch
+        self.log_message(f"操作系统: {platform.system()} {platform.release()}")
+        self.log_message(f"Python版本: {platform.python_version()}")
+
+        # 环境变量检查
+        self.log_message("\n📁 环境变量检查:")
+        path_env = os.environ.get('PATH', '')
+        ffmpeg_in_path = any('ffmpeg' in p.lower() for p in path_env.split(os.pathsep))
+        self.log_message(f"PATH中包含ffmpeg: {'✅' if ffmpeg_in_path else '❌'}")
+
+        # 重新检测ffmpeg工具链
+        self.log_message("\n🎬 FFmpeg详细检查:")
+        toolchain = resolve_toolchain(self.ffmpeg_path, refresh=True)
+        if toolchain is not None:
+            self.log_message(f"找到ffmpeg: {toolchain['ffmpeg']}")
+            self.log_message(f"✅ {toolchain['version_line']}")
+            self.log_message(f"ffprobe: {toolchain['ffprobe'] or '❌ 未找到'}")
+            self.log_message(f"多线程解码: {'✅' if toolchain['threads'] else '❌'}")
+            self.log_message(f"音频解码器: {len(toolchain['audio_decoders'])} 个")
+            if toolchain["hwaccels"]:
+                self.log_message(f"硬件加速: {', '.join(toolchain['hwaccels'])}")
+        else:
+            self.log_message("❌ 系统找不到可用的ffmpeg")
+
+        # PyTorch信息
+        self.log_message(f"\n🔥 PyTorch信息:")
+        self.log_message(f"PyTorch版本: {torch.__version__}")
+        self.log_message(f"PyTorch编译CUDA版本: {torch.version.cuda}")
+
+        # CUDA详细检测
+        self.log_message(f"\n⚡ CUDA检测:")
+        if torch.cuda.is_available():
+            self.log_message("✅ CUDA 完全可用")
+            self.log_message(f"CUDA运行时版本: {torch.version.cuda}")
+            self.log_message(f"CUDA设备数量: {torch.cuda.device_count()}")
+
+            for i in range(torch.cuda.device_count()):
+                props = torch.cuda.get_device_properties(i)
+                self.log_message(f"GPU {i}: {props.name}")
+                self.log_message(f"  显存: {props.total_memory / 1024 ** 3:.1f} GB")
+                self.log_message(f"  计算能力: {props.major}.{props.minor}")
+
+                # 测试GPU
+                try:
+                    test_tensor = torch.randn(100, 100).cuda(i)
+                    result = torch.matmul(test_tensor, test_tensor)
+                    self.log_message(f"  ✅ GPU {i} 测试通过")
+                except Exception as e:
+                    self.log_message(f"  ❌ GPU {i} 测试失败: {e}")
+        else:
+            self.log_message("❌ CUDA 不可用")
+
+            # 检查NVIDIA驱动
+            self.log_message("\n🔍 NVIDIA驱动检查:")
+            try:
+                result = subprocess.run(['nvidia-smi'], capture_output=True, text=True, shell=True)
+                if result.returncode == 0:
+                    self.log_message("✅ NVIDIA驱动已安装")
+                    # 提取GPU信息
+                    lines = result.stdout.split('\n')
+                    for line in lines:
+                        if 'NVIDIA-SMI' in line:
+                            self.log_message(f"驱动版本: {line}")
+                        elif 'GeForce' in line or 'RTX' in line or 'GTX' in line:
+                            self.log_message(f"GPU: {line.strip()}")
+
+                    self.log_message("💡 NVIDIA驱动正常，问题可能是PyTorch版本")
+                    self.log_message("💡 请重新安装CUDA版本的PyTorch:")
+                    self.log_message("   pip uninstall torch torchvision torchaudio")
+                    self.log_message(
+                        "   pip install torch torchvision torchaudio --index-url https://download.pytorch.org/whl/cu121")
+                else:
+                    self.log_message("❌ nvidia-smi 执行失败")
+            except Exception as e:
+                self.log_message(f"❌ nvidia-smi 命令不存在: {e}")
+                self.log_message("💡 请先安装NVIDIA显卡驱动")
+
+        # Whisper检查
+        self.log_message(f"\n🎙️ Whisper检查:")
+        try:
+            import whisper
+            self.log_message("✅ Whisper 已安装")
+
+            # 显示推荐配置
+            if torch.cuda.is_available():
+                gpu_memory_gb = torch.cuda.get_device_properties(0).total_memory / 1024 ** 3
+                if gpu_memory_gb >= 10:
+                    self.log_message("💡 推荐使用 large 模型获得最佳效果")
+                elif gpu_memory_gb >= 5:
+                    self.log_message("💡 推荐使用 medium 模型平衡速度和质量")
+                else:
+                    self.log_message("💡 推荐使用 base 模型")
+            else:
+                self.log_message("💡 CPU模式推荐使用 tiny 或 base 模型")
+
+        except ImportError:
+            self.log_message("❌ Whisper 未安装")
+            self.log_message("💡 请运行: pip install openai-whisper")
+
+        # 解决方案汇总
+        self.log_message(f"\n🛠️ 问题解决方案:")
+
+        if not ffmpeg_in_path:
+            self.log_message("FFmpeg问题:")
+            self.log_message("1. 确认ffmpeg已下载并解压")
+            self.log_message("2. 将ffmpeg/bin目录添加到系统PATH")
+            self.log_message("3. 重启命令提示符和程序")
+            self.log_message("4. 或将ffmpeg.exe复制到程序目录")
+
+        if not torch.cuda.is_available():
+            self.log_message("CUDA问题:")
+            self.log_message("1. 安装最新NVIDIA显卡驱动")
+            self.log_message("2. 重新安装支持CUDA的PyTorch:")
+            self.log_message("   pip uninstall torch torchvision torchaudio")
+            self.log_message(
+                "   pip install torch torchvision torchaudio --index-url https://download.pytorch.org/whl/cu121")
+            self.log_message("3. 重启程序验证")
+
+        self.log_message("=" * 60)
+        # 更新缓存的环境探测结果，下次启动时使用
+        probe_environment(refresh=True)
+
+    def update_model_recommendation(self, current_model):
+        """更新模型推荐标记"""
+        recommended_model, reason = self.get_recommended_model()
+        if current_model == recommended_model:
+            self.model_recommended_label.setText(f"（推荐：{reason}）")
+            self.model_recommended_label.setStyleSheet("color: green;")
+        elif self.is_model_too_large(current_model):
+            self.model_recommended_label.setText("（警告：可能内存不足）")
+            self.model_recommended_label.setStyleSheet("color: red;")
+        else:
+            self.model_recommended_label.setText("")
+
+    def is_model_too_large(self, model_name):
+        """检查选择的模型是否可能超出系统资源"""
+        if not cuda_available():
+            # CPU模式下，large和medium模型可能太大
+            return model_name in ["large", "medium"]
+        else:
+            memory_gb = gpu_memory_gb()
+            if memory_gb < 4 and model_name in ["large", "medium", "small"]:
+                return True
+            elif memory_gb < 6 and model_name in ["large", "medium"]:
+                return True
+            elif memory_gb < 8 and model_name == "large":
+                return True
+            return False
+
+    def update_api_status(self, status_data):
+        """更新API服务状态显示"""
+        status = status_data["status"]
+        error = status_data["error"]
+        task_count = status_data["task_count"]
+        completed_tasks = status_data["completed_tasks"]
+
+        # 更新状态标签
+        status_text = f"服务状态: {status}"
+        if error:
+            status_text += f" (错误: {error})"
+        self.api_status_label.setText(status_text)
+
+        # 更新按钮状态
+        self.api_start_btn.setEnabled(status != "running")
+        self.api_stop_btn.setEnabled(status == "running")
+
+        # 更新统计信息
+        self.api_stats.setText(f"任务统计: 总数 {task_count} | 已完成 {completed_tasks}")
+
+        # 根据状态设置标签颜色
+        if status == "running":
+            self.api_status_label.setStyleSheet("color: green")
+        elif status == "error":
+            self.api_status_label.setStyleSheet("color: red")
+        else:
+            self.api_status_label.setStyleSheet("")
+
+    def start_api_service(self):
+        """启动API服务"""
+        try:
+            from api_service import APIServer, register_status_callback
+            
+            host = self.api_host_input.text()
+            port = int(self.api_port_input.text())
+
+            if self.api_server is None:
+                self.api_server = APIServer(host=host, port=port)
+                register_status_callback(self.update_api_status)
+
+            if self.api_server.start():
+                self.log_message(f"API服务启动成功 - {host}:{port}")
+                self.log_message("API接口:")
+                self.log_message(f"  POST http://{host}:{port}/api/v1/transcribe")
+                self.log_message(f"  GET  http://{host}:{port}/api/v1/tasks/{{task_id}}")
+                self.log_message(f"  GET  http://{host}:{port}/api/v1/health")
+            else:
+                self.log_message("API服务已在运行")
+
+        except Exception as e:
+            self.log_message(f"API服务启动失败: {str(e)}")
+            QMessageBox.critical(self, "错误", f"API服务启动失败: {str(e)}")
+
+    def stop_api_service(self):
+        """停止API服务"""
+        if self.api_server and self.api_server.stop():
+            self.log_message("API服务已停止")
+        else:
+            self.log_message("API服务未在运行")
+
+    def closeEvent(self, event):
+        """窗口关闭时的处理"""
+        # 停止视频处理
+        if self.processor_thread and self.processor_thread.isRunning():
+            self.stop_conversion()
+        
+        # 停止API服务
+        if self.api_server:
+            self.api_server.stop()
+        
+        event.accept()
+
+
+def run_gui():
+    """图形界面入口"""
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv)
+
+    # 检查依赖
+    if not check_and_install_dependencies():
+        QMessageBox.critical(None, "错误", "依赖检查失败，请查看控制台输出")
+        return
+
+    window = VideoAudioExtractorApp()
+    window.show()
+    sys.exit(app.exec_())
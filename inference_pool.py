@@ -0,0 +1,143 @@
+import threading
+import time
+
+from job_scheduler import Job, FairShareScheduler, DEFAULT_PRIORITY
+
+
+class QueueFullError(Exception):
+    """任务队列已满，调用方应稍后重试"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"任务队列已满，请在 {retry_after} 秒后重试")
+        self.retry_after = retry_after
+
+
+class InferencePool:
+    """有界任务队列 + 固定数量的推理工作线程
+
+    ffmpeg 和 Whisper 推理都是阻塞调用，放在工作线程中执行，
+    避免阻塞 API 的事件循环。队列满时 submit 直接抛出 QueueFullError，
+    由 API 层转换为 503 + Retry-After。排队任务的执行顺序由 scheduler 决定
+    （默认按优先级、预计耗时和提交方用量，见 FairShareScheduler）。
+    """
+
+    def __init__(self, num_workers=1, max_queue_size=16, default_retry_after=30, scheduler=None):
+        self.num_workers = max(1, int(num_workers))
+        self.max_queue_size = max(1, int(max_queue_size))
+        self.default_retry_after = default_retry_after
+        self.scheduler = scheduler or FairShareScheduler(self.num_workers)
+        self._workers = []
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._recent_durations = []
+        self._stopping = False
+
+    def start(self):
+        """启动工作线程（重复调用无副作用）"""
+        with self._lock:
+            if self._workers:
+                return
+            self._stopping = False
+            for i in range(self.num_workers):
+                worker = threading.Thread(target=self._worker_loop, name=f"inference-worker-{i}")
+                worker.daemon = True
+                worker.start()
+                self._workers.append(worker)
+
+    def submit(self, func, *args, **kwargs):
+        """提交任务（普通优先级、预计耗时未知），队列已满时抛出 QueueFullError"""
+        self.submit_job(Job(func, args, kwargs))
+
+    def schedule(self, func, args=(), kwargs=None, cost=0.0, priority=DEFAULT_PRIORITY, client="", job_id=None):
+        """按预计耗时 cost（秒）、优先级和提交方提交任务，队列已满时抛出 QueueFullError"""
+        self.submit_job(Job(func, args, kwargs, cost=cost, priority=priority, client=client, job_id=job_id))
+
+    def submit_job(self, job):
+        self.start()
+        with self._lock:
+            if len(self.scheduler) >= self.max_queue_size:
+                raise QueueFullError(self._retry_after_locked())
+            self.scheduler.add(job)
+            self._ready.notify()
+
+    def cancel(self, job_id):
+        """从队列中移除尚未开始的任务，返回被移除的 Job；任务不在队列中（已开始或不存在）时返回 None"""
+        with self._lock:
+            return self.scheduler.remove(job_id)
+
+    def queue_depth(self):
+        """排队中（尚未开始）的任务数"""
+        with self._lock:
+            return len(self.scheduler)
+
+    def in_flight(self):
+        """正在执行的任务数"""
+        return self._in_flight
+
+    def estimate_retry_after(self):
+        """根据最近任务耗时估算建议的重试等待秒数"""
+        with self._lock:
+            return self._retry_after_locked()
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "workers": self.num_workers,
+                "queue_depth": len(self.scheduler),
+                "queue_capacity": self.max_queue_size,
+                "in_flight": self._in_flight
+            }
+            stats["scheduler"] = self.scheduler.stats()
+        return stats
+
+    def shutdown(self, wait=False):
+        """停止工作线程，未开始的任务会被丢弃"""
+        with self._lock:
+            self._stopping = True
+            workers = self._workers
+            self._workers = []
+            self.scheduler.clear()
+            self._ready.notify_all()
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    def _retry_after_locked(self):
+        durations = self._recent_durations
+        if not durations:
+            return self.default_retry_after
+        avg_duration = sum(durations) / len(durations)
+        # 至少要等一个工作线程空出来
+        return max(1, int(avg_duration / self.num_workers) + 1)
+
+    def _worker_loop(self):
+        while True:
+            with self._lock:
+                job = None
+                while not self._stopping:
+                    job = self.scheduler.next_job()
+                    if job is not None:
+                        break
+                    # 没有任务，或只剩长任务而空闲线程需留给短任务
+                    self._ready.wait(timeout=1)
+                if job is None:
+                    return
+                self._in_flight += 1
+
+            start_time = time.time()
+            try:
+                job.func(*job.args, **job.kwargs)
+            except Exception as e:
+                # 任务函数应自行记录失败状态，这里只防止工作线程退出
+                print(f"推理任务异常: {str(e)}")
+            finally:
+                duration = time.time() - start_time
+                with self._lock:
+                    self._in_flight -= 1
+                    self.scheduler.finish(job)
+                    self._recent_durations.append(duration)
+                    # 只保留最近的耗时记录
+                    del self._recent_durations[:-20]
+                    # 长任务结束后，被预留规则挡住的任务可以开始
+                    self._ready.notify_all()
@@ -0,0 +1,40 @@
+import os
+from contextlib import contextmanager
+
+# 可选的性能剖析方式：cprofile 记录 Python 函数调用，torch 记录算子级耗时
+PROFILERS = ("cprofile", "torch")
+PROFILE_EXTENSIONS = {"cprofile": ".prof", "torch": ".json"}
+
+
+def profile_path(directory, name, kind):
+    """剖析结果文件路径：cprofile 为 pstats 格式（.prof），torch 为 Chrome trace（.json）"""
+    return os.path.join(directory, f"{name}{PROFILE_EXTENSIONS[kind]}")
+
+
+@contextmanager
+def profile_to_file(kind, path):
+    """剖析 with 块并把结果写入 path
+
+    cProfile 只记录当前线程；torch.profiler 记录进程内的全部算子，
+    同时有其他任务在推理时结果中会混入它们的算子。
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if kind == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+    elif kind == "torch":
+        import torch
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+        with torch.profiler.profile(activities=activities) as profiler:
+            yield
+        profiler.export_chrome_trace(path)
+    else:
+        raise ValueError(f"不支持的剖析方式: {kind}")
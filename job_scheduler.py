@@ -0,0 +1,123 @@
+import itertools
+import math
+import time
+
+# 优先级类别及其排序（数值越小越先执行）
+PRIORITY_CLASSES = {"high": 0, "normal": 1, "low": 2}
+DEFAULT_PRIORITY = "normal"
+
+
+class Job:
+    """等待执行的任务
+
+    cost 为预计处理秒数（音频时长 × 实时率），client 为提交方标识，用于公平分配。
+    """
+
+    _ids = itertools.count()
+
+    def __init__(self, func, args=(), kwargs=None, cost=0.0, priority=DEFAULT_PRIORITY, client="", job_id=None):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.cost = max(0.0, float(cost))
+        self.priority = priority if priority in PRIORITY_CLASSES else DEFAULT_PRIORITY
+        self.client = client or ""
+        self.job_id = job_id
+        self.seq = next(Job._ids)  # 同分时按提交顺序
+        self.submitted_at = time.time()
+
+
+class FairShareScheduler:
+    """按优先级、预计耗时、等待时间和提交方用量挑选下一个任务
+
+    有效得分 = 类别序号 × class_span + 预计耗时 + 提交方近期用量 - aging × 已等待秒数，得分最低的先执行：
+    - 同一类别内预计耗时短的任务先执行（最短作业优先）；
+    - 等待越久得分越低，长任务不会一直被短任务插队（aging）；
+    - 提交方近期占用的处理时间越多，其任务排得越靠后，一个客户端的大文件不会挤占其他客户端；
+    - 运行中的长任务（预计耗时超过 long_job_seconds）最多占用 workers - reserved_workers 个线程，
+      至少留出 reserved_workers 个线程处理短任务，长任务运行期间短任务的延迟保持稳定。
+    调用方负责加锁。
+    """
+
+    def __init__(self, num_workers=1, class_span=600.0, aging=1.0, usage_half_life=300.0,
+                 long_job_seconds=120.0, reserved_workers=None):
+        self.num_workers = num_workers
+        self.class_span = class_span
+        self.aging = aging
+        self.usage_half_life = usage_half_life
+        self.long_job_seconds = long_job_seconds
+        if reserved_workers is None:
+            reserved_workers = 1 if num_workers > 1 else 0
+        self.reserved_workers = min(reserved_workers, num_workers - 1)
+        self._waiting = []
+        self._running = {}  # Job.seq -> Job
+        self._usage = {}  # client -> (用量秒数, 更新时间)
+
+    def __len__(self):
+        return len(self._waiting)
+
+    def add(self, job):
+        self._waiting.append(job)
+
+    def remove(self, job_id):
+        """移除尚未开始的任务，返回被移除的 Job，不存在时返回 None"""
+        for i, job in enumerate(self._waiting):
+            if job.job_id == job_id:
+                return self._waiting.pop(i)
+        return None
+
+    def clear(self):
+        self._waiting = []
+
+    def score(self, job, now=None):
+        now = now or time.time()
+        return (PRIORITY_CLASSES[job.priority] * self.class_span
+                + job.cost
+                + self._client_usage(job.client, now)
+                - self.aging * (now - job.submitted_at))
+
+    def next_job(self):
+        """取出下一个应执行的任务并标记为运行中，没有可执行的任务时返回 None"""
+        if not self._waiting:
+            return None
+        now = time.time()
+        long_running = sum(1 for job in self._running.values() if self._is_long(job))
+        allow_long = long_running < self.num_workers - self.reserved_workers
+        candidates = [job for job in self._waiting if allow_long or not self._is_long(job)]
+        if not candidates:
+            return None
+        job = min(candidates, key=lambda j: (self.score(j, now), j.seq))
+        self._waiting.remove(job)
+        self._running[job.seq] = job
+        # 开始执行时就把预计耗时计入提交方用量，避免同一提交方的任务同时启动
+        self._add_usage(job.client, job.cost, now)
+        return job
+
+    def finish(self, job):
+        self._running.pop(job.seq, None)
+
+    def stats(self):
+        now = time.time()
+        by_class = {name: 0 for name in PRIORITY_CLASSES}
+        for job in self._waiting:
+            by_class[job.priority] += 1
+        return {
+            "waiting_by_priority": by_class,
+            "waiting_cost_seconds": round(sum(job.cost for job in self._waiting), 1),
+            "oldest_wait_seconds": round(max((now - job.submitted_at for job in self._waiting), default=0.0), 1),
+            "long_jobs_running": sum(1 for job in self._running.values() if self._is_long(job)),
+            "reserved_workers": self.reserved_workers
+        }
+
+    def _is_long(self, job):
+        return self.reserved_workers > 0 and job.cost > self.long_job_seconds
+
+    def _client_usage(self, client, now):
+        usage, updated = self._usage.get(client, (0.0, now))
+        return usage * math.pow(0.5, (now - updated) / self.usage_half_life)
+
+    def _add_usage(self, client, cost, now):
+        self._usage[client] = (self._client_usage(client, now) + cost, now)
+        # 清理已衰减到可以忽略的记录
+        if len(self._usage) > 1000:
+            self._usage = {c: v for c, v in self._usage.items() if self._client_usage(c, now) > 1.0}
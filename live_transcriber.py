@@ -0,0 +1,157 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from audio_ingest import SAMPLE_RATE, AudioIngestError, stream_audio_pcm
+from ffmpeg_toolchain import ffmpeg_command, FFmpegNotFoundError
+from long_audio import shift_segment
+from transcriber import LANGUAGE, INITIAL_PROMPT, transcribe_options
+
+PROMPT_CHARS = 200  # 作为上下文提示的已提交文本长度
+
+
+class LiveTranscriber:
+    """滑动窗口实时转写
+
+    音频不断追加到未提交缓冲区，每累积 step_seconds 新音频就对整个缓冲区转写一次。
+    结束时间早于缓冲区末尾 holdback_seconds 的分段视为稳定，提交后从缓冲区中移除；
+    靠近末尾的分段可能还会随后续音频变化，留到下一次再判断。
+    缓冲区达到 window_seconds 时强制提交，因此文本延迟不超过一个窗口。
+    """
+
+    def __init__(self, transcribe_func, sample_rate=SAMPLE_RATE, window_seconds=30, step_seconds=5,
+                 holdback_seconds=2):
+        # transcribe_func(audio, prompt) 返回与 model.transcribe() 结构相同的结果
+        self.transcribe_func = transcribe_func
+        self.sample_rate = sample_rate
+        self.window_seconds = window_seconds
+        self.step_samples = int(step_seconds * sample_rate)
+        self.holdback_seconds = holdback_seconds
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0.0  # 缓冲区起点在整个音频流中的时间
+        self._pending = 0  # 上次转写之后新到的采样点数
+        self.segments = []  # 已提交的分段
+
+    @property
+    def text(self):
+        return "".join(segment["text"] for segment in self.segments)
+
+    def feed(self, audio):
+        """追加音频，返回本次新提交的分段列表"""
+        self._buffer = np.concatenate((self._buffer, audio))
+        self._pending += len(audio)
+        if self._pending < self.step_samples:
+            return []
+        return self._step(final=False)
+
+    def finish(self):
+        """输入结束：转写剩余音频并提交全部分段"""
+        if len(self._buffer) == 0:
+            return []
+        return self._step(final=True)
+
+    def _step(self, final):
+        self._pending = 0
+        prompt = self.text[-PROMPT_CHARS:] or None
+        result = self.transcribe_func(self._buffer, prompt)
+        segments = [shift_segment(segment, self._buffer_start) for segment in result.get("segments", [])
+                    if segment.get("text", "").strip()]
+        buffer_end = self._buffer_start + len(self._buffer) / self.sample_rate
+
+        if final:
+            commit, cut = segments, buffer_end
+        else:
+            # 只提交远离缓冲区末尾的连续分段
+            commit = []
+            for segment in segments:
+                if segment["end"] > buffer_end - self.holdback_seconds:
+                    break
+                commit.append(segment)
+            cut = commit[-1]["end"] if commit else None
+
+            if buffer_end - self._buffer_start >= self.window_seconds:
+                # 窗口已满：除最后一个分段外全部提交，没有分段时丢弃静音
+                if not commit:
+                    commit = segments[:-1] or segments
+                cut = commit[-1]["end"] if commit else buffer_end - self.holdback_seconds
+
+        committed = []
+        for segment in commit:
+            committed.append({
+                "id": len(self.segments),
+                "start": segment["start"],
+                "end": segment["end"],
+                "text": segment["text"]
+            })
+            self.segments.append(committed[-1])
+
+        if cut is not None:
+            cut = min(max(cut, self._buffer_start), buffer_end)
+            drop = int(round((cut - self._buffer_start) * self.sample_rate))
+            self._buffer = self._buffer[drop:]
+            self._buffer_start += drop / self.sample_rate
+        return committed
+
+
+def add_live_arguments(parser):
+    parser.add_argument('--follow', action='store_true',
+                        help='持续读取仍在写入的文件 (仅在live模式下有效)')
+    parser.add_argument('--window', type=float, default=30,
+                        help='实时转写的最长窗口秒数 (仅在live模式下有效)')
+    parser.add_argument('--step', type=float, default=5,
+                        help='每累积多少秒新音频转写一次 (仅在live模式下有效)')
+
+
+def run_live_cli(args):
+    """命令行实时转写入口：从管道、标准输入或仍在写入的文件读取音频，逐段输出已确定的文本"""
+    from env_probe import cuda_available
+    from model_precision import load_model, resolve_precision
+
+    source = args.input[0] if args.input else "-"
+    try:
+        ffmpeg_cmd = ffmpeg_command(args.ffmpeg)
+    except FFmpegNotFoundError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    device = "cuda" if cuda_available() else "cpu"
+    precision = resolve_precision(device, args.precision)
+    model = load_model(args.model, device, precision)
+    fp16 = precision == "fp16"
+    live = LiveTranscriber(
+        lambda audio, prompt: model.transcribe(
+            audio,
+            language=LANGUAGE,
+            **dict(transcribe_options(fp16=fp16), initial_prompt=prompt or INITIAL_PROMPT,
+                      word_timestamps=False)
+        ),
+        window_seconds=args.window,
+        step_seconds=args.step
+    )
+
+    os.makedirs(args.output, exist_ok=True)
+    name = "stdin" if source == "-" else Path(source).stem
+    txt_path = os.path.join(args.output, f"{name}_live_{time.strftime('%H%M%S')}.txt")
+    print(f"开始实时转写: {'标准输入' if source == '-' else source}", file=sys.stderr)
+    print(f"输出文件: {txt_path}", file=sys.stderr)
+
+    with open(txt_path, 'w', encoding='utf-8') as f:
+        def emit(segments):
+            for segment in segments:
+                print(f"[{segment['start']:.2f} - {segment['end']:.2f}] {segment['text'].strip()}", flush=True)
+                f.write(segment["text"].strip() + "\n")
+            f.flush()
+
+        status = 0
+        try:
+            for audio in stream_audio_pcm(source, ffmpeg_cmd, follow=args.follow):
+                emit(live.feed(audio))
+        except KeyboardInterrupt:
+            pass
+        except AudioIngestError as e:
+            print(f"读取音频失败: {str(e)}", file=sys.stderr)
+            status = 1
+        emit(live.finish())
+    return status
@@ -0,0 +1,231 @@
+import multiprocessing
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from audio_ingest import SAMPLE_RATE, load_audio_pcm, audio_duration
+from model_precision import prepare_model
+from parallel_batch import init_worker, get_worker_model
+from transcriber import LANGUAGE, transcribe_options, format_transcript
+from vad import FRAME_SECONDS, frame_energy, compress_silence, restore_timestamps, transcribe_with_vad
+
+SMOOTH_SECONDS = 0.3  # 能量平滑窗口，优先选择较长的静音
+
+
+def find_split_points(audio, sample_rate=SAMPLE_RATE, chunk_seconds=300, search_seconds=15):
+    """在每个目标切分点附近寻找能量最低处，返回切分位置（采样点）列表"""
+    total_seconds = len(audio) / sample_rate
+    if total_seconds <= chunk_seconds * 1.5:
+        return []
+
+    energy = frame_energy(audio, sample_rate)
+    smooth = max(1, int(SMOOTH_SECONDS / FRAME_SECONDS))
+    energy = np.convolve(energy, np.ones(smooth) / smooth, mode="same")
+    frame = int(sample_rate * FRAME_SECONDS)
+    search = int(search_seconds / FRAME_SECONDS)
+
+    points = []
+    target = chunk_seconds
+    while target < total_seconds - chunk_seconds / 2:
+        center = int(target / FRAME_SECONDS)
+        lo = max(0, center - search)
+        hi = min(len(energy), center + search + 1)
+        best = lo + int(np.argmin(energy[lo:hi]))
+        points.append(best * frame)
+        target = best * FRAME_SECONDS + chunk_seconds
+    return points
+
+
+def split_audio(audio, sample_rate=SAMPLE_RATE, chunk_seconds=300, overlap_seconds=1.0):
+    """按静音处切分音频
+
+    返回 (起点, 终点, 带重叠的起点, 带重叠的终点) 采样点列表。
+    每块转写时会多带 overlap_seconds 的上下文，拼接时只保留落在 [起点, 终点) 内的分段。
+    """
+    bounds = [0] + find_split_points(audio, sample_rate, chunk_seconds) + [len(audio)]
+    overlap = int(overlap_seconds * sample_rate)
+    chunks = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        chunks.append((start, end, max(0, start - overlap), min(len(audio), end + overlap)))
+    return chunks
+
+
+def _transcribe_chunk(args):
+    """在工作进程中转写一块音频，时间戳换算为全局时间"""
+    index, audio, offset_seconds, keep_start, keep_end, fp16 = args
+    result = get_worker_model().transcribe(audio, language=LANGUAGE, **transcribe_options(fp16=fp16))
+    segments = []
+    for segment in result.get("segments", []):
+        segment = shift_segment(segment, offset_seconds)
+        # 以分段中点判断归属，去掉重叠区域中的重复分段
+        middle = (segment["start"] + segment["end"]) / 2
+        if keep_start <= middle < keep_end:
+            segments.append(segment)
+    return index, segments
+
+
+def shift_segment(segment, offset_seconds):
+    """返回时间戳整体平移 offset_seconds 后的分段副本"""
+    segment = dict(segment)
+    segment["start"] += offset_seconds
+    segment["end"] += offset_seconds
+    if "words" in segment:
+        segment["words"] = [dict(word, start=word["start"] + offset_seconds,
+                                 end=word["end"] + offset_seconds)
+                            for word in segment["words"]]
+    return segment
+
+
+def stitch_segments(chunk_segments):
+    """按块顺序拼接分段，重新编号并生成全文"""
+    segments = []
+    for chunk in chunk_segments:
+        for segment in chunk:
+            segment = dict(segment, id=len(segments))
+            segments.append(segment)
+    text = "".join(segment.get("text", "") for segment in segments)
+    return {"text": text, "segments": segments, "language": LANGUAGE}
+
+
+def transcribe_incremental(transcribe_func, audio, sample_rate=SAMPLE_RATE, chunk_seconds=30,
+                           use_vad=True, on_segment=None, on_progress=None, cancel_token=None):
+    """在静音处切块后逐块转写，每块完成后立即回调其中的分段
+
+    transcribe_func(audio, prompt) 转写一块音频，prompt 为前一块的文本（用于衔接上下文，可忽略）。
+    on_segment(segment) 收到的时间戳已换算为原始音频时间；on_progress(已处理秒数, 总秒数)。
+    每块开始前检查 cancel_token，已取消时抛出 CancelledError。
+    返回 (与 model.transcribe() 结构相同的结果, VAD统计信息)。
+    """
+    if use_vad:
+        speech, time_map, vad_stats = compress_silence(audio, sample_rate)
+    else:
+        speech, time_map, vad_stats = audio, None, None
+
+    total_seconds = len(audio) / sample_rate
+    if len(speech) == 0:
+        # 输入为空
+        return {"text": "", "segments": [], "language": LANGUAGE}, vad_stats
+
+    chunk_segments = []
+    count = 0
+    prompt = None
+    for start, end, _, _ in split_audio(speech, sample_rate, chunk_seconds, overlap_seconds=0):
+        if cancel_token is not None:
+            cancel_token.check()
+        result = transcribe_func(speech[start:end], prompt)
+        segments = []
+        for segment in result.get("segments", []):
+            segments.append(dict(shift_segment(segment, start / sample_rate), id=count))
+            count += 1
+        if time_map is not None:
+            restore_timestamps({"segments": segments}, time_map)
+        chunk_segments.append(segments)
+        if on_segment:
+            for segment in segments:
+                on_segment(segment)
+        prompt = result.get("text", "").strip() or prompt
+        if on_progress:
+            processed = time_map.to_original(end / sample_rate) if time_map is not None else end / sample_rate
+            on_progress(processed, total_seconds)
+
+    return stitch_segments(chunk_segments), vad_stats
+
+
+class LongAudioTranscriber:
+    """长音频分块并行转写
+
+    在静音处把一个长文件切成若干块，用多个进程（各自加载模型）同时转写，
+    再按顺序拼接分段并修正全局时间戳。目标是缩短单个大文件的等待时间。
+    """
+
+    def __init__(self, model_size="base", num_workers=None, threads_per_worker=None,
+                 chunk_seconds=300, overlap_seconds=1.0, precision="fp32"):
+        cpu_count = os.cpu_count() or 1
+        self.model_size = model_size
+        self.precision = precision
+        self.num_workers = num_workers or max(1, cpu_count // 4)
+        self.threads_per_worker = threads_per_worker or max(1, cpu_count // self.num_workers)
+        self.chunk_seconds = chunk_seconds
+        self.overlap_seconds = overlap_seconds
+        self._pool = None
+
+    def transcribe(self, audio, sample_rate=SAMPLE_RATE, on_progress=None, cancel_token=None):
+        """转写整段音频，返回与 model.transcribe() 相同结构的结果
+
+        等待各块结果时定期检查 cancel_token，已取消时抛出 CancelledError，由调用方 close() 终止工作进程。
+        """
+        chunks = split_audio(audio, sample_rate, self.chunk_seconds, self.overlap_seconds)
+        jobs = [
+            (i, audio[pad_start:pad_end], pad_start / sample_rate,
+             start / sample_rate, end / sample_rate, False)
+            for i, (start, end, pad_start, pad_end) in enumerate(chunks)
+        ]
+
+        chunk_segments = [None] * len(jobs)
+        done = 0
+        results = self._get_pool().imap_unordered(_transcribe_chunk, jobs, chunksize=1)
+        while done < len(jobs):
+            if cancel_token is not None:
+                cancel_token.check()
+            try:
+                index, segments = results.next(timeout=0.5)
+            except multiprocessing.TimeoutError:
+                continue
+            chunk_segments[index] = segments
+            done += 1
+            if on_progress:
+                on_progress(done, len(jobs))
+        return stitch_segments(chunk_segments)
+
+    def close(self):
+        """终止工作进程"""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def _get_pool(self):
+        # 进程池在多个文件之间复用，避免重复加载模型
+        if self._pool is None:
+            prepare_model(self.model_size, self.precision)
+            ctx = multiprocessing.get_context("spawn")
+            self._pool = ctx.Pool(
+                processes=self.num_workers,
+                initializer=init_worker,
+                initargs=(self.model_size, self.threads_per_worker, "ffmpeg", True, self.precision)
+            )
+        return self._pool
+
+
+def run_long_files(video_files, output_folder, transcriber, ffmpeg_cmd="ffmpeg", on_log=print, use_vad=True):
+    """逐个文件分块并行转写（命令行 --split-long），返回失败的文件数"""
+    failed = 0
+    try:
+        for video_path in video_files:
+            video_name = Path(video_path).stem
+            start_time = time.time()
+            try:
+                audio = load_audio_pcm(video_path, ffmpeg_cmd)
+                on_log(f"正在处理: {video_name} (音频时长: {audio_duration(audio):.1f}秒)")
+                result, vad_stats = transcribe_with_vad(
+                    lambda speech: transcriber.transcribe(
+                        speech,
+                        on_progress=lambda done, total: on_log(f"分块转写进度: {done}/{total}")
+                    ),
+                    audio,
+                    enabled=use_vad
+                )
+                if vad_stats:
+                    on_log(f"语音占比: {vad_stats['speech_ratio']:.0%}, 跳过静音: {vad_stats['skipped_seconds']:.1f}秒")
+                txt_path = os.path.join(output_folder, f"{video_name}_{time.strftime('%H%M%S')}.txt")
+                with open(txt_path, 'w', encoding='utf-8') as f:
+                    f.write(format_transcript(result))
+                on_log(f"完成: {video_name} (耗时: {time.time() - start_time:.2f}秒)")
+            except Exception as e:
+                failed += 1
+                on_log(f"处理失败 {video_name}: {str(e)}")
+    finally:
+        transcriber.close()
+    return failed
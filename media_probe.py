@@ -0,0 +1,156 @@
+import json
+import os
+import re
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ffmpeg_toolchain import resolve_toolchain
+
+MAX_ENTRIES = 50000  # 时长缓存最多保存的文件数
+
+
+def default_duration_cache_path():
+    """时长缓存文件：~/.videototext/durations.json"""
+    return os.path.join(os.path.expanduser("~"), ".videototext", "durations.json")
+
+
+class DurationCache:
+    """媒体时长的持久缓存，以 (路径, 大小, 修改时间) 为键
+
+    文件被修改或替换后大小或修改时间会变化，旧记录自然失效。
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_duration_cache_path()
+        self._entries = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def get(self, file_path, size, mtime):
+        with self._lock:
+            entry = self._load_locked().get(os.path.abspath(file_path))
+        if entry is not None and entry[0] == size and entry[1] == mtime:
+            return entry[2]
+        return None
+
+    def put(self, file_path, size, mtime, duration):
+        with self._lock:
+            entries = self._load_locked()
+            key = os.path.abspath(file_path)
+            entries.pop(key, None)  # 重新插入到末尾，超出上限时先删除最早的记录
+            entries[key] = [size, mtime, duration]
+            while len(entries) > MAX_ENTRIES:
+                del entries[next(iter(entries))]
+            self._dirty = True
+
+    def save(self):
+        """把新增的记录写入磁盘"""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+    def _load_locked(self):
+        if self._entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+
+def probe_duration(file_path, ffprobe_cmd=None, ffmpeg_cmd="ffmpeg", timeout=30):
+    """读取媒体时长（秒），失败时返回 None
+
+    优先使用 ffprobe；没有 ffprobe 时从 ffmpeg -i 的输出中解析 Duration。
+    """
+    try:
+        if ffprobe_cmd:
+            result = subprocess.run(
+                [ffprobe_cmd, '-v', 'error', '-show_entries', 'format=duration',
+                 '-of', 'default=noprint_wrappers=1:nokey=1', file_path],
+                capture_output=True, text=True, encoding='utf-8', errors='ignore', timeout=timeout
+            )
+            return float(result.stdout.strip())
+
+        result = subprocess.run(
+            [ffmpeg_cmd, '-hide_banner', '-nostdin', '-i', file_path],
+            capture_output=True, text=True, encoding='utf-8', errors='ignore', timeout=timeout
+        )
+        match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", result.stderr)
+        if not match:
+            return None
+        hours, minutes, seconds = match.groups()
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        return None
+
+
+class MediaProbeService:
+    """在后台线程池中并发读取文件大小和时长
+
+    命中时长缓存的文件不启动 ffprobe；每个文件完成后调用 on_result(序号, 字节数, 时长)，
+    时长未知时为 None。回调在工作线程中执行。
+    """
+
+    def __init__(self, max_workers=None, cache=None, ffmpeg_path=None):
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.cache = cache if cache is not None else DurationCache()
+        self.ffmpeg_path = ffmpeg_path
+        self._executor = None
+        self._futures = []
+
+    def probe_many(self, files, on_result):
+        """提交全部文件，立即返回"""
+        toolchain = resolve_toolchain(self.ffmpeg_path)
+        ffprobe_cmd = toolchain["ffprobe"] if toolchain else None
+        ffmpeg_cmd = toolchain["ffmpeg"] if toolchain else "ffmpeg"
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="media-probe")
+        for index, file_path in enumerate(files):
+            self._futures.append(self._executor.submit(
+                self._probe_one, index, file_path, ffprobe_cmd, ffmpeg_cmd, on_result
+            ))
+
+    def _probe_one(self, index, file_path, ffprobe_cmd, ffmpeg_cmd, on_result):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            on_result(index, None, None)
+            return
+
+        duration = self.cache.get(file_path, stat.st_size, stat.st_mtime_ns)
+        if duration is None:
+            duration = probe_duration(file_path, ffprobe_cmd, ffmpeg_cmd)
+            if duration is not None:
+                self.cache.put(file_path, stat.st_size, stat.st_mtime_ns, duration)
+        on_result(index, stat.st_size, duration)
+
+    def close(self):
+        """取消尚未开始的探测，正在运行的探测结束后再保存缓存（不阻塞调用方）"""
+        for future in self._futures:
+            future.cancel()
+        self._futures = []
+        executor, self._executor = self._executor, None
+        if executor is None:
+            self.cache.save()
+            return
+
+        def save_when_done():
+            executor.shutdown(wait=True)
+            self.cache.save()
+
+        # 非守护线程：程序退出前也会等到正在运行的探测结束并写入结果
+        threading.Thread(target=save_when_done, name="media-probe-save").start()
@@ -0,0 +1,94 @@
+import os
+import threading
+
+from audio_ingest import SAMPLE_RATE
+from batch_inference import WINDOW_SECONDS
+from transcriber import LANGUAGE
+
+_compile_lock = threading.Lock()
+_cache_dir_configured = False
+
+
+def default_compile_cache_dir():
+    """编译产物缓存目录：~/.videototext/compile"""
+    return os.path.join(os.path.expanduser("~"), ".videototext", "compile")
+
+
+def configure_cache_dir(cache_dir=None):
+    """设置 inductor 编译产物缓存目录（每个进程只设置一次）
+
+    TORCHINDUCTOR_CACHE_DIR 是进程级设置，inductor 在编译或重新编译时才读取，
+    中途修改会让仍在编译的图写到别的目录，因此所有模型共用一个目录。
+    inductor 按计算图内容为产物建索引，不同模型的产物不会冲突。
+    已通过环境变量指定时保持不变。返回实际使用的目录。
+    """
+    global _cache_dir_configured
+    with _compile_lock:
+        if not _cache_dir_configured:
+            os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", cache_dir or default_compile_cache_dir())
+            _cache_dir_configured = True
+        return os.environ["TORCHINDUCTOR_CACHE_DIR"]
+
+
+def compile_supported():
+    """当前 torch 是否提供 torch.compile（2.0 及以上）"""
+    import torch
+    return hasattr(torch, "compile")
+
+
+def _compile_targets(model):
+    """返回 [(父模块, 属性名)]：编码器整体，以及解码器各层的 MLP
+
+    编码器输入固定为30秒窗口，形状不变，最适合编译。解码器的注意力层依赖
+    whisper 每次解码时临时注册的 kv-cache 钩子，编译后钩子不会生效，因此保持 eager。
+    """
+    targets = [(model, "encoder")]
+    for block in model.decoder.blocks:
+        targets.append((block, "mlp"))
+    return targets
+
+
+def warm_up(model, seconds=WINDOW_SECONDS):
+    """用一段低噪声音频完整跑一遍转写，触发编译并预热内存分配"""
+    import numpy as np
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal(int(seconds * SAMPLE_RATE)) * 1e-3).astype(np.float32)
+    fp16 = model.device.type == "cuda"
+    model.transcribe(audio, fp16=fp16, language=LANGUAGE, temperature=0.0, condition_on_previous_text=False)
+
+
+def compile_model(model, model_size, runner=None, cache_dir=None, log=print):
+    """编译模型的编码器和解码器 MLP 并立即预热，失败时恢复为 eager 模式
+
+    runner 为实际用于转写的对象（如 bf16 包装后的模型），预热通过它执行，
+    使编译出的图与之后推理时的精度设置一致。编译产物由 inductor 缓存在
+    cache_dir 中（见 configure_cache_dir），之后启动的进程直接读取，只需重新做一次较快的图捕获。
+    返回是否已编译。
+    """
+    import torch
+
+    if not compile_supported():
+        log("当前 torch 不支持 torch.compile，使用 eager 模式")
+        return False
+
+    configure_cache_dir(cache_dir)
+    targets = _compile_targets(model)
+    originals = [getattr(parent, name) for parent, name in targets]
+    with _compile_lock:
+        try:
+            for (parent, name), module in zip(targets, originals):
+                dynamic = name != "encoder"  # 解码器的序列长度随生成变化
+                setattr(parent, name, torch.compile(module, dynamic=dynamic))
+            warm_up(runner or model)
+        except Exception as e:
+            for (parent, name), module in zip(targets, originals):
+                setattr(parent, name, module)
+            log(f"模型 {model_size} 编译失败，使用 eager 模式: {str(e)}")
+            return False
+    model.vtt_compiled = True
+    return True
+
+
+def is_compiled(model):
+    """模型是否已由 compile_model 成功编译并预热（bf16 包装后的模型同样适用）"""
+    return getattr(model, "vtt_compiled", False)
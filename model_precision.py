@@ -0,0 +1,155 @@
+import os
+import threading
+from contextlib import contextmanager
+
+from env_probe import probe_environment, package_version
+
+# CPU 上可选的精度模式（GPU 固定使用 fp16）
+CPU_PRECISIONS = ["fp32", "int8", "bf16"]
+PRECISION_LABELS = {
+    "fp32": "fp32 (标准)",
+    "int8": "int8 (动态量化，更快)",
+    "bf16": "bf16 (需CPU支持)",
+}
+
+_quantize_lock = threading.Lock()
+
+
+def default_model_cache_dir():
+    """量化模型缓存目录：~/.videototext/models"""
+    return os.path.join(os.path.expanduser("~"), ".videototext", "models")
+
+
+def cpu_bf16_supported():
+    """CPU 是否原生支持 bf16 运算（读取缓存的探测结果）"""
+    return probe_environment().get("cpu_bf16", False)
+
+
+def resolve_precision(device, requested=None):
+    """把请求的精度换算为实际使用的精度
+
+    GPU 上固定使用 fp16；CPU 上默认 fp32，请求 bf16 但 CPU 不支持时退回 fp32。
+    """
+    if device != "cpu":
+        return "fp16"
+    if requested == "bf16" and not cpu_bf16_supported():
+        return "fp32"
+    return requested if requested in CPU_PRECISIONS else "fp32"
+
+
+def precision_cache_options(options, precision):
+    """低精度模式的结果可能与 fp32 略有不同，缓存键中需要区分（fp32/fp16 沿用原有的键）"""
+    if precision in ("int8", "bf16"):
+        return dict(options, precision=precision)
+    return options
+
+
+class AutocastModel:
+    """在 CPU bf16 自动混合精度下运行的 Whisper 模型
+
+    权重保持 fp32，矩阵乘法和卷积在 autocast 下以 bf16 计算；
+    其他属性（dims、device 等）直接转发给原模型。
+    """
+
+    def __init__(self, model):
+        self.model = model
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def transcribe(self, audio, **options):
+        with bf16_autocast():
+            return self.model.transcribe(audio, **options)
+
+    def decode(self, mel, options):
+        with bf16_autocast():
+            return self.model.decode(mel, options)
+
+
+@contextmanager
+def bf16_autocast():
+    import torch
+    with torch.no_grad(), torch.autocast("cpu", dtype=torch.bfloat16):
+        yield
+
+
+def quantized_model_path(model_size, cache_dir=None):
+    """量化模型的缓存文件，torch 或 whisper 升级后使用新文件"""
+    torch_version = package_version("torch") or "unknown"
+    whisper_version = package_version("openai-whisper") or "unknown"
+    name = f"{model_size}-int8-torch{torch_version}-whisper{whisper_version}.pt"
+    return os.path.join(cache_dir or default_model_cache_dir(), name.replace("+", "_"))
+
+
+def _plain_linear_layers(module):
+    """把 whisper 自定义的 Linear 子类换成 nn.Linear，quantize_dynamic 只识别精确类型"""
+    import torch
+
+    for name, child in module.named_children():
+        if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+            plain = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+            plain.weight = child.weight
+            plain.bias = child.bias
+            setattr(module, name, plain)
+        else:
+            _plain_linear_layers(child)
+
+
+def quantize_model(model):
+    """对全部 Linear 层做 int8 动态量化（权重量化，激活在运行时量化）"""
+    import torch
+
+    _plain_linear_layers(model)
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_quantized_model(model_size, cache_dir=None):
+    """加载 int8 量化模型，首次量化后保存到缓存目录，之后直接读取"""
+    import torch
+    import whisper
+
+    path = quantized_model_path(model_size, cache_dir)
+    with _quantize_lock:
+        if os.path.exists(path):
+            try:
+                model = torch.load(path, map_location="cpu", weights_only=False)
+                model.eval()
+                return model
+            except Exception:
+                # 缓存文件损坏时重新量化
+                os.remove(path)
+
+        model = quantize_model(whisper.load_model(model_size, device="cpu"))
+        model.eval()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            torch.save(model, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+        return model
+
+
+def prepare_model(model_size, precision):
+    """在启动工作进程前生成量化缓存，避免每个进程各自量化一次"""
+    if precision == "int8" and not os.path.exists(quantized_model_path(model_size)):
+        load_quantized_model(model_size)
+
+
+def load_model(model_size, device="cpu", precision="fp32", compiled=False):
+    """按设备和精度加载 Whisper 模型，compiled=True 时用 torch.compile 编译并预热"""
+    if device == "cpu" and precision == "int8":
+        model = runner = load_quantized_model(model_size)
+    else:
+        import whisper
+        model = runner = whisper.load_model(model_size, device=device)
+        if precision == "fp16" and device != "cpu":
+            model = runner = model.half()
+        elif device == "cpu" and precision == "bf16":
+            runner = AutocastModel(model)
+
+    if compiled:
+        from model_compile import compile_model
+        compile_model(model, model_size, runner=runner)
+    return runner
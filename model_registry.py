@@ -0,0 +1,263 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# 各模型参数量（百万），用于估算占用内存
+MODEL_PARAMS_M = {
+    "tiny": 39, "tiny.en": 39,
+    "base": 74, "base.en": 74,
+    "small": 244, "small.en": 244,
+    "medium": 769, "medium.en": 769,
+    "large": 1550, "large-v1": 1550, "large-v2": 1550, "large-v3": 1550,
+    "turbo": 809, "large-v3-turbo": 809,
+}
+
+# 每个参数占用的字节数
+PRECISION_BYTES = {
+    "fp32": 4,
+    "fp16": 2,
+    "bf16": 4,  # autocast 只改变计算精度，权重仍为 fp32
+    "int8": 1.5,  # Linear 层量化为 int8，嵌入层和卷积层仍为 fp32
+}
+
+
+def estimate_model_memory_mb(model_size, precision="fp32"):
+    """估算模型加载后占用的内存（MB）"""
+    params_m = MODEL_PARAMS_M.get(model_size, MODEL_PARAMS_M["large"])
+    bytes_per_param = PRECISION_BYTES.get(precision, 4)
+    # 额外留出 20% 给缓冲区和运行时开销
+    return params_m * bytes_per_param * 1.2
+
+
+def default_loader(model_size, device, precision):
+    """默认加载器：按精度加载 Whisper 模型（int8 量化模型读取本地缓存）"""
+    from model_precision import load_model
+    return load_model(model_size, device, precision)
+
+
+class _Entry:
+    def __init__(self, key, model, memory_mb):
+        self.key = key
+        self.model = model
+        self.memory_mb = memory_mb
+        self.last_used = time.time()
+        self.ref_count = 0
+        self.pinned = False  # 常驻模型不会被淘汰
+        self.lock = threading.Lock()  # 同一时刻只允许一个线程使用模型
+
+
+class ModelRegistry:
+    """多模型注册表
+
+    按 (模型大小, 设备, 精度) 缓存已加载的模型，按需加载。
+    超出数量或内存上限时按 LRU 淘汰空闲模型，闲置超时的模型也会被释放。
+    没有空闲模型可淘汰时，加载会等待在用的模型释放（最多 wait_timeout 秒）；
+    只剩常驻模型或等待超时时超限加载并打印警告。同一模型的并发加载只会真正执行一次。
+
+    每个模型只有一份，use() 期间独占使用：whisper 每次解码都会在解码器共享的 key/value
+    模块上注册 kv-cache 钩子，两个线程同时解码会互相写入对方的缓存。不同模型可以同时使用；
+    同一模型上的多个任务应按块（如每个30秒窗口）分别调用 use()，使它们交替执行。
+    """
+
+    def __init__(self, max_models=2, max_memory_mb=None, idle_timeout=600, loader=None, wait_timeout=120):
+        self.max_models = max(1, int(max_models))
+        self.max_memory_mb = max_memory_mb
+        self.idle_timeout = idle_timeout
+        self.wait_timeout = wait_timeout
+        self.loader = loader or default_loader
+        self._entries = OrderedDict()  # key -> _Entry，按最近使用排序
+        self._loading = {}  # key -> threading.Event，正在加载的模型
+        self._load_errors = {}
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)  # 有模型结束使用时通知等待腾出空间的加载
+        self._janitor = None
+
+    @staticmethod
+    def is_known_model(model_size):
+        return model_size in MODEL_PARAMS_M
+
+    @contextmanager
+    def use(self, model_size, device="cpu", precision="fp32"):
+        """获取模型的独占使用权，期间其他线程的 use() 会等待，模型也不会被淘汰"""
+        entry = self._acquire((model_size, device, precision))
+        try:
+            with entry.lock:
+                yield entry.model
+        finally:
+            with self._lock:
+                entry.ref_count -= 1
+                entry.last_used = time.time()
+                self._released.notify_all()
+
+    def pin(self, model_size, device="cpu", precision="fp32"):
+        """加载模型并设为常驻（不参与 LRU 和闲置淘汰）
+
+        不返回模型：使用模型（包括预热）需要通过 use() 取得独占使用权。
+        """
+        entry = self._acquire((model_size, device, precision))
+        with self._lock:
+            entry.pinned = True
+            entry.ref_count -= 1
+
+    def is_loaded(self, model_size=None, device=None, precision=None):
+        with self._lock:
+            for size, dev, prec in self._entries:
+                if ((model_size is None or size == model_size)
+                        and (device is None or dev == device)
+                        and (precision is None or prec == precision)):
+                    return True
+        return False
+
+    def loaded_models(self):
+        """返回已加载模型的信息，按最近使用排序"""
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    "model_size": entry.key[0],
+                    "device": entry.key[1],
+                    "precision": entry.key[2],
+                    "memory_mb": round(entry.memory_mb, 1),
+                    "in_use": entry.ref_count,
+                    "busy": entry.lock.locked(),
+                    "pinned": entry.pinned,
+                    "idle_seconds": round(now - entry.last_used, 1)
+                }
+                for entry in self._entries.values()
+            ]
+
+    def evict_idle(self):
+        """释放闲置超时的模型"""
+        if not self.idle_timeout:
+            return []
+        now = time.time()
+        with self._lock:
+            expired = [key for key, entry in self._entries.items()
+                       if entry.ref_count == 0 and not entry.pinned and now - entry.last_used > self.idle_timeout]
+            evicted = [self._entries.pop(key) for key in expired]
+        self._release(evicted)
+        return expired
+
+    def clear(self):
+        """释放所有空闲的非常驻模型"""
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry.ref_count == 0 and not entry.pinned]
+            evicted = [self._entries.pop(key) for key in keys]
+        self._release(evicted)
+
+    def _acquire(self, key):
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.ref_count += 1
+                    entry.last_used = time.time()
+                    self._entries.move_to_end(key)
+                    return entry
+
+                event = self._loading.get(key)
+                if event is None:
+                    # 由当前线程负责加载
+                    event = threading.Event()
+                    self._loading[key] = event
+                    self._load_errors.pop(key, None)
+                    is_loader = True
+                else:
+                    is_loader = False
+
+            if not is_loader:
+                # 等待其他线程加载完成后重新查找
+                event.wait()
+                with self._lock:
+                    error = self._load_errors.get(key)
+                if error is not None:
+                    raise error
+                continue
+
+            try:
+                entry = self._load(key)
+            except Exception as e:
+                with self._lock:
+                    self._load_errors[key] = e
+                    del self._loading[key]
+                event.set()
+                raise
+            with self._lock:
+                del self._loading[key]
+            event.set()
+            return entry
+
+    def _load(self, key):
+        model_size, device, precision = key
+        memory_mb = estimate_model_memory_mb(model_size, precision)
+
+        # 加载前先腾出空间，避免新旧模型同时占用内存
+        deadline = time.time() + self.wait_timeout
+        while True:
+            with self._lock:
+                evicted = self._make_room(memory_mb)
+                over = self._over_limit(memory_mb)
+                busy = any(entry.ref_count > 0 and not entry.pinned for entry in self._entries.values())
+                resident = [f"{size}/{dev}/{prec}" for size, dev, prec in self._entries]
+                remaining = deadline - time.time()
+                if over and busy and not evicted and remaining > 0:
+                    # 在用的模型结束使用后再尝试淘汰
+                    self._released.wait(remaining)
+                    continue
+            self._release(evicted)
+            if not over or not busy or remaining <= 0:
+                break
+        if over:
+            print(f"警告: 加载模型 {model_size}/{device}/{precision} 将超出上限"
+                  f"（最多 {self.max_models} 个模型，内存上限 {self.max_memory_mb} MB），"
+                  f"已加载的模型均在使用中或为常驻模型: {', '.join(resident)}")
+
+        model = self.loader(model_size, device, precision)
+        entry = _Entry(key, model, memory_mb)
+        entry.ref_count = 1
+        with self._lock:
+            self._entries[key] = entry
+        self._start_janitor()
+        return entry
+
+    def _over_limit(self, incoming_mb):
+        """再加载一个 incoming_mb 的模型是否会超出数量或内存上限（调用方持有锁）"""
+        if len(self._entries) + 1 > self.max_models:
+            return True
+        used_mb = sum(entry.memory_mb for entry in self._entries.values())
+        return self.max_memory_mb is not None and used_mb + incoming_mb > self.max_memory_mb
+
+    def _make_room(self, incoming_mb):
+        """按 LRU 顺序挑出需要淘汰的空闲模型（调用方持有锁）"""
+        evicted = []
+        for key in list(self._entries):
+            if not self._over_limit(incoming_mb):
+                break
+            if self._entries[key].ref_count == 0 and not self._entries[key].pinned:
+                evicted.append(self._entries.pop(key))
+        return evicted
+
+    def _release(self, entries):
+        if not entries:
+            return
+        uses_cuda = any(entry.key[1] != "cpu" for entry in entries)
+        for entry in entries:
+            entry.model = None
+        if uses_cuda:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+    def _start_janitor(self):
+        if not self.idle_timeout or (self._janitor and self._janitor.is_alive()):
+            return
+        self._janitor = threading.Thread(target=self._janitor_loop, name="model-janitor")
+        self._janitor.daemon = True
+        self._janitor.start()
+
+    def _janitor_loop(self):
+        interval = max(1, self.idle_timeout / 4)
+        while True:
+            time.sleep(interval)
+            self.evict_idle()
@@ -0,0 +1,319 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from queue import Queue, Empty
+
+from audio_ingest import load_audio_pcm
+from ffmpeg_toolchain import ffmpeg_command, FFmpegNotFoundError
+from model_precision import CPU_PRECISIONS, prepare_model, precision_cache_options, resolve_precision
+from result_cache import TranscriptionCache, default_cache_dir, hash_file, make_cache_key
+from transcriber import LANGUAGE, transcribe_options, format_transcript
+from vad import transcribe_with_vad
+
+VIDEO_EXTENSIONS = ['.mp4', '.avi', '.mov', '.wmv', '.flv', '.mkv', '.webm', '.m4v', '.3gp']
+
+# 工作进程内的模型（每个进程各自加载一次）
+_worker_model = None
+_worker_ffmpeg = "ffmpeg"
+_worker_error = None
+_worker_use_vad = True
+
+
+def default_worker_count():
+    """默认进程数：每个进程至少分到 4 个核心"""
+    return max(1, (os.cpu_count() or 1) // 4)
+
+
+def init_worker(model_size, threads, ffmpeg_cmd="ffmpeg", use_vad=True, precision="fp32"):
+    """工作进程初始化：固定 torch 线程数并按精度加载模型"""
+    global _worker_model, _worker_ffmpeg, _worker_error, _worker_use_vad
+    _worker_ffmpeg = ffmpeg_cmd
+    _worker_use_vad = use_vad
+    # 初始化失败时不能抛出异常，否则进程池会不断重启工作进程
+    try:
+        import torch
+        from model_precision import load_model
+
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # 已经开始并行计算后不能再设置
+            pass
+
+        import warnings
+        warnings.filterwarnings("ignore", message="Failed to launch Triton kernels")
+
+        _worker_model = load_model(model_size, device="cpu", precision=precision)
+    except Exception as e:
+        _worker_error = f"模型加载失败: {str(e)}"
+
+
+def get_worker_model():
+    """返回当前工作进程加载的模型，加载失败时抛出异常"""
+    if _worker_error is not None:
+        raise Exception(_worker_error)
+    return _worker_model
+
+
+def _transcribe_in_worker(video_path):
+    """在工作进程中解码并转写一个文件"""
+    start_time = time.time()
+    if _worker_error is not None:
+        return {"video_path": video_path, "text": None, "duration": 0.0, "error": _worker_error}
+    try:
+        audio = load_audio_pcm(video_path, _worker_ffmpeg)
+        result, vad_stats = transcribe_with_vad(
+            lambda speech: _worker_model.transcribe(speech, language=LANGUAGE, **transcribe_options(fp16=False)),
+            audio,
+            enabled=_worker_use_vad
+        )
+        return {"video_path": video_path, "text": format_transcript(result),
+                "duration": time.time() - start_time, "error": None, "vad": vad_stats}
+    except Exception as e:
+        return {"video_path": video_path, "text": None,
+                "duration": time.time() - start_time, "error": str(e)}
+
+
+class ParallelBatchEngine:
+    """CPU 多进程批量转写
+
+    启动 num_workers 个进程，每个进程加载自己的模型并固定 torch 线程数，
+    文件按大小从大到小动态分发，避免最后只剩一个大文件拖慢整批任务。
+    """
+
+    def __init__(self, model_size="base", num_workers=None, threads_per_worker=None,
+                 ffmpeg_cmd="ffmpeg", cache=None, use_vad=True, precision="fp32"):
+        self.model_size = model_size
+        self.precision = precision
+        self.use_vad = use_vad
+        self.num_workers = num_workers or default_worker_count()
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.num_workers)
+        self.ffmpeg_cmd = ffmpeg_cmd
+        self.cache = cache
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._prepared = False
+
+    def run(self, video_files, output_folder, on_log=print, on_progress=None, on_result=None,
+            should_stop=None):
+        """处理全部文件，返回每个文件的结果字典列表
+
+        哈希计算和缓存查询在后台线程中逐个进行，未命中的文件一算出缓存键就分发给工作进程，
+        不必等全部文件读完；命中缓存的文件不分发。
+        """
+        results = []
+        total = len(video_files)
+        done = 0
+        if not total:
+            return results
+
+        finished = Queue()
+        stop_event = threading.Event()
+        cache_keys = {}
+        # 大文件优先，减少尾部等待
+        ordered = sorted(video_files, key=_file_size, reverse=True)
+        feeder = threading.Thread(target=self._feed, args=(ordered, cache_keys, finished, stop_event, on_log),
+                                  name="batch-feeder", daemon=True)
+        feeder.start()
+        try:
+            while done < total:
+                if should_stop and should_stop():
+                    on_log("已停止，终止转写进程")
+                    break
+                try:
+                    result = finished.get(timeout=0.5)
+                except Empty:
+                    continue
+                if not result.get("cached"):
+                    result["cached"] = False
+                    if result["error"] is None and result["video_path"] in cache_keys:
+                        self.cache.put(cache_keys[result["video_path"]], {"text": result["text"]})
+                done += 1
+                self._finish(result, output_folder, on_log, on_result)
+                results.append(result)
+                if on_progress:
+                    on_progress(done, total)
+        finally:
+            stop_event.set()
+            self.stop()
+        return results
+
+    def _feed(self, video_files, cache_keys, finished, stop_event, on_log):
+        """在后台线程中逐个查询缓存：命中的文件直接完成，未命中的立即交给工作进程"""
+        for video_path in video_files:
+            if stop_event.is_set():
+                return
+            if self.cache is not None:
+                try:
+                    cache_keys[video_path] = make_cache_key(hash_file(video_path), self.model_size, LANGUAGE,
+                                                            self.cache_options())
+                    cached = self.cache.get(cache_keys[video_path])
+                except OSError:
+                    cached = None
+                if cached is not None:
+                    finished.put({"video_path": video_path, "text": cached["text"], "duration": 0.0,
+                                  "error": None, "cached": True})
+                    continue
+            try:
+                self._dispatch(video_path, len(video_files), finished, stop_event, on_log)
+            except Exception as e:
+                finished.put({"video_path": video_path, "text": None, "duration": 0.0, "error": str(e)})
+
+    def _dispatch(self, video_path, total, finished, stop_event, on_log):
+        # 第一个未命中的文件到来时才启动进程池，全部命中缓存时不加载模型
+        if not self._prepared:
+            prepare_model(self.model_size, self.precision)
+            self._prepared = True
+        with self._pool_lock:
+            if stop_event.is_set():
+                return
+            if self._pool is None:
+                workers = min(self.num_workers, total)
+                on_log(f"启动 {workers} 个转写进程，每个进程 {self.threads_per_worker} 个线程，精度 {self.precision}")
+                ctx = multiprocessing.get_context("spawn")
+                self._pool = ctx.Pool(
+                    processes=workers,
+                    initializer=init_worker,
+                    initargs=(self.model_size, self.threads_per_worker, self.ffmpeg_cmd, self.use_vad,
+                              self.precision)
+                )
+            self._pool.apply_async(
+                _transcribe_in_worker, (video_path,),
+                callback=finished.put,
+                error_callback=lambda e: finished.put({"video_path": video_path, "text": None,
+                                                       "duration": 0.0, "error": str(e)})
+            )
+
+    def cache_options(self):
+        """缓存键中的解码参数"""
+        return precision_cache_options(dict(transcribe_options(fp16=False), vad=self.use_vad), self.precision)
+
+    def stop(self):
+        """立即终止所有工作进程"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool.join()
+                self._pool = None
+
+    @staticmethod
+    def _finish(result, output_folder, on_log, on_result):
+        video_name = Path(result["video_path"]).stem
+        if result["error"] is None:
+            txt_filename = f"{video_name}_{time.strftime('%H%M%S')}.txt"
+            result["txt_path"] = os.path.join(output_folder, txt_filename)
+            with open(result["txt_path"], 'w', encoding='utf-8') as f:
+                f.write(result["text"])
+            source = "缓存" if result.get("cached") else f"耗时: {result['duration']:.2f}秒"
+            if result.get("vad"):
+                source += f", 跳过静音: {result['vad']['skipped_seconds']:.1f}秒"
+            on_log(f"完成: {video_name} ({source}, 文字数量: {len(result['text'])})")
+        else:
+            on_log(f"处理失败 {video_name}: {result['error']}")
+        if on_result:
+            on_result(result)
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def collect_video_files(inputs):
+    """展开命令行给出的文件和文件夹"""
+    video_files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, dirs, files in os.walk(item):
+                for file in files:
+                    if any(file.lower().endswith(ext) for ext in VIDEO_EXTENSIONS):
+                        video_files.append(os.path.join(root, file))
+        elif os.path.isfile(item):
+            video_files.append(item)
+    return video_files
+
+
+def add_batch_arguments(parser):
+    parser.add_argument('--input', nargs='+', default=[],
+                        help='待转换的视频文件或文件夹 (仅在batch模式下有效)')
+    parser.add_argument('--output', default='output',
+                        help='输出文件夹 (仅在batch模式下有效)')
+    parser.add_argument('--model', default='base',
+                        help='Whisper模型大小 (仅在batch模式下有效)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='转写进程数，默认按CPU核心数自动选择 (仅在batch模式下有效)')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='每个进程的torch线程数 (仅在batch模式下有效)')
+    parser.add_argument('--ffmpeg', default=None,
+                        help='ffmpeg可执行文件路径，默认自动查找 (仅在batch模式下有效)')
+    parser.add_argument('--split-long', action='store_true',
+                        help='把每个文件在静音处切块后用多个进程同时转写，适合少量长文件 (仅在batch模式下有效)')
+    parser.add_argument('--no-vad', action='store_true',
+                        help='不跳过静音，整段音频送入模型 (仅在batch模式下有效)')
+    parser.add_argument('--precision', choices=CPU_PRECISIONS, default='fp32',
+                        help='CPU推理精度: fp32, int8=Linear层动态量化, bf16=需CPU支持 (batch和live模式有效)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='不使用转写结果缓存 (仅在batch模式下有效)')
+
+
+def run_batch_cli(args):
+    """命令行批量转写入口，返回退出码"""
+    video_files = collect_video_files(args.input)
+    if not video_files:
+        print("没有找到视频文件")
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+
+    # 只解析一次ffmpeg，工作进程直接使用解析出的路径
+    try:
+        ffmpeg_cmd = ffmpeg_command(args.ffmpeg)
+    except FFmpegNotFoundError as e:
+        print(str(e))
+        return 1
+
+    if args.split_long:
+        from long_audio import LongAudioTranscriber, run_long_files
+        transcriber = LongAudioTranscriber(
+            model_size=args.model,
+            num_workers=args.workers,
+            threads_per_worker=args.threads,
+            precision=resolve_precision("cpu", args.precision)
+        )
+        start_time = time.time()
+        failed = run_long_files(video_files, args.output, transcriber, ffmpeg_cmd, use_vad=not args.no_vad)
+        print(f"所有文件处理完成！耗时: {time.time() - start_time:.2f}秒, 失败: {failed}个")
+        return 1 if failed else 0
+
+    engine = ParallelBatchEngine(
+        model_size=args.model,
+        num_workers=args.workers,
+        threads_per_worker=args.threads,
+        ffmpeg_cmd=ffmpeg_cmd,
+        cache=None if args.no_cache else TranscriptionCache(default_cache_dir()),
+        use_vad=not args.no_vad,
+        precision=resolve_precision("cpu", args.precision)
+    )
+    print(f"开始处理，共发现 {len(video_files)} 个视频文件")
+    start_time = time.time()
+    results = engine.run(
+        video_files,
+        args.output,
+        on_progress=lambda done, total: print(f"进度: {done}/{total}")
+    )
+    failed = sum(1 for result in results if result["error"] is not None)
+    print(f"所有文件处理完成！耗时: {time.time() - start_time:.2f}秒, 失败: {failed}个")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser(description='视频转文字工具 - 多进程批量转写')
+    add_batch_arguments(parser)
+    sys.exit(run_batch_cli(parser.parse_args()))
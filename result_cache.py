@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def default_cache_dir():
+    """GUI 使用的默认缓存目录（用户目录下）"""
+    return os.path.join(os.path.expanduser("~"), ".videototext", "cache")
+
+
+def hash_file(path, chunk_size=HASH_CHUNK_SIZE):
+    """分块计算文件的 SHA-256"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def hash_pcm(audio):
+    """计算解码后音频数组的 SHA-256"""
+    return hashlib.sha256(audio.tobytes()).hexdigest()
+
+
+def make_cache_key(media_hash, model_size, language, options=None):
+    """由 (媒体哈希, 模型, 语言, 解码参数) 生成缓存键"""
+    payload = json.dumps({
+        "media": media_hash,
+        "model": model_size,
+        "language": language,
+        "options": options or {}
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TranscriptionCache:
+    """按内容寻址的转写结果磁盘缓存
+
+    每个结果存为 <cache_dir>/<键前两位>/<键>.json。
+    超出容量时按最近访问时间淘汰，自写入起超过保存期限的条目视为未命中并删除。
+    文件的修改时间即写入时间（读取时不改动），访问时间（atime）在每次命中时更新，用于 LRU。
+    """
+
+    def __init__(self, cache_dir, max_size_mb=1024, max_age_days=30):
+        self.cache_dir = cache_dir
+        self.max_size = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+        self.max_age = max_age_days * 86400 if max_age_days else None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total_size = None  # 首次写入时扫描目录得到
+
+    def get(self, key):
+        """命中时返回缓存的结果字典，否则返回 None"""
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            result = entry["result"]
+            now = time.time()
+            if self.max_age and now - entry.get("created", stat.st_mtime) > self.max_age:
+                self._remove(path, stat.st_size)
+                raise FileNotFoundError(path)
+            # 只更新访问时间（用于 LRU 淘汰），保留修改时间作为写入时间
+            os.utime(path, (now, stat.st_mtime))
+        except (ValueError, KeyError, TypeError, AttributeError):
+            # 内容损坏或格式不对的条目直接删除
+            self._remove(path, stat.st_size)
+            with self._lock:
+                self.misses += 1
+            return None
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, key, result):
+        """写入结果（原子替换），必要时淘汰旧条目"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({"created": time.time(), "result": result}, ensure_ascii=False).encode("utf-8")
+
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._total_size is None:
+                self._total_size = self._scan_size()
+            else:
+                self._total_size += len(data) - old_size
+            over_limit = self.max_size is not None and self._total_size > self.max_size
+        if over_limit:
+            self.evict()
+
+    def evict(self):
+        """删除过期条目（按写入时间），并按最近访问时间淘汰直到低于容量上限"""
+        entries = []
+        now = time.time()
+        for path, stat in self._iter_entries():
+            if self.max_age and now - stat.st_mtime > self.max_age:
+                self._remove(path, stat.st_size)
+            else:
+                entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path))
+
+        if self.max_size is None:
+            return
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            self._remove(path, size)
+            total -= size
+        with self._lock:
+            self._total_size = total
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "size_mb": round((self._total_size or 0) / (1024 * 1024), 2)
+            }
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _iter_entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        yield path, os.stat(path)
+                    except OSError:
+                        continue
+
+    def _scan_size(self):
+        return sum(stat.st_size for _, stat in self._iter_entries())
+
+    def _remove(self, path, size):
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._total_size is not None:
+                self._total_size -= size
@@ -0,0 +1,114 @@
+import json
+import os
+import platform
+import threading
+import time
+
+EWMA_ALPHA = 0.3  # 新测量值的权重
+MIN_AUDIO_SECONDS = 5.0  # 太短的音频受固定开销影响大，不参与统计
+
+# 没有实测数据时使用的实时率（处理秒数 / 音频秒数）
+DEFAULT_RTF = {
+    ("cpu", "tiny"): 0.1,
+    ("cpu", "base"): 0.2,
+    ("cpu", "small"): 0.6,
+    ("cpu", "medium"): 1.8,
+    ("cpu", "large"): 4.0,
+    ("cuda", "tiny"): 0.02,
+    ("cuda", "base"): 0.03,
+    ("cuda", "small"): 0.06,
+    ("cuda", "medium"): 0.12,
+    ("cuda", "large"): 0.2,
+}
+FALLBACK_RTF = 1 / 3
+
+
+def default_rtf_path():
+    """实时率记录文件：~/.videototext/rtf.json"""
+    return os.path.join(os.path.expanduser("~"), ".videototext", "rtf.json")
+
+
+def host_name():
+    return platform.node() or "localhost"
+
+
+class RTFStore:
+    """按 (模型, 设备, 精度, 主机) 记录实测实时率并持久化
+
+    每个任务完成后用 record() 记录一次，取指数滑动平均，
+    estimate() 返回实测值，没有实测数据时返回内置的默认值。
+    """
+
+    def __init__(self, path=None, host=None):
+        self.path = path or default_rtf_path()
+        self.host = host or host_name()
+        self._factors = None
+        self._lock = threading.Lock()
+
+    def _key(self, model_size, device, precision):
+        return f"{model_size}|{device}|{precision}|{self.host}"
+
+    def record(self, model_size, device, precision, audio_seconds, processing_seconds):
+        """记录一次实测结果，返回更新后的实时率"""
+        if audio_seconds < MIN_AUDIO_SECONDS or processing_seconds <= 0:
+            return None
+        rtf = processing_seconds / audio_seconds
+        with self._lock:
+            factors = self._load_locked()
+            key = self._key(model_size, device, precision)
+            entry = factors.get(key)
+            if entry is None:
+                entry = {"rtf": rtf, "samples": 0}
+            else:
+                entry["rtf"] = EWMA_ALPHA * rtf + (1 - EWMA_ALPHA) * entry["rtf"]
+            entry["samples"] += 1
+            entry["updated"] = time.time()
+            factors[key] = entry
+            self._save(factors)
+            return entry["rtf"]
+
+    def estimate(self, model_size, device, precision):
+        """返回 (实时率, 是否为实测值)"""
+        with self._lock:
+            entry = self._load_locked().get(self._key(model_size, device, precision))
+        if entry is not None:
+            return entry["rtf"], True
+        return DEFAULT_RTF.get((device, model_size), FALLBACK_RTF), False
+
+    def eta(self, audio_seconds, model_size, device, precision):
+        """估算处理 audio_seconds 秒音频需要的秒数"""
+        rtf, _ = self.estimate(model_size, device, precision)
+        return audio_seconds * rtf
+
+    def stats(self):
+        """本机的全部实测实时率"""
+        suffix = f"|{self.host}"
+        with self._lock:
+            factors = self._load_locked()
+            return {key[:-len(suffix)]: {"rtf": round(entry["rtf"], 4), "samples": entry["samples"]}
+                    for key, entry in factors.items() if key.endswith(suffix)}
+
+    def _load_locked(self):
+        if self._factors is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._factors = json.load(f)
+            except (OSError, ValueError):
+                self._factors = {}
+        return self._factors
+
+    def _save(self, factors):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(factors, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+
+def format_eta(seconds):
+    """把秒数格式化为 “x小时y分钟z秒”"""
+    seconds = max(0, int(seconds))
+    return f"{seconds // 3600}小时{(seconds % 3600) // 60}分钟{seconds % 60}秒"
@@ -0,0 +1,154 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# 单个任务的处理阶段
+STAGES = ("spool", "decode", "mel", "encoder", "decoder", "alignment", "write")
+STAGE_LABELS = {
+    "spool": "上传落盘",
+    "decode": "音频解码",
+    "mel": "梅尔频谱",
+    "encoder": "编码器",
+    "decoder": "解码器",
+    "alignment": "词级对齐",
+    "write": "写出结果",
+    "other": "其他",
+}
+
+_local = threading.local()
+_patch_lock = threading.Lock()
+_whisper_patched = False
+
+
+class StageTimer:
+    """按阶段累计一个任务的耗时
+
+    阶段可以嵌套，耗时只计入最内层的阶段（例如转写中的编码器时间不再计入外层），
+    因此各阶段之和不超过总耗时。计时只对调用 activate() 的线程生效。
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self._stack = []  # [阶段名, 本段开始时间]
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def push(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            parent = self._stack[-1]
+            self.add(parent[0], now - parent[1])
+        self._stack.append([name, now])
+
+    def pop(self, name):
+        now = time.perf_counter()
+        # 前向计算抛出异常时对应的 pop 不会执行，这里一并清理
+        while self._stack:
+            current, start = self._stack.pop()
+            self.add(current, now - start)
+            if current == name:
+                break
+        if self._stack:
+            self._stack[-1][1] = now
+
+    def active(self, name):
+        return any(entry[0] == name for entry in self._stack)
+
+    @contextmanager
+    def stage(self, name):
+        self.push(name)
+        try:
+            yield
+        finally:
+            self.pop(name)
+
+    @contextmanager
+    def activate(self):
+        """在当前线程中启用计时，模型钩子和 whisper 内部函数的耗时计入此对象"""
+        previous = getattr(_local, "timer", None)
+        _local.timer = self
+        try:
+            yield self
+        finally:
+            _local.timer = previous
+
+    def breakdown(self, total=None):
+        """返回 {阶段: 秒数}；给出总耗时时，未归入任何阶段的部分计为 other"""
+        result = {name: round(self.stages[name], 3) for name in STAGES if name in self.stages}
+        for name, seconds in self.stages.items():
+            if name not in result:
+                result[name] = round(seconds, 3)
+        if total is not None:
+            result["other"] = round(max(total - sum(self.stages.values()), 0.0), 3)
+        return result
+
+
+def current_timer():
+    return getattr(_local, "timer", None)
+
+
+@contextmanager
+def track(name):
+    """当前线程启用了计时时记录 with 块的耗时，否则什么也不做"""
+    timer = current_timer()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+def format_breakdown(breakdown):
+    """格式化为 “音频解码 1.20秒 | 编码器 3.40秒 | ...”"""
+    return " | ".join(f"{STAGE_LABELS.get(name, name)} {seconds:.2f}秒" for name, seconds in breakdown.items())
+
+
+def _forward_hooks(name):
+    def pre_hook(module, args):
+        timer = current_timer()
+        # 词级对齐内部也会调用解码器，这部分计入对齐
+        if timer is not None and not timer.active("alignment"):
+            timer.push(name)
+
+    def post_hook(module, args, output):
+        timer = current_timer()
+        if timer is not None and timer.active(name):
+            timer.pop(name)
+
+    return pre_hook, post_hook
+
+
+def instrument_model(model):
+    """在模型的编码器和解码器上注册计时钩子（重复调用无副作用）"""
+    instrument_whisper()
+    for name in ("encoder", "decoder"):
+        module = getattr(model, name)
+        if getattr(module, "_vtt_timed", False):
+            continue
+        pre_hook, post_hook = _forward_hooks(name)
+        module.register_forward_pre_hook(pre_hook)
+        module.register_forward_hook(post_hook)
+        module._vtt_timed = True
+    return model
+
+
+def instrument_whisper():
+    """包装 whisper 转写流程中的梅尔频谱计算和词级对齐，使其耗时计入当前线程的计时器"""
+    global _whisper_patched
+    with _patch_lock:
+        if _whisper_patched:
+            return
+        import importlib
+        transcribe_module = importlib.import_module("whisper.transcribe")
+
+        def timed(name, func):
+            def wrapper(*args, **kwargs):
+                with track(name):
+                    return func(*args, **kwargs)
+            wrapper.__wrapped__ = func
+            return wrapper
+
+        transcribe_module.log_mel_spectrogram = timed("mel", transcribe_module.log_mel_spectrogram)
+        transcribe_module.add_word_timestamps = timed("alignment", transcribe_module.add_word_timestamps)
+        _whisper_patched = True
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import threading
+import time
+
+TERMINAL_EVENTS = ("completed", "failed", "cancelled")
+
+
+class _TaskChannel:
+    def __init__(self):
+        self.events = []  # [(序号, 事件类型, 数据)]
+        self.subscribers = []  # [(事件循环, asyncio.Queue)]
+        self.finished_at = None
+
+
+class TaskEventBroker:
+    """任务事件的发布与订阅
+
+    推理工作线程调用 publish() 发布进度和分段事件，
+    SSE 连接在事件循环中通过 subscribe() 得到一个 asyncio.Queue 接收后续事件。
+    每个任务保留全部历史事件，晚到或断线重连的客户端可以从指定序号之后补发。
+    任务结束后历史事件再保留 retention 秒，之后客户端改为查询任务状态。
+    """
+
+    def __init__(self, retention=300):
+        self.retention = retention
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def publish(self, task_id, event, data):
+        """发布一个事件（线程安全），返回事件序号"""
+        with self._lock:
+            self._purge_locked()
+            channel = self._channels.setdefault(task_id, _TaskChannel())
+            seq = len(channel.events) + 1
+            item = (seq, event, data)
+            channel.events.append(item)
+            if event in TERMINAL_EVENTS:
+                channel.finished_at = time.time()
+            subscribers = list(channel.subscribers)
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                # 事件循环已关闭，连接已经断开
+                pass
+        return seq
+
+    def subscribe(self, task_id, after=0):
+        """在事件循环中调用：返回 (序号大于 after 的历史事件, 接收后续事件的队列)
+
+        任务没有任何事件记录时返回 (None, None)。
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        with self._lock:
+            channel = self._channels.get(task_id)
+            if channel is None:
+                return None, None
+            history = [item for item in channel.events if item[0] > after]
+            channel.subscribers.append((loop, queue))
+        return history, queue
+
+    def unsubscribe(self, task_id, queue):
+        with self._lock:
+            channel = self._channels.get(task_id)
+            if channel is not None:
+                channel.subscribers = [(loop, q) for loop, q in channel.subscribers if q is not queue]
+
+    def has_events(self, task_id):
+        with self._lock:
+            return task_id in self._channels
+
+    def _purge_locked(self):
+        cutoff = time.time() - self.retention
+        expired = [task_id for task_id, channel in self._channels.items()
+                   if channel.finished_at is not None and channel.finished_at < cutoff
+                   and not channel.subscribers]
+        for task_id in expired:
+            del self._channels[task_id]
+
+
+def format_sse(seq, event, data):
+    """按 Server-Sent Events 格式编码一个事件"""
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"id: {seq}\nevent: {event}\ndata: {payload}\n\n"
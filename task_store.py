@@ -0,0 +1,244 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# 有独立列的字段，其余字段存入 extra（JSON）
+TASK_COLUMNS = (
+    "status", "error", "model_size", "file_size", "content_hash",
+    "file_path", "duration", "cached", "created_at", "started_at", "finished_at"
+)
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class TaskStore:
+    """任务存储接口
+
+    任务记录只保存状态、耗时和输出文件路径，不保存转写全文。
+    已结束的任务超过 ttl 秒后会被清理。
+    """
+
+    def __init__(self, ttl=7 * 86400, purge_interval=60):
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._last_purge = 0
+
+    def create(self, task_id, **fields):
+        raise NotImplementedError
+
+    def update(self, task_id, **fields):
+        raise NotImplementedError
+
+    def get(self, task_id):
+        """返回任务字典，不存在时返回 None"""
+        raise NotImplementedError
+
+    def count(self, status=None):
+        raise NotImplementedError
+
+    def purge(self, now=None):
+        """删除过期的已结束任务，返回删除数量"""
+        raise NotImplementedError
+
+    def fail_unfinished(self, error):
+        """把未结束的任务标记为失败（服务重启后调用）"""
+        raise NotImplementedError
+
+    def maybe_purge(self):
+        """距上次清理超过 purge_interval 时执行清理"""
+        now = time.time()
+        if self.ttl and now - self._last_purge >= self.purge_interval:
+            self._last_purge = now
+            self.purge(now)
+
+
+class MemoryTaskStore(TaskStore):
+    """进程内任务存储（重启后丢失，适合测试和单机临时使用）"""
+
+    def __init__(self, ttl=7 * 86400, purge_interval=60):
+        super().__init__(ttl, purge_interval)
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def create(self, task_id, **fields):
+        fields.setdefault("created_at", time.time())
+        with self._lock:
+            self._tasks[task_id] = dict(fields, task_id=task_id)
+        self.maybe_purge()
+
+    def update(self, task_id, **fields):
+        with self._lock:
+            if task_id in self._tasks:
+                self._tasks[task_id].update(fields)
+
+    def get(self, task_id):
+        with self._lock:
+            task = self._tasks.get(task_id)
+            return dict(task) if task is not None else None
+
+    def count(self, status=None):
+        with self._lock:
+            if status is None:
+                return len(self._tasks)
+            return sum(1 for task in self._tasks.values() if task.get("status") == status)
+
+    def purge(self, now=None):
+        if not self.ttl:
+            return 0
+        cutoff = (now or time.time()) - self.ttl
+        with self._lock:
+            expired = [task_id for task_id, task in self._tasks.items()
+                       if task.get("status") in FINISHED_STATUSES
+                       and task.get("finished_at", task.get("created_at", 0)) < cutoff]
+            for task_id in expired:
+                del self._tasks[task_id]
+        return len(expired)
+
+    def fail_unfinished(self, error):
+        with self._lock:
+            for task in self._tasks.values():
+                if task.get("status") not in FINISHED_STATUSES:
+                    task.update(status="failed", error=error, finished_at=time.time())
+
+
+class SQLiteTaskStore(TaskStore):
+    """基于 SQLite 的任务存储，按 task_id 主键查询，重启后任务状态仍然保留"""
+
+    def __init__(self, db_path, ttl=7 * 86400, purge_interval=60):
+        super().__init__(ttl, purge_interval)
+        self.db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # 调用方持有锁
+        if self._conn is None:
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    task_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    model_size TEXT,
+                    file_size INTEGER,
+                    content_hash TEXT,
+                    file_path TEXT,
+                    duration REAL,
+                    cached INTEGER DEFAULT 0,
+                    created_at REAL,
+                    started_at REAL,
+                    finished_at REAL,
+                    extra TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_finished_at ON tasks (finished_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def create(self, task_id, **fields):
+        fields.setdefault("created_at", time.time())
+        columns, extra = self._split(fields)
+        columns["task_id"] = task_id
+        columns["extra"] = json.dumps(extra, ensure_ascii=False) if extra else None
+        names = ", ".join(columns)
+        placeholders = ", ".join("?" for _ in columns)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(f"INSERT OR REPLACE INTO tasks ({names}) VALUES ({placeholders})",
+                         list(columns.values()))
+            conn.commit()
+        self.maybe_purge()
+
+    def update(self, task_id, **fields):
+        columns, extra = self._split(fields)
+        with self._lock:
+            conn = self._connect()
+            if extra:
+                row = conn.execute("SELECT extra FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+                if row is None:
+                    return
+                merged = json.loads(row["extra"]) if row["extra"] else {}
+                merged.update(extra)
+                columns["extra"] = json.dumps(merged, ensure_ascii=False)
+            if not columns:
+                return
+            assignments = ", ".join(f"{name} = ?" for name in columns)
+            conn.execute(f"UPDATE tasks SET {assignments} WHERE task_id = ?",
+                         list(columns.values()) + [task_id])
+            conn.commit()
+
+    def get(self, task_id):
+        with self._lock:
+            row = self._connect().execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        if row is None:
+            return None
+        task = dict(row)
+        extra = task.pop("extra")
+        if extra:
+            task.update(json.loads(extra))
+        task["cached"] = bool(task.get("cached"))
+        return task
+
+    def count(self, status=None):
+        with self._lock:
+            conn = self._connect()
+            if status is None:
+                row = conn.execute("SELECT COUNT(*) FROM tasks").fetchone()
+            else:
+                row = conn.execute("SELECT COUNT(*) FROM tasks WHERE status = ?", (status,)).fetchone()
+        return row[0]
+
+    def purge(self, now=None):
+        if not self.ttl:
+            return 0
+        cutoff = (now or time.time()) - self.ttl
+        placeholders = ", ".join("?" for _ in FINISHED_STATUSES)
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                f"DELETE FROM tasks WHERE status IN ({placeholders}) AND finished_at < ?",
+                list(FINISHED_STATUSES) + [cutoff]
+            )
+            conn.commit()
+        return cursor.rowcount
+
+    def fail_unfinished(self, error):
+        placeholders = ", ".join("?" for _ in FINISHED_STATUSES)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                f"UPDATE tasks SET status = 'failed', error = ?, finished_at = ? "
+                f"WHERE status NOT IN ({placeholders})",
+                [error, time.time()] + list(FINISHED_STATUSES)
+            )
+            conn.commit()
+
+    @staticmethod
+    def _split(fields):
+        columns = {}
+        extra = {}
+        for name, value in fields.items():
+            if name in TASK_COLUMNS:
+                columns[name] = int(value) if name == "cached" else value
+            else:
+                extra[name] = value
+        return columns, extra
+
+
+def create_task_store(url, ttl=7 * 86400):
+    """根据配置创建任务存储：memory:// 或 sqlite:///路径"""
+    if url.startswith("memory://"):
+        return MemoryTaskStore(ttl=ttl)
+    if url.startswith("sqlite:///"):
+        return SQLiteTaskStore(url[len("sqlite:///"):], ttl=ttl)
+    raise ValueError(f"不支持的任务存储: {url}")
@@ -1,5 +1,5 @@
 import requests
-import time
+import json
 import os
 
 
@@ -40,31 +40,45 @@ def test_api():
         print(f"上传失败: {e}")
         return
 
-    # 3. 轮询任务状态
+    # 3. 实时接收转写进度和分段
     print("\n3. 等待任务完成...")
-    while True:
-        try:
-            response = requests.get(f"{BASE_URL}/api/v1/tasks/{task_id}")
-            status_data = response.json()
-            print(f"任务状态: {status_data['status']}")
-            
-            if status_data["status"] == "completed":
+    try:
+        response = requests.get(f"{BASE_URL}/api/v1/tasks/{task_id}/stream", stream=True)
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+                continue
+            if not line.startswith("data: "):
+                continue
+            data = json.loads(line[len("data: "):])
+
+            if event == "status":
+                print(f"任务状态: {data['status']}")
+            elif event == "progress":
+                print(f"进度: {data['progress']:.0%}")
+            elif event == "segment":
+                print(f"[{data['start']:.2f} - {data['end']:.2f}] {data['text']}")
+            elif event == "completed":
                 print("\n转写结果:")
                 print("-" * 50)
-                print(status_data["text"])
+                print(data["text"])
                 print("-" * 50)
-                print(f"输出文件: {status_data['file_path']}")
-                print(f"处理时间: {status_data['duration']:.2f}秒")
+                print(f"处理时间: {data['duration']:.2f}秒")
                 break
-            elif status_data["status"] == "failed":
-                print(f"任务失败: {status_data['error']}")
+            elif event == "failed":
+                print(f"任务失败: {data['error']}")
                 break
-            
-            time.sleep(2)  # 每2秒检查一次
-            
-        except Exception as e:
-            print(f"查询状态失败: {e}")
-            break
+
+    except Exception as e:
+        print(f"接收进度失败: {e}")
+        return
+
+    # 4. 查询最终任务状态
+    response = requests.get(f"{BASE_URL}/api/v1/tasks/{task_id}")
+    status_data = response.json()
+    if status_data["status"] == "completed":
+        print(f"输出文件: {status_data['file_path']}")
 
 if __name__ == "__main__":
     test_api() 
\ No newline at end of file
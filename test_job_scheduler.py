@@ -0,0 +1,71 @@
+from job_scheduler import FairShareScheduler, Job
+
+
+def job(name, cost, priority="normal", client="", age=0.0):
+    j = Job(None, cost=cost, priority=priority, client=client, job_id=name)
+    j.submitted_at -= age
+    return j
+
+
+def drain(scheduler):
+    order = []
+    while True:
+        j = scheduler.next_job()
+        if j is None:
+            return order
+        scheduler.finish(j)
+        order.append(j.job_id)
+
+
+def test_shortest_job_first_within_a_class():
+    scheduler = FairShareScheduler(num_workers=1, usage_half_life=1e9)
+    for name, cost in [("long", 300), ("short", 10), ("medium", 60)]:
+        scheduler.add(job(name, cost, client=name))
+    assert drain(scheduler) == ["short", "medium", "long"]
+
+
+def test_priority_class_outranks_cost():
+    scheduler = FairShareScheduler(num_workers=1)
+    scheduler.add(job("low", 1, priority="low", client="a"))
+    scheduler.add(job("high", 500, priority="high", client="b"))
+    assert scheduler.next_job().job_id == "high"
+
+
+def test_unknown_priority_falls_back_to_normal():
+    assert job("x", 1, priority="urgent").priority == "normal"
+
+
+def test_aging_lets_long_waiting_jobs_run_first():
+    scheduler = FairShareScheduler(num_workers=1, aging=1.0)
+    scheduler.add(job("waited", 300, client="a", age=400))
+    scheduler.add(job("fresh", 10, client="b"))
+    assert scheduler.next_job().job_id == "waited"
+
+
+def test_heavy_client_yields_to_other_clients():
+    scheduler = FairShareScheduler(num_workers=1)
+    scheduler.add(job("a1", 100, client="a"))
+    scheduler.add(job("a2", 100, client="a"))
+    scheduler.add(job("b1", 150, client="b"))
+    assert drain(scheduler) == ["a1", "b1", "a2"]
+
+
+def test_reserved_worker_keeps_long_jobs_from_filling_the_pool():
+    scheduler = FairShareScheduler(num_workers=2, long_job_seconds=120)
+    scheduler.add(job("long1", 600, client="a"))
+    scheduler.add(job("long2", 600, client="b"))
+    assert scheduler.next_job().job_id == "long1"
+    assert scheduler.next_job() is None  # 剩下的线程留给短任务
+
+    scheduler.add(job("short", 5, client="c"))
+    assert scheduler.next_job().job_id == "short"
+    assert scheduler.stats()["long_jobs_running"] == 1
+
+
+def test_remove_waiting_job():
+    scheduler = FairShareScheduler(num_workers=1)
+    scheduler.add(job("a", 10))
+    scheduler.add(job("b", 20))
+    assert scheduler.remove("a").job_id == "a"
+    assert scheduler.remove("a") is None
+    assert len(scheduler) == 1
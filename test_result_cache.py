@@ -0,0 +1,74 @@
+import json
+import os
+import time
+
+from result_cache import TranscriptionCache, make_cache_key
+
+
+def key(n):
+    return make_cache_key(f"media-{n}", "base", "zh")
+
+
+def test_put_then_get_counts_hits_and_misses(tmp_path):
+    cache = TranscriptionCache(str(tmp_path))
+    assert cache.get(key(1)) is None
+    cache.put(key(1), {"text": "你好"})
+    assert cache.get(key(1)) == {"text": "你好"}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_cache_key_depends_on_options():
+    assert make_cache_key("m", "base", "zh", {"vad": True}) != make_cache_key("m", "base", "zh", {"vad": False})
+
+
+def test_entry_expires_by_creation_time_even_if_read_recently(tmp_path):
+    cache = TranscriptionCache(str(tmp_path), max_age_days=1)
+    cache.put(key(1), {"text": "old"})
+    path = cache._path(key(1))
+    with open(path, "r", encoding="utf-8") as f:
+        entry = json.load(f)
+    entry["created"] = time.time() - 2 * 86400
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+
+    assert cache.get(key(1)) is None
+    assert not os.path.exists(path)
+
+
+def test_hit_updates_access_time_but_not_write_time(tmp_path):
+    cache = TranscriptionCache(str(tmp_path))
+    cache.put(key(1), {"text": "a"})
+    path = cache._path(key(1))
+    os.utime(path, (1000, 2000))
+    cache.get(key(1))
+    stat = os.stat(path)
+    assert stat.st_mtime == 2000
+    assert stat.st_atime > 2000
+
+
+def test_evicts_least_recently_accessed_entries(tmp_path):
+    cache = TranscriptionCache(str(tmp_path), max_size_mb=None)
+    written = time.time() - 100
+    for n in range(3):
+        cache.put(key(n), {"text": "x" * 100})
+        os.utime(cache._path(key(n)), (written + n, written + n))
+    cache.get(key(0))  # 最早写入但最近访问
+
+    cache.max_size = os.path.getsize(cache._path(key(0))) * 2
+    cache.evict()
+    assert os.path.exists(cache._path(key(0)))
+    assert not os.path.exists(cache._path(key(1)))
+    assert os.path.exists(cache._path(key(2)))
+
+
+def test_invalid_entries_are_removed_and_count_as_misses(tmp_path):
+    cache = TranscriptionCache(str(tmp_path))
+    path = cache._path(key(1))
+    os.makedirs(os.path.dirname(path))
+    for content in ["not json", "[1, 2]", '{"created": 1}', '{"created": "x", "result": {}}']:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        assert cache.get(key(1)) is None
+        assert not os.path.exists(path)
+    assert cache.stats()["misses"] == 4
@@ -0,0 +1,92 @@
+import asyncio
+import hashlib
+
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("python_multipart")
+
+from upload_stream import UploadFormatError, UploadTooLargeError, spool_multipart
+
+BOUNDARY = "vttboundary"
+
+
+class FakeRequest:
+    """只提供 spool_multipart 用到的 headers 和 stream()"""
+
+    def __init__(self, body, content_type=f"multipart/form-data; boundary={BOUNDARY}", content_length=True,
+                 chunk_size=7):
+        self.headers = {"content-type": content_type}
+        if content_length:
+            self.headers["content-length"] = str(len(body))
+        self._body = body
+        self._chunk_size = chunk_size
+
+    async def stream(self):
+        for start in range(0, len(self._body), self._chunk_size):
+            yield self._body[start:start + self._chunk_size]
+
+
+def multipart_body(data, field_name="file", filename="clip.mp4", content_type="video/mp4"):
+    return (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="{field_name}"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + data + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def spool(request, dest, max_size=1024, **kwargs):
+    return asyncio.run(spool_multipart(request, str(dest), max_size, chunk_size=16, **kwargs))
+
+
+def test_spools_file_field_and_hashes_content(tmp_path):
+    data = bytes(range(256)) * 3
+    dest = tmp_path / "upload.bin"
+    filename, content_type, total, digest = spool(FakeRequest(multipart_body(data)), dest,
+                                                  allowed_types={"video/mp4"})
+    assert (filename, content_type, total) == ("clip.mp4", "video/mp4", len(data))
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert dest.read_bytes() == data
+
+
+def test_rejects_declared_content_length_over_limit(tmp_path):
+    dest = tmp_path / "upload.bin"
+    request = FakeRequest(multipart_body(b"x" * 10))
+    request.headers["content-length"] = str(10 ** 9)
+    with pytest.raises(UploadTooLargeError):
+        spool(request, dest)
+    assert not dest.exists()
+
+
+def test_rejects_chunked_body_over_limit(tmp_path):
+    dest = tmp_path / "upload.bin"
+    with pytest.raises(UploadTooLargeError):
+        spool(FakeRequest(multipart_body(b"x" * 4096), content_length=False), dest)
+    assert not dest.exists()
+
+
+def test_rejects_non_multipart_request(tmp_path):
+    with pytest.raises(UploadFormatError):
+        spool(FakeRequest(b"{}", content_type="application/json"), tmp_path / "upload.bin")
+
+
+def test_rejects_malformed_multipart_body(tmp_path):
+    dest = tmp_path / "upload.bin"
+    with pytest.raises(UploadFormatError):
+        spool(FakeRequest(b"this is not a multipart body"), dest)
+    assert not dest.exists()
+
+
+def test_rejects_unsupported_content_type(tmp_path):
+    dest = tmp_path / "upload.bin"
+    with pytest.raises(UploadFormatError):
+        spool(FakeRequest(multipart_body(b"x" * 10, content_type="text/plain")), dest,
+              allowed_types={"video/mp4"})
+    assert not dest.exists()
+
+
+def test_rejects_missing_file_field(tmp_path):
+    dest = tmp_path / "upload.bin"
+    with pytest.raises(UploadFormatError):
+        spool(FakeRequest(multipart_body(b"x" * 10, field_name="other")), dest)
+    assert not dest.exists()
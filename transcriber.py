@@ -0,0 +1,44 @@
+LANGUAGE = 'zh'  # 指定中文
+INITIAL_PROMPT = "以下是普通话的转录文本，包含标点符号："  # 提示词以引导输出带标点的文本
+PUNCTUATION = '，。！？、'
+NO_SPEECH_TEXT = "未识别到语音内容"
+
+
+def transcribe_options(fp16=False):
+    """GUI和批量转写使用的Whisper解码参数（同时作为缓存键的一部分）"""
+    return {
+        "task": 'transcribe',       # 转录任务
+        "fp16": fp16,               # 如果有GPU则使用fp16加速
+        "initial_prompt": INITIAL_PROMPT,
+        "word_timestamps": True,    # 启用词级时间戳，有助于更好的分段
+        "condition_on_previous_text": True,  # 考虑上下文
+        "temperature": 0.0,         # 降低随机性，使输出更稳定
+        "best_of": 1,               # 只生成一个结果
+        "no_speech_threshold": 0.6  # 调整无语音检测阈值
+    }
+
+
+def needs_formatting(text):
+    """文本中缺少标点时需要按分段重新整理"""
+    return len(text) > 0 and not any(p in text for p in PUNCTUATION)
+
+
+def format_transcript(result):
+    """从转写结果中得到最终文本，缺少标点时按分段补充句号并换行"""
+    text = result["text"].strip()
+    if not text:
+        return NO_SPEECH_TEXT
+
+    if needs_formatting(text):
+        # 使用时间戳信息进行分段
+        formatted_text = ""
+        for segment in result.get("segments", []):
+            segment_text = segment.get("text", "").strip()
+            if segment_text:
+                # 如果分段文本末尾没有标点，添加句号
+                if not segment_text[-1] in PUNCTUATION:
+                    segment_text += '。'
+                formatted_text += segment_text + '\n'
+        text = formatted_text.strip()
+
+    return text
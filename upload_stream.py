@@ -0,0 +1,141 @@
+import hashlib
+import os
+
+from starlette.concurrency import run_in_threadpool
+
+try:
+    from python_multipart.exceptions import FormParserError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart 0.0.13 之前的包名
+    from multipart.exceptions import FormParserError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+MULTIPART_OVERHEAD = 64 * 1024  # Content-Length 中除文件内容外允许的表单开销（分隔符、其他字段）
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+class UploadFormatError(Exception):
+    """请求不是有效的 multipart 上传，或文件类型不受支持"""
+
+
+class _FilePart:
+    """multipart 解析回调：只收集名为 field_name 的第一个文件字段的内容"""
+
+    def __init__(self, field_name, allowed_types):
+        self.field_name = field_name
+        self.allowed_types = allowed_types
+        self.filename = None
+        self.content_type = None
+        self.found = False
+        self.pending = []
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._active = False
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        }
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if self.found or options.get(b"name", b"").decode("utf-8", "ignore") != self.field_name:
+            return
+        self.filename = options.get(b"filename", b"").decode("utf-8", "ignore")
+        self.content_type = self._headers.get(b"content-type", b"").decode("latin-1").strip()
+        # 读到文件字段的头部就检查类型，不必等文件内容传完
+        if self.allowed_types is not None and self.content_type not in self.allowed_types:
+            raise UploadFormatError("不支持的文件类型")
+        self.found = True
+        self._active = True
+
+    def _on_part_data(self, data, start, end):
+        if self._active:
+            self.pending.append(data[start:end])
+
+    def _on_part_end(self):
+        self._active = False
+
+
+async def spool_multipart(request, dest_path, max_size, field_name="file", allowed_types=None,
+                          chunk_size=1024 * 1024):
+    """流式解析 multipart/form-data 请求体，把文件字段直接写入 dest_path，同时计算SHA-256
+
+    不经过 Starlette 的表单解析（它会先把整个请求体写入自己的临时文件），上传内容只落盘一次。
+    Content-Length 已超出上限时不读取请求体直接拒绝，分块传输时超出上限立即中止。
+    磁盘写入和哈希计算在线程池中执行，不阻塞事件循环。
+    返回 (文件名, Content-Type, 字节数, 哈希)。
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_size + MULTIPART_OVERHEAD:
+        raise UploadTooLargeError()
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UploadFormatError("需要 multipart/form-data 请求")
+
+    part = _FilePart(field_name, allowed_types)
+    parser = MultipartParser(boundary, part.callbacks())
+    hasher = hashlib.sha256()
+    total = 0
+    buffer = await run_in_threadpool(open, dest_path, "wb")
+
+    def write(data):
+        hasher.update(data)
+        buffer.write(data)
+
+    async def flush(force=False):
+        nonlocal total
+        size = sum(len(data) for data in part.pending)
+        if not size or (size < chunk_size and not force):
+            return
+        total += size
+        if total > max_size:
+            raise UploadTooLargeError()
+        data = b"".join(part.pending)
+        part.pending.clear()
+        await run_in_threadpool(write, data)
+
+    try:
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                await flush()
+            parser.finalize()
+        except FormParserError as e:
+            raise UploadFormatError(f"multipart 请求格式错误: {str(e)}")
+        await flush(force=True)
+        if not part.found:
+            raise UploadFormatError(f"缺少文件字段: {field_name}")
+    except BaseException:
+        await run_in_threadpool(buffer.close)
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+    await run_in_threadpool(buffer.close)
+    return part.filename, part.content_type, total, hasher.hexdigest()
@@ -0,0 +1,153 @@
+from bisect import bisect_right
+
+import numpy as np
+
+from audio_ingest import SAMPLE_RATE
+
+FRAME_SECONDS = 0.03  # 帧长
+MARGIN_DB = 12.0  # 高于噪声底多少分贝视为有声
+MIN_DB = -55.0  # 绝对能量下限
+MAX_THRESHOLD_DB = -35.0  # 自适应阈值的上限，高于此能量的帧一定视为有声
+MIN_SPEECH_RATIO = 0.05  # 检测到的语音低于该比例时认为检测不可靠，转写原始音频
+ZCR_RANGE = (0.01, 0.45)  # 语音帧的过零率范围，过高多为噪声
+HANGOVER_SECONDS = 0.3  # 语音前后保留的时长，避免切掉字头字尾
+MIN_GAP_SECONDS = 0.6  # 短于该时长的停顿不删除
+KEEP_GAP_SECONDS = 0.2  # 删除长停顿后保留的静音，帮助模型断句
+MIN_SAVING_RATIO = 0.05  # 可删除部分不足该比例时不压缩
+
+
+def frame_energy(audio, sample_rate=SAMPLE_RATE, frame_seconds=FRAME_SECONDS):
+    """按帧计算平均能量（向量化）"""
+    frame = max(1, int(sample_rate * frame_seconds))
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    return np.mean(frames * frames, axis=1)
+
+
+def detect_speech(audio, sample_rate=SAMPLE_RATE, frame_seconds=FRAME_SECONDS):
+    """基于帧能量和过零率的语音检测，返回 (每帧是否为语音, 帧长采样点数)"""
+    frame = max(1, int(sample_rate * frame_seconds))
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return np.zeros(0, dtype=bool), frame
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+
+    # 能量：相对噪声底（第10百分位）自适应设定阈值。持续的纯音、噪声、音乐或不间断的讲话
+    # 没有安静的底噪，能量起伏小于 MARGIN_DB 时只用绝对下限；阈值也不超过 MAX_THRESHOLD_DB
+    db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    floor, peak = np.percentile(db, [10, 90])
+    if peak - floor < MARGIN_DB:
+        threshold = MIN_DB
+    else:
+        threshold = min(max(floor + MARGIN_DB, MIN_DB), MAX_THRESHOLD_DB)
+
+    # 过零率
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+    mask = (db > threshold) & (zcr >= ZCR_RANGE[0]) & (zcr <= ZCR_RANGE[1])
+
+    # 向前后扩展，保留字头字尾
+    hangover = int(HANGOVER_SECONDS / frame_seconds)
+    if hangover and mask.any():
+        kernel = np.ones(2 * hangover + 1, dtype=np.int32)
+        mask = np.convolve(mask.astype(np.int32), kernel, mode="same") > 0
+    return mask, frame
+
+
+def speech_spans(mask, frame, min_gap_samples):
+    """把语音帧掩码转换为 [起点, 终点) 采样点区间，合并间隔较短的区间"""
+    padded = np.concatenate(([0], mask.astype(np.int8), [0]))
+    changes = np.flatnonzero(np.diff(padded))
+    spans = []
+    for start, end in zip(changes[0::2] * frame, changes[1::2] * frame):
+        if spans and start - spans[-1][1] < min_gap_samples:
+            spans[-1][1] = end
+        else:
+            spans.append([int(start), int(end)])
+    return spans
+
+
+class TimeMap:
+    """压缩后音频的时间到原始时间的映射"""
+
+    def __init__(self, pieces, sample_rate=SAMPLE_RATE):
+        # pieces: [(压缩后起点, 原始起点, 长度)]，单位为采样点
+        self.sample_rate = sample_rate
+        self._comp_starts = [piece[0] / sample_rate for piece in pieces]
+        self._pieces = [(c / sample_rate, o / sample_rate, n / sample_rate) for c, o, n in pieces]
+
+    def to_original(self, t):
+        index = max(0, bisect_right(self._comp_starts, t) - 1)
+        comp_start, orig_start, length = self._pieces[index]
+        # 落在保留静音中的时间映射到前一段语音的末尾
+        return orig_start + min(max(t - comp_start, 0.0), length)
+
+
+def compress_silence(audio, sample_rate=SAMPLE_RATE):
+    """删除较长的非语音片段
+
+    返回 (处理后的音频, TimeMap 或 None, 统计信息)。
+    TimeMap 为 None 表示没有压缩，时间戳无需换算。检测只是加速手段，没有检测到语音或语音
+    比例低于 MIN_SPEECH_RATIO 时返回原始音频（统计信息中 vad_fallback 为 True），不会跳过推理。
+    """
+    total_seconds = len(audio) / sample_rate
+    mask, frame = detect_speech(audio, sample_rate)
+    spans = speech_spans(mask, frame, int(MIN_GAP_SECONDS * sample_rate))
+    speech_samples = sum(end - start for start, end in spans)
+    stats = {
+        "speech_ratio": round(speech_samples / len(audio), 3) if len(audio) else 0.0,
+        "original_seconds": round(total_seconds, 2),
+        "skipped_seconds": 0.0
+    }
+
+    if not spans or speech_samples / len(audio) < MIN_SPEECH_RATIO:
+        stats["vad_fallback"] = True
+        return audio, None, stats
+    if 1 - speech_samples / len(audio) < MIN_SAVING_RATIO:
+        return audio, None, stats
+
+    keep_gap = np.zeros(int(KEEP_GAP_SECONDS * sample_rate), dtype=audio.dtype)
+    parts = []
+    pieces = []
+    position = 0
+    for start, end in spans:
+        if parts:
+            parts.append(keep_gap)
+            position += len(keep_gap)
+        parts.append(audio[start:end])
+        pieces.append((position, start, end - start))
+        position += end - start
+
+    compressed = np.concatenate(parts)
+    stats["skipped_seconds"] = round((len(audio) - len(compressed)) / sample_rate, 2)
+    return compressed, TimeMap(pieces, sample_rate), stats
+
+
+def restore_timestamps(result, time_map):
+    """把转写结果中的时间戳换算回原始时间轴"""
+    for segment in result.get("segments", []):
+        segment["start"] = time_map.to_original(segment["start"])
+        segment["end"] = time_map.to_original(segment["end"])
+        for word in segment.get("words", []):
+            word["start"] = time_map.to_original(word["start"])
+            word["end"] = time_map.to_original(word["end"])
+    return result
+
+
+def transcribe_with_vad(transcribe_func, audio, sample_rate=SAMPLE_RATE, enabled=True):
+    """先去掉静音再调用 transcribe_func(audio)，返回 (结果, VAD统计信息)"""
+    if not enabled:
+        return transcribe_func(audio), None
+
+    speech_audio, time_map, stats = compress_silence(audio, sample_rate)
+    if len(speech_audio) == 0:
+        # 输入为空
+        return {"text": "", "segments": []}, stats
+
+    result = transcribe_func(speech_audio)
+    if time_map is not None:
+        restore_timestamps(result, time_map)
+    return result, stats